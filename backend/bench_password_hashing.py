@@ -0,0 +1,75 @@
+"""
+Micro-benchmark de verificación de contraseñas con el pool de bcrypt: lanza
+logins concurrentes durante unos segundos y muestra logins/s y logins/s por
+núcleo. No necesita base de datos.
+
+Uso:
+    python bench_password_hashing.py
+    python bench_password_hashing.py --rounds 10 --workers 4 --concurrency 32 --seconds 5
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from typing import List, Optional
+
+from fastapi import HTTPException
+
+from src.services.password_hasher import (
+    BCRYPT_ROUNDS,
+    PASSWORD_HASH_WORKERS,
+    PasswordHasher,
+)
+
+
+async def medir(hasher: PasswordHasher, concurrency: int, seconds: float) -> dict:
+    hashed = await hasher.hash_password("benchmark-password")
+    # Calentamiento: arranca todos los procesos del pool antes de medir
+    await asyncio.gather(
+        *(hasher.verify_password("benchmark-password", hashed) for _ in range(concurrency))
+    )
+
+    fin = time.perf_counter() + seconds
+    totales = {"ok": 0, "rejected": 0}
+
+    async def cliente() -> None:
+        while time.perf_counter() < fin:
+            try:
+                assert await hasher.verify_password("benchmark-password", hashed)
+                totales["ok"] += 1
+            except HTTPException:
+                totales["rejected"] += 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente() for _ in range(concurrency)))
+    totales["duracion"] = time.perf_counter() - inicio
+    return totales
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de bcrypt en el pool de procesos")
+    parser.add_argument("--rounds", type=int, default=BCRYPT_ROUNDS)
+    parser.add_argument("--workers", type=int, default=PASSWORD_HASH_WORKERS)
+    parser.add_argument(
+        "--concurrency", type=int, default=16, help="Logins simultáneos"
+    )
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    hasher = PasswordHasher(args.rounds, args.workers, max_pending=args.concurrency, timeout=60)
+    totales = asyncio.run(medir(hasher, args.concurrency, args.seconds))
+    duracion = totales["duracion"]
+    hasher.cerrar()
+
+    nucleos = max(1, min(args.workers or 1, os.cpu_count() or 1))
+    por_segundo = totales["ok"] / duracion
+    print(f"rounds={args.rounds} workers={args.workers} concurrency={args.concurrency}")
+    print(f"logins: {totales['ok']} en {duracion:.2f}s, rechazados: {totales['rejected']}")
+    print(f"logins/s: {por_segundo:.1f}")
+    print(f"logins/s por núcleo: {por_segundo / nucleos:.1f}")
+    print(f"latencia media: {hasher.stats()['avg_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Exporta el reporte de /analytics de muchos usuarios a un archivo JSONL
+(una línea por usuario), calculado por lotes.
+
+Uso:
+    python export_analytics.py --output analytics.jsonl
+    python export_analytics.py --start 2024-01-01 --end 2024-12-31 --user-id 1 --user-id 2
+"""
+
+import argparse
+import json
+import sys
+from datetime import date
+from typing import List, Optional
+
+from pony.orm import db_session, select
+
+from src.db import db
+import src.models  # noqa: F401
+from src.models import Usuario
+from src.services.analytics_service import AnalyticsService, ANALYTICS_BATCH_CHUNK
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Exporta analytics de usuarios en JSONL")
+    parser.add_argument("--start", type=date.fromisoformat, default=None)
+    parser.add_argument("--end", type=date.fromisoformat, default=None)
+    parser.add_argument("--user-id", type=int, action="append", default=None)
+    parser.add_argument("--output", default="-", help="Archivo de salida ('-' para stdout)")
+    args = parser.parse_args(argv)
+
+    db.generate_mapping(create_tables=True)
+    if args.user_id:
+        user_ids = args.user_id
+    else:
+        with db_session:
+            user_ids = select(u.id for u in Usuario).order_by(1)[:]
+
+    service = AnalyticsService()
+    salida = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        for desde in range(0, len(user_ids), ANALYTICS_BATCH_CHUNK):
+            bloque = user_ids[desde:desde + ANALYTICS_BATCH_CHUNK]
+            reportes = service.reporte_lote(bloque, args.start, args.end)
+            for uid in bloque:
+                salida.write(json.dumps({"user_id": uid, **reportes[uid]}, default=str) + "\n")
+    finally:
+        if salida is not sys.stdout:
+            salida.close()
+
+
+if __name__ == "__main__":
+    main()
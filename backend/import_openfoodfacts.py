@@ -0,0 +1,169 @@
+"""
+Importa un volcado de OpenFoodFacts (CSV/TSV o JSONL, opcionalmente .gz) en
+la tabla Food, haciendo upsert por barcode en lotes grandes. Los alimentos
+que creó un usuario con el mismo barcode no se modifican.
+
+Uso:
+    python import_openfoodfacts.py en.openfoodfacts.org.products.csv.gz
+    python import_openfoodfacts.py openfoodfacts-products.jsonl.gz --batch-size 10000
+
+El progreso se guarda en un checkpoint después de cada lote confirmado; si
+el proceso se interrumpe, al relanzarlo continúa desde la última fila
+guardada (usar --no-resume para empezar de cero).
+"""
+
+import argparse
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pony.orm import db_session
+
+from src.db import db
+import src.models  # noqa: F401
+from src.models import Food
+from src.services.openfoodfacts_dump import (
+    abrir_texto,
+    detectar_formato,
+    filas_validas,
+    guardar_checkpoint,
+    leer_checkpoint,
+    origen_de,
+    productos_csv,
+    productos_jsonl,
+)
+
+
+def _sql_upsert() -> str:
+    q = db.provider.quote_name
+    tabla = q(Food._table_)
+    col = {
+        nombre: q(getattr(Food, nombre).columns[0])
+        for nombre in (
+            "barcode",
+            "name",
+            "calories_per_100g",
+            "protein_per_100g",
+            "carbs_per_100g",
+            "fat_per_100g",
+            "created_at",
+            "updated_at",
+            "created_by",
+        )
+    }
+    datos = ("name", "calories_per_100g", "protein_per_100g", "carbs_per_100g", "fat_per_100g")
+    columnas = ", ".join(v for k, v in col.items() if k != "created_by")
+    asignaciones = ", ".join(f"{col[c]} = EXCLUDED.{col[c]}" for c in datos)
+    actuales = ", ".join(f"{tabla}.{col[c]}" for c in datos)
+    nuevos = ", ".join(f"EXCLUDED.{col[c]}" for c in datos)
+    # Solo se actualizan (y se mueve updated_at) las filas que cambian, para
+    # no inflar la sincronización incremental de /foods/changes, y solo las
+    # que vienen de OpenFoodFacts (sin usuario creador).
+    return (
+        f"INSERT INTO {tabla} ({columnas}) VALUES %s "
+        f"ON CONFLICT ({col['barcode']}) DO UPDATE SET {asignaciones}, "
+        f"{col['updated_at']} = EXCLUDED.{col['updated_at']} "
+        f"WHERE {tabla}.{col['created_by']} IS NULL "
+        f"AND ({actuales}) IS DISTINCT FROM ({nuevos})"
+    )
+
+
+def _upsert_lote(sql: str, lote: Dict[str, dict]) -> None:
+    from psycopg2.extras import execute_values
+
+    ahora = datetime.now()
+    filas = [
+        (
+            barcode,
+            food["name"],
+            food["calories_per_100g"],
+            food["protein_per_100g"],
+            food["carbs_per_100g"],
+            food["fat_per_100g"],
+            ahora,
+            ahora,
+        )
+        for barcode, food in lote.items()
+    ]
+    with db_session:
+        cursor = db.get_connection().cursor()
+        execute_values(cursor, sql, filas, page_size=len(filas))
+
+
+def importar(
+    path: str,
+    formato: Optional[str] = None,
+    batch_size: int = 5000,
+    delimiter: str = "\t",
+    checkpoint_path: Optional[str] = None,
+    resume: bool = True,
+) -> dict:
+    if db.provider.dialect != "PostgreSQL":
+        raise SystemExit("El importador masivo requiere PostgreSQL (INSERT ... ON CONFLICT)")
+
+    formato = formato or detectar_formato(path)
+    checkpoint_path = checkpoint_path or f"{path}.checkpoint.json"
+    origen = origen_de(path)
+
+    inicio_en = leer_checkpoint(checkpoint_path, origen) if resume else 0
+    if inicio_en is None:
+        print(f"Checkpoint {checkpoint_path} corresponde a otro archivo; se ignora")
+        inicio_en = 0
+    elif inicio_en:
+        print(f"Reanudando desde la fila {inicio_en}")
+
+    sql = _sql_upsert()
+    stats = {"read": 0, "upserted": 0, "skipped": 0}
+    lote: Dict[str, dict] = {}
+    t0 = time.monotonic()
+
+    with abrir_texto(path) as archivo:
+        productos = (
+            productos_jsonl(archivo)
+            if formato == "jsonl"
+            else productos_csv(archivo, delimiter)
+        )
+        for posicion, barcode, food in filas_validas(productos, inicio_en, stats):
+            # Un barcode repetido dentro del lote haría fallar el ON CONFLICT
+            lote[barcode] = food
+            if len(lote) >= batch_size:
+                _upsert_lote(sql, lote)
+                stats["upserted"] += len(lote)
+                lote = {}
+                guardar_checkpoint(checkpoint_path, origen, posicion, stats)
+                ritmo = stats["read"] / max(time.monotonic() - t0, 1e-6)
+                print(f"{posicion} filas procesadas ({ritmo:.0f} filas/s)")
+
+        if lote:
+            _upsert_lote(sql, lote)
+            stats["upserted"] += len(lote)
+        guardar_checkpoint(checkpoint_path, origen, stats["position"], stats)
+
+    stats["seconds"] = round(time.monotonic() - t0, 2)
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Importa un volcado de OpenFoodFacts en Food")
+    parser.add_argument("path", help="Archivo CSV/TSV o JSONL, opcionalmente .gz")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default=None)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--delimiter", default="\t", help="Separador del CSV (el volcado oficial usa tabuladores)")
+    parser.add_argument("--checkpoint", default=None)
+    parser.add_argument("--no-resume", action="store_true")
+    args = parser.parse_args(argv)
+
+    db.generate_mapping(create_tables=True)
+    stats = importar(
+        args.path,
+        formato=args.format,
+        batch_size=max(1, args.batch_size),
+        delimiter=args.delimiter,
+        checkpoint_path=args.checkpoint,
+        resume=not args.no_resume,
+    )
+    print(f"Importación terminada: {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,9 @@ from fastapi.security import OAuth2PasswordBearer
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from src.db import db
+from src.db_pool import PoolAgotado
+from src.utils.admission import AdmissionControlMiddleware
+from src.utils.responses import respuesta_error
 from pony.orm import *
 from fastapi import FastAPI
 
@@ -14,6 +17,10 @@ app = FastAPI()
 db.generate_mapping(create_tables=True)
 
 
+# Límites de concurrencia por grupo de rutas. Se añade antes que CORS para
+# que las respuestas 429/503 también lleven sus cabeceras.
+app.add_middleware(AdmissionControlMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     # Permitimos todas las origins para simplificar el despliegue
@@ -24,6 +31,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(PoolAgotado)
+async def pool_agotado(request, exc):
+    # Sin conexión libre en el plazo: se pide al cliente que reintente en
+    # lugar de devolver un 500
+    return respuesta_error(
+        "Servicio saturado, inténtalo más tarde", 503, headers={"Retry-After": "1"}
+    )
+
 # Lista de Rutas
 from src.controllers.usuario_controller import router as usuario_router
 from src.controllers.settings_controller import router as settings_router
@@ -31,6 +46,8 @@ from src.controllers.food_controller import router as food_router
 from src.controllers.dashboard_controller import router as dashboard_router
 from src.controllers.meal_controller import router as meal_router
 from src.controllers.health_controller import router as health_router
+from src.controllers.analytics_controller import router as analytics_router
+from src.controllers.bootstrap_controller import router as bootstrap_router
 
 app.include_router(usuario_router)
 app.include_router(settings_router)
@@ -38,6 +55,8 @@ app.include_router(food_router)
 app.include_router(dashboard_router)
 app.include_router(meal_router)
 app.include_router(health_router)
+app.include_router(analytics_router)
+app.include_router(bootstrap_router)
 
 # Personalizar el esquema de seguridad en OpenAPI para usar Bearer tokens
 _HTTP_METHODS = ("get", "post", "put", "delete", "patch", "head", "options", "trace")
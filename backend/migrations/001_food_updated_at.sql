@@ -0,0 +1,6 @@
+-- Pony solo crea tablas nuevas (FoodTombstone); las columnas nuevas de
+-- tablas existentes hay que añadirlas a mano antes de desplegar.
+ALTER TABLE food ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP;
+UPDATE food SET updated_at = created_at WHERE updated_at IS NULL;
+ALTER TABLE food ALTER COLUMN updated_at SET NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_food__updated_at ON food (updated_at);
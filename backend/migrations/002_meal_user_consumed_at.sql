@@ -0,0 +1,3 @@
+-- Índice para las consultas de comidas por usuario y rango de fechas
+-- (Pony no crea índices nuevos en tablas existentes).
+CREATE INDEX IF NOT EXISTS idx_meal__user_consumed_at ON meal ("user", consumed_at);
@@ -0,0 +1,23 @@
+-- Rellena DailyTotals con las comidas ya registradas. Ejecutar antes de
+-- desplegar la versión que lee el dashboard de esta tabla: los días que
+-- ya tengan fila no se tocan, así que si MealService ya hubiera acumulado
+-- comidas nuevas en un día sin fila previa, ese día quedaría incompleto
+-- (rebuild_daily_totals.py lo detecta y --repair lo corrige).
+CREATE TABLE IF NOT EXISTS dailytotals (
+  id SERIAL PRIMARY KEY,
+  "user" INTEGER NOT NULL,
+  day DATE NOT NULL,
+  calories DOUBLE PRECISION NOT NULL,
+  protein DOUBLE PRECISION NOT NULL,
+  carbs DOUBLE PRECISION NOT NULL,
+  fat DOUBLE PRECISION NOT NULL,
+  meal_count INTEGER NOT NULL,
+  CONSTRAINT unq_dailytotals__user_day UNIQUE ("user", day),
+  CONSTRAINT fk_dailytotals__user FOREIGN KEY ("user") REFERENCES usuario (id) ON DELETE CASCADE
+);
+
+INSERT INTO dailytotals ("user", day, calories, protein, carbs, fat, meal_count)
+SELECT "user", consumed_at::date, sum(calories), sum(protein), sum(carbs), sum(fat), count(*)
+FROM meal
+GROUP BY "user", consumed_at::date
+ON CONFLICT ("user", day) DO NOTHING;
@@ -0,0 +1,45 @@
+"""
+Recalcula los totales diarios (DailyTotals) a partir de Meal.
+
+Uso:
+    python rebuild_daily_totals.py                # solo verifica y muestra las diferencias
+    python rebuild_daily_totals.py --repair       # reescribe los días que no coinciden
+    python rebuild_daily_totals.py --repair --user-id 42
+
+El relleno inicial lo hace migrations/003_daily_totals_backfill.sql. La
+reparación no bloquea las comidas que se registren mientras se ejecuta:
+conviene lanzarla con poco tráfico y volver a verificar después.
+Sin --repair, el proceso termina con código 1 si encuentra diferencias.
+"""
+
+import argparse
+import sys
+from typing import List, Optional
+
+from src.db import db
+import src.models  # noqa: F401
+from src.services.daily_totals_service import daily_totals_service
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Verifica o reconstruye DailyTotals desde Meal")
+    parser.add_argument("--repair", action="store_true", help="Reescribe los totales que no coinciden")
+    parser.add_argument("--user-id", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    db.generate_mapping(create_tables=True)
+    stats = daily_totals_service.recalcular(user_id=args.user_id, reparar=args.repair)
+    diferencias = stats["missing"] + stats["stale"] + stats["orphan"]
+
+    accion = "reparados" if args.repair else "con diferencias"
+    print(f"Usuarios: {stats['users']}, días con comidas: {stats['days']}")
+    print(
+        f"Días {accion}: {diferencias} "
+        f"(faltantes {stats['missing']}, desactualizados {stats['stale']}, huérfanos {stats['orphan']})"
+    )
+    if diferencias and not args.repair:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
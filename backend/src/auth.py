@@ -1,6 +1,8 @@
+import hmac
+import time
 from datetime import datetime, timedelta
 from typing import Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from decouple import config
@@ -8,6 +10,8 @@ from decouple import config
 SECRET_KEY = config("SECRET", default="secret-dev-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 días
+# Token para leer /metrics (Authorization: Bearer <token>); vacío lo desactiva
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
@@ -22,7 +26,9 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+async def get_current_user(token: str = Depends(oauth2_scheme)):
+    from src.db_executor import en_db
+    from src.services.auth_cache import auth_cache
     from src.services.usuario_service import UsuarioService
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -34,10 +40,33 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
         user_id: Optional[int] = payload.get("sub")
         if user_id is None:
             raise credentials_exception
-    except JWTError:
+        user_id = int(user_id)
+    except (JWTError, ValueError):
         raise credentials_exception
-    service = UsuarioService()
-    usuario = service.buscar_usuario_por_id(int(user_id))
+
+    usuario = auth_cache.get(token)
+    if usuario is not None:
+        return usuario
+
+    marca = auth_cache.marca()
+    usuario = await en_db(UsuarioService().buscar_usuario_por_id, user_id)
     if usuario is None:
         raise credentials_exception
+    auth_cache.put(token, usuario, marca, expira_en=payload.get("exp", time.time()) - time.time())
     return usuario
+
+
+def verificar_token_metricas(authorization: Optional[str] = Header(None)) -> None:
+    # Sin token configurado el endpoint no existe para nadie
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    esquema, _, token = (authorization or "").partition(" ")
+    valido = esquema.lower() == "bearer" and hmac.compare_digest(
+        token.encode("utf-8"), METRICS_TOKEN.encode("utf-8")
+    )
+    if not valido:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token de métricas inválido",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
@@ -0,0 +1,27 @@
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Depends
+
+from src.schemas import BaseAPIResponse
+from src.services.analytics_service import AnalyticsService
+from src.auth import get_current_user
+from src.db_executor import en_db
+from src.utils.responses import respuesta_ok, respuesta_error
+
+
+router = APIRouter(tags=["Analytics"])
+service = AnalyticsService()
+
+
+@router.get("/analytics", response_model=BaseAPIResponse)
+async def obtener_analytics(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    current_user=Depends(get_current_user),
+):
+    try:
+        data = await en_db(service.obtener_reporte, current_user["id"], start_date, end_date)
+        return respuesta_ok("Análisis obtenido correctamente", data)
+    except HTTPException as e:
+        return respuesta_error(e.detail, e.status_code)
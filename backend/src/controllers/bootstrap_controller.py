@@ -0,0 +1,44 @@
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Depends
+
+from src.schemas import BaseAPIResponse
+from src.services.bootstrap_service import BootstrapService
+from src.services.food_service import LIST_DEFAULT_LIMIT
+from src.auth import get_current_user
+from src.db_executor import en_db
+from src.utils.responses import respuesta_ok, respuesta_error
+
+
+router = APIRouter(tags=["Bootstrap"])
+service = BootstrapService()
+
+
+def _lista(valor: Optional[str]):
+    return [v.strip() for v in valor.split(",") if v.strip()] if valor else None
+
+
+@router.get("/bootstrap", response_model=BaseAPIResponse)
+async def obtener_bootstrap(
+    fields: Optional[str] = None,
+    food_limit: int = LIST_DEFAULT_LIMIT,
+    food_fields: Optional[str] = None,
+    current_user=Depends(get_current_user),
+):
+    """
+    Usuario, configuración, dashboard y comidas de hoy y primera página del
+    catálogo en una sola petición. `fields` elige las secciones
+    (user,settings,dashboard,meals,foods) y `food_fields` las columnas de
+    los alimentos.
+    """
+    try:
+        data = await en_db(
+            service.obtener_bootstrap,
+            current_user,
+            _lista(fields),
+            food_limit,
+            _lista(food_fields),
+        )
+        return respuesta_ok("Datos iniciales obtenidos correctamente", data)
+    except HTTPException as e:
+        return respuesta_error(e.detail, e.status_code)
@@ -1,41 +1,61 @@
+import asyncio
+import json
 from datetime import date
 from typing import Optional, Dict, Any
 
+from decouple import config
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 
 from src.schemas import BaseAPIResponse
 from src.services.dashboard_service import DashboardService
+from src.services.dashboard_events import dashboard_events, DemasiadasConexiones, RESYNC
 from src.auth import get_current_user
+from src.db_executor import en_db
 from src.utils.responses import respuesta_ok, respuesta_error
 
 
 router = APIRouter(tags=["Dashboard"])
 service = DashboardService()
 
+# Comentario SSE periódico para que proxies y clientes no den la conexión
+# por muerta, y cierre tras un rato sin cambios (EventSource reconecta solo)
+DASHBOARD_STREAM_HEARTBEAT_SECONDS = config(
+    "DASHBOARD_STREAM_HEARTBEAT_SECONDS", default=20.0, cast=float
+)
+DASHBOARD_STREAM_IDLE_SECONDS = config(
+    "DASHBOARD_STREAM_IDLE_SECONDS", default=900.0, cast=float
+)
+
 
 @router.get("/dashboard/today", response_model=BaseAPIResponse)
-def obtener_dashboard_hoy(
+async def obtener_dashboard_hoy(
     current_user=Depends(get_current_user),
 ):
     try:
         today = date.today()
-        data = service.obtener_dashboard_del_dia(current_user["id"], today)
+        data = await en_db(service.obtener_dashboard_del_dia, current_user["id"], today)
         return respuesta_ok("Dashboard del día obtenido correctamente", data)
     except HTTPException as e:
         return respuesta_error(e.detail, e.status_code)
 
 
 @router.get("/dashboard/range", response_model=BaseAPIResponse)
-def obtener_dashboard_rango(
+async def obtener_dashboard_rango(
     start_date: date,
     end_date: date,
+    resolution: str = "day",
     current_user=Depends(get_current_user),
 ):
     try:
-        data = service.obtener_dashboard_rango(
+        data = await en_db(
+            service.obtener_dashboard_rango,
             current_user["id"],
             start_date,
             end_date,
+            resolution,
         )
         return respuesta_ok(
             "Dashboard del rango obtenido correctamente",
@@ -44,3 +64,76 @@ def obtener_dashboard_rango(
     except HTTPException as e:
         return respuesta_error(e.detail, e.status_code)
 
+
+def _sse(evento: str, data: Dict[str, Any]) -> str:
+    return f"event: {evento}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+async def _snapshot(conexion, user_id: int, dia: date) -> Dict[str, Any]:
+    # Los cambios confirmados mientras se calcula el snapshot ya pueden estar
+    # incluidos en él: se descartan y se recalcula hasta que no llegue ninguno
+    while True:
+        while not conexion.queue.empty():
+            conexion.queue.get_nowait()
+        data = await en_db(service.obtener_dashboard_del_dia, user_id, dia)
+        if conexion.queue.empty():
+            return data
+
+
+async def _eventos_dashboard(conexion, user_id: int):
+    loop = asyncio.get_running_loop()
+    try:
+        dia = date.today()
+        yield _sse("snapshot", await _snapshot(conexion, user_id, dia))
+        ultimo_cambio = loop.time()
+
+        while True:
+            try:
+                evento = await asyncio.wait_for(
+                    conexion.queue.get(), DASHBOARD_STREAM_HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                if date.today() != dia:
+                    dia = date.today()
+                    yield _sse("snapshot", await _snapshot(conexion, user_id, dia))
+                elif loop.time() - ultimo_cambio > DASHBOARD_STREAM_IDLE_SECONDS:
+                    return
+                else:
+                    yield ": ping\n\n"
+                continue
+
+            ultimo_cambio = loop.time()
+            if evento is RESYNC or date.today() != dia:
+                dia = date.today()
+                yield _sse("snapshot", await _snapshot(conexion, user_id, dia))
+            elif evento["type"] == "delta":
+                # Solo interesan los cambios del día que muestra el cliente
+                if evento["date"] == dia:
+                    yield _sse("delta", evento)
+            else:
+                yield _sse(evento["type"], evento)
+    finally:
+        dashboard_events.desuscribir(conexion)
+
+
+@router.get("/dashboard/stream")
+async def stream_dashboard(current_user=Depends(get_current_user)):
+    """
+    Server-Sent Events: un snapshot del día al conectar y después deltas
+    (comidas añadidas o eliminadas, cambios de configuración).
+    """
+    try:
+        conexion = dashboard_events.suscribir(current_user["id"])
+    except DemasiadasConexiones:
+        return respuesta_error(
+            "Demasiadas conexiones de dashboard abiertas, inténtalo más tarde",
+            503,
+            headers={"Retry-After": "30"},
+        )
+    return StreamingResponse(
+        _eventos_dashboard(conexion, current_user["id"]),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Por si el generador no llega a arrancar; desuscribir es idempotente
+        background=BackgroundTask(dashboard_events.desuscribir, conexion),
+    )
@@ -1,11 +1,30 @@
 from typing import Optional, Dict, Any
 
-from fastapi import APIRouter, HTTPException, Depends
-
-from src.schemas import FoodCreate, FoodUpdate, BaseAPIResponse
-from src.services.food_service import FoodService
+from fastapi import APIRouter, HTTPException, Depends, Header, Response
+
+from src.schemas import (
+    FoodCreate,
+    FoodUpdate,
+    FoodBulkCreate,
+    BarcodeBatchRequest,
+    BaseAPIResponse,
+)
+from src.services.food_service import (
+    FoodService,
+    AUTOCOMPLETE_DEFAULT_LIMIT,
+    CHANGES_DEFAULT_LIMIT,
+    LIST_DEFAULT_LIMIT,
+    SEARCH_DEFAULT_LIMIT,
+)
 from src.auth import get_current_user
-from src.utils.responses import respuesta_ok, respuesta_error
+from src.db_executor import en_db
+from src.utils.responses import (
+    respuesta_ok,
+    respuesta_error,
+    etag_para,
+    etag_coincide,
+    respuesta_no_modificada,
+)
 
 
 router = APIRouter(tags=["Food"])
@@ -13,84 +32,165 @@ service = FoodService()
 
 
 @router.post("/foods/create", response_model=BaseAPIResponse)
-def crear_food(
+async def crear_food(
     body: FoodCreate,
     current_user=Depends(get_current_user),
 ):
     try:
-        data = service.crear_food(body, current_user["id"])
+        data = await en_db(service.crear_food, body, current_user["id"])
         return respuesta_ok("Alimento creado correctamente", data)
     except HTTPException as e:
         return respuesta_error(e.detail, e.status_code)
 
 
+@router.post("/foods/bulk", response_model=BaseAPIResponse)
+async def crear_foods_bulk(
+    body: FoodBulkCreate,
+    current_user=Depends(get_current_user),
+):
+    try:
+        data = await en_db(service.crear_foods_bulk, body.items, current_user["id"])
+        return respuesta_ok("Lote de alimentos procesado correctamente", data)
+    except HTTPException as e:
+        return respuesta_error(e.detail, e.status_code)
+
+
 @router.get("/foods/all", response_model=BaseAPIResponse)
-def listar_foods(
+async def listar_foods(
+    response: Response,
+    cursor: Optional[int] = None,
+    limit: int = LIST_DEFAULT_LIMIT,
+    fields: Optional[str] = None,
+    if_none_match: Optional[str] = Header(default=None),
     current_user=Depends(get_current_user),
 ):
+    etag = etag_para(await en_db(service.catalog_version))
+    if etag_coincide(if_none_match, etag):
+        return respuesta_no_modificada(etag)
     try:
-        data = service.listar_foods(current_user["id"])
+        field_list = (
+            [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+        )
+        data = await en_db(service.listar_foods, current_user["id"], cursor, limit, field_list)
+        if etag_coincide(if_none_match, etag, existe=True):
+            return respuesta_no_modificada(etag)
+        response.headers["ETag"] = etag
         return respuesta_ok("Alimentos obtenidos correctamente", data)
     except HTTPException as e:
         return respuesta_error(e.detail, e.status_code)
 
 
+@router.get("/foods/changes", response_model=BaseAPIResponse)
+async def listar_cambios_foods(
+    since: Optional[str] = None,
+    limit: int = CHANGES_DEFAULT_LIMIT,
+    current_user=Depends(get_current_user),
+):
+    try:
+        data = await en_db(service.listar_cambios, since, limit)
+        return respuesta_ok("Cambios de alimentos obtenidos correctamente", data)
+    except HTTPException as e:
+        return respuesta_error(e.detail, e.status_code)
+
+
 @router.get("/foods/search", response_model=BaseAPIResponse)
-def buscar_foods_por_nombre(
+async def buscar_foods_por_nombre(
     name: str,
+    limit: int = SEARCH_DEFAULT_LIMIT,
     current_user=Depends(get_current_user),
 ):
     try:
-        data = service.buscar_food_por_nombre(name, current_user["id"])
+        data = await en_db(service.buscar_food_por_nombre, name, current_user["id"], limit)
         return respuesta_ok("Alimentos encontrados correctamente", data)
     except HTTPException as e:
         return respuesta_error(e.detail, e.status_code)
 
 
+@router.get("/foods/autocomplete", response_model=BaseAPIResponse)
+async def autocompletar_foods(
+    q: str,
+    limit: int = AUTOCOMPLETE_DEFAULT_LIMIT,
+    current_user=Depends(get_current_user),
+):
+    try:
+        data = await en_db(service.autocompletar_food, q, limit)
+        return respuesta_ok("Sugerencias obtenidas correctamente", data)
+    except HTTPException as e:
+        return respuesta_error(e.detail, e.status_code)
+
+
 @router.get("/foods/{food_id}", response_model=BaseAPIResponse)
-def obtener_food(
+async def obtener_food(
     food_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(default=None),
     current_user=Depends(get_current_user),
 ):
+    etag = etag_para(await en_db(service.catalog_version))
+    if etag_coincide(if_none_match, etag):
+        return respuesta_no_modificada(etag)
     try:
-        data = service.obtener_food_por_id(food_id)
+        data = await en_db(service.obtener_food_por_id, food_id)
+        if etag_coincide(if_none_match, etag, existe=True):
+            return respuesta_no_modificada(etag)
+        response.headers["ETag"] = etag
         return respuesta_ok("Alimento obtenido correctamente", data)
     except HTTPException as e:
         return respuesta_error(e.detail, e.status_code)
 
 
+@router.post("/foods/barcode/batch", response_model=BaseAPIResponse)
+async def obtener_foods_por_barcodes(
+    body: BarcodeBatchRequest,
+    current_user=Depends(get_current_user),
+):
+    try:
+        data = await service.buscar_o_crear_barcodes(body.barcodes)
+        return respuesta_ok("Códigos de barras procesados correctamente", data)
+    except HTTPException as e:
+        return respuesta_error(e.detail, e.status_code, e.headers)
+
+
 @router.get("/foods/barcode/{barcode}", response_model=BaseAPIResponse)
-def obtener_food_por_barcode(
+async def obtener_food_por_barcode(
     barcode: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(default=None),
     current_user=Depends(get_current_user),
 ):
+    etag = etag_para(await en_db(service.catalog_version))
+    if etag_coincide(if_none_match, etag):
+        return respuesta_no_modificada(etag)
     try:
-        data = service.buscar_o_crear_por_barcode(barcode)
+        data = await service.buscar_o_crear_por_barcode(barcode)
+        if etag_coincide(if_none_match, etag, existe=True):
+            return respuesta_no_modificada(etag)
+        response.headers["ETag"] = etag
         return respuesta_ok("Alimento obtenido correctamente por código de barras", data)
     except HTTPException as e:
-        return respuesta_error(e.detail, e.status_code)
+        return respuesta_error(e.detail, e.status_code, e.headers)
 
 
 @router.put("/foods/{food_id}", response_model=BaseAPIResponse)
-def actualizar_food(
+async def actualizar_food(
     food_id: int,
     body: FoodUpdate,
     current_user=Depends(get_current_user),
 ):
     try:
-        data = service.actualizar_food(food_id, body, current_user["id"])
+        data = await en_db(service.actualizar_food, food_id, body, current_user["id"])
         return respuesta_ok("Alimento actualizado correctamente", data)
     except HTTPException as e:
         return respuesta_error(e.detail, e.status_code)
 
 
 @router.delete("/foods/{food_id}", response_model=BaseAPIResponse)
-def eliminar_food(
+async def eliminar_food(
     food_id: int,
     current_user=Depends(get_current_user),
 ):
     try:
-        data = service.eliminar_food(food_id, current_user["id"])
+        data = await en_db(service.eliminar_food, food_id, current_user["id"])
         return respuesta_ok("Alimento eliminado correctamente", data)
     except HTTPException as e:
         return respuesta_error(e.detail, e.status_code)
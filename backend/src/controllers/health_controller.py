@@ -1,5 +1,8 @@
-from fastapi import APIRouter
+import asyncio
+
+from fastapi import APIRouter, Depends
 from fastapi.responses import Response
+from src.auth import verificar_token_metricas
 from src.services.health_services import HealthService
 
 router = APIRouter()
@@ -10,6 +13,12 @@ async def health_check():
     """Endpoint GET para verificar el estado del servicio"""
     return health_service.get_health_status()
 
+@router.get("/metrics", dependencies=[Depends(verificar_token_metricas)])
+async def metrics():
+    """Endpoint GET con métricas internas (cachés, contadores, etc.)"""
+    # Algunos proveedores hacen E/S (p. ej. la caché de dashboard en SQLite)
+    return await asyncio.to_thread(health_service.get_metrics)
+
 @router.head("/")
 async def health_check_head():
     """Endpoint HEAD para verificar el estado del servicio"""
@@ -2,11 +2,13 @@ from datetime import date
 from typing import Optional, Dict, Any
 
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 
-from src.schemas import MealCreate, BaseAPIResponse
+from src.schemas import MealCreate, MealBatchCreate, BaseAPIResponse
 from src.services.meal_service import MealService
 from src.auth import get_current_user
-from src.utils.responses import respuesta_ok, respuesta_error
+from src.db_executor import en_db, iterar_en_db
+from src.utils.responses import respuesta_ok, respuesta_error, gzip_stream
 
 
 router = APIRouter(tags=["Meals"])
@@ -14,25 +16,37 @@ service = MealService()
 
 
 @router.post("/meals/create", response_model=BaseAPIResponse)
-def crear_meal(
+async def crear_meal(
     body: MealCreate,
     current_user=Depends(get_current_user),
 ):
     try:
-        data = service.crear_meal(body, current_user["id"])
+        data = await en_db(service.crear_meal, body, current_user["id"])
         return respuesta_ok("Comida registrada correctamente", data)
     except HTTPException as e:
         return respuesta_error(e.detail, e.status_code)
 
 
+@router.post("/meals/batch", response_model=BaseAPIResponse)
+async def crear_meals_lote(
+    body: MealBatchCreate,
+    current_user=Depends(get_current_user),
+):
+    try:
+        items = await en_db(service.crear_meals_lote, body.items, current_user["id"])
+        return respuesta_ok("Comidas registradas correctamente", {"items": items})
+    except HTTPException as e:
+        return respuesta_error(e.detail, e.status_code)
+
+
 @router.get("/meals/range", response_model=BaseAPIResponse)
-def obtener_meals_rango(
+async def obtener_meals_rango(
     start_date: date,
     end_date: date,
     current_user=Depends(get_current_user),
 ):
     try:
-        items = service.listar_meals_rango(current_user["id"], start_date, end_date)
+        items = await en_db(service.listar_meals_rango, current_user["id"], start_date, end_date)
         return respuesta_ok(
             "Comidas obtenidas correctamente en el rango",
             {"items": items},
@@ -41,13 +55,40 @@ def obtener_meals_rango(
         return respuesta_error(e.detail, e.status_code)
 
 
+@router.get("/meals/export")
+async def exportar_meals(
+    format: str = "ndjson",
+    include_food: bool = True,
+    gzip: bool = False,
+    current_user=Depends(get_current_user),
+):
+    """
+    Historial completo de comidas en NDJSON o CSV, enviado por bloques a
+    medida que se lee de la base de datos.
+    """
+    try:
+        partes = await en_db(service.exportar_meals, current_user["id"], format, include_food)
+    except HTTPException as e:
+        return respuesta_error(e.detail, e.status_code)
+
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/csv"
+    headers = {"Content-Disposition": f'attachment; filename="meals.{format}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+        cuerpo = gzip_stream(partes)
+    else:
+        cuerpo = (parte.encode("utf-8") for parte in partes)
+    # Cada bloque (consulta y, si toca, compresión) se produce en el executor de la BD
+    return StreamingResponse(iterar_en_db(cuerpo), media_type=media_type, headers=headers)
+
+
 @router.delete("/meals/{meal_id}", response_model=BaseAPIResponse)
-def eliminar_meal(
+async def eliminar_meal(
     meal_id: int,
     current_user=Depends(get_current_user),
 ):
     try:
-        data = service.eliminar_meal(meal_id, current_user["id"])
+        data = await en_db(service.eliminar_meal, meal_id, current_user["id"])
         return respuesta_ok("Comida eliminada correctamente", data)
     except HTTPException as e:
         return respuesta_error(e.detail, e.status_code)
@@ -11,20 +11,20 @@ service = UsuarioService()
 
 
 @router.post("/register", response_model=BaseAPIResponse)
-def register(body: UsuarioCreate):
+async def register(body: UsuarioCreate):
     """Registra un nuevo usuario."""
     try:
-        data = service.crear_usuario(body)
+        data = await service.crear_usuario(body)
         return respuesta_ok("Usuario registrado correctamente", data)
     except HTTPException as e:
-        return respuesta_error(e.detail, e.status_code)
+        return respuesta_error(e.detail, e.status_code, headers=e.headers)
 
 
 @router.post("/login", response_model=BaseAPIResponse)
-def login(body: UsuarioLogin):
+async def login(body: UsuarioLogin):
     """Login: devuelve access_token para usar en Authorization: Bearer <token>."""
     try:
-        usuario = service.login_usuario(body.user, body.password)
+        usuario = await service.login_usuario(body.user, body.password)
         token = create_access_token(data={"sub": str(usuario["id"])})
         return respuesta_ok(
             "Login correcto",
@@ -35,11 +35,11 @@ def login(body: UsuarioLogin):
             },
         )
     except HTTPException as e:
-        return respuesta_error(e.detail, e.status_code)
+        return respuesta_error(e.detail, e.status_code, headers=e.headers)
 
 
 @router.get("/me", response_model=BaseAPIResponse)
-def me(current_user=Depends(get_current_user)):
+async def me(current_user=Depends(get_current_user)):
     """Devuelve el usuario autenticado (requiere Bearer token)."""
     try:
         return respuesta_ok("OK", current_user)
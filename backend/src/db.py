@@ -1,9 +1,66 @@
 from pony.orm import *
+from pony.orm.core import DBSessionContextManager, local
 from decouple import config
 
+from src.db_pool import PooledPGProvider
+from src.utils.metrics import registrar_metricas
+
+
+def _provider():
+    # Con PostgreSQL se usa el pool compartido de src/db_pool.py en lugar
+    # del pool de Pony, que abre una conexión por hilo
+    provider = config("DB_PROVIDER")
+    return PooledPGProvider if provider == "postgres" else provider
+
+
 db = Database()
 
 # Conectar la base de datos
-db.bind(provider=config("DB_PROVIDER"), user=config("DB_USER"), password=config("DB_PASS"),
+db.bind(provider=_provider(), user=config("DB_USER"), password=config("DB_PASS"),
         host=config("DB_HOST"), database=config("DB_NAME"))
+if isinstance(db.provider, PooledPGProvider):
+    registrar_metricas("db_pool", db.provider.pool.stats)
+
+# Réplica de lectura opcional. Solo se usa para consultas SQL crudas de los
+# GET que toleran unos segundos de retraso (listados del catálogo, rangos del
+# dashboard, analytics); sin DB_REPLICA_HOST todo va a la base principal.
+DB_REPLICA_HOST = config("DB_REPLICA_HOST", default="")
+
+if DB_REPLICA_HOST:
+    db_lectura = Database()
+    db_lectura.bind(
+        provider=_provider(),
+        # Lo que no se indique para la réplica se toma de la base principal
+        user=config("DB_REPLICA_USER", default="") or config("DB_USER"),
+        password=config("DB_REPLICA_PASS", default="") or config("DB_PASS"),
+        host=DB_REPLICA_HOST,
+        database=config("DB_REPLICA_NAME", default="") or config("DB_NAME"),
+    )
+    if isinstance(db_lectura.provider, PooledPGProvider):
+        registrar_metricas("db_pool_replica", db_lectura.provider.pool.stats)
+else:
+    db_lectura = db
+
+
+class _SesionLectura(DBSessionContextManager):
+    """
+    db_session para los GET: al salir no hace flush ni commit, solo descarta
+    la caché de la sesión. Si algo modificó entidades dentro de ella se
+    deshace y se lanza TransactionError, en lugar de escribir a escondidas.
+    """
+
+    def _commit_or_rollback(self, exc_type, exc, tb):
+        cache = local.db2cache.get(db)
+        modificada = exc_type is None and cache is not None and cache.modified
+        try:
+            rollback()
+        finally:
+            del exc, tb
+            local.db_session = None
+            local.user_groups_cache.clear()
+            local.user_roles_cache.clear()
+        if modificada:
+            raise TransactionError("Se intentó modificar datos en una sesión de solo lectura")
+
 
+sesion_lectura = _SesionLectura()
@@ -0,0 +1,94 @@
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Iterator, TypeVar
+
+from decouple import config
+
+from src.db_pool import DB_POOL_MAX_SIZE
+from src.utils.metrics import registrar_metricas
+
+
+# Hilos dedicados a los bloques db_session de los endpoints async. Con el
+# mismo tamaño que el pool de conexiones ningún hilo espera por conexión y
+# el resto de peticiones quedan como corrutinas, sin ocupar hilos.
+DB_EXECUTOR_WORKERS = config("DB_EXECUTOR_WORKERS", default=DB_POOL_MAX_SIZE, cast=int)
+
+T = TypeVar("T")
+
+
+class DbExecutor:
+    """
+    Executor de tamaño fijo para el código síncrono de Pony. Los servicios
+    siguen siendo síncronos (db_session va ligado al hilo); los endpoints
+    async los ejecutan aquí con `await en_db(...)`.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = max(1, workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="db")
+        self._lock = threading.Lock()
+        self._pendientes = 0
+        self._en_curso = 0
+        self.completed = 0
+        self._espera_total = 0.0
+        self._espera_max = 0.0
+
+    def _medir(self, fn: Callable[..., T], encolada: float) -> T:
+        espera = time.monotonic() - encolada
+        with self._lock:
+            self._en_curso += 1
+            self._espera_total += espera
+            self._espera_max = max(self._espera_max, espera)
+        try:
+            return fn()
+        finally:
+            with self._lock:
+                self._en_curso -= 1
+                self._pendientes -= 1
+                self.completed += 1
+
+    async def ejecutar(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        with self._lock:
+            self._pendientes += 1
+        llamada = functools.partial(fn, *args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self._medir, llamada, time.monotonic()
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "running": self._en_curso,
+                "queued": self._pendientes - self._en_curso,
+                "completed": self.completed,
+                "avg_queue_wait_ms": (self._espera_total / self.completed * 1000)
+                if self.completed
+                else 0.0,
+                "max_queue_wait_ms": self._espera_max * 1000,
+            }
+
+
+db_executor = DbExecutor(DB_EXECUTOR_WORKERS)
+registrar_metricas("db_executor", db_executor.stats)
+
+
+async def en_db(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Ejecuta una función síncrona que usa la BD en el executor dedicado."""
+    return await db_executor.ejecutar(fn, *args, **kwargs)
+
+
+_FIN = object()
+
+
+async def iterar_en_db(iterador: Iterator[T]) -> AsyncIterator[T]:
+    """Recorre un generador síncrono que lee de la BD sin bloquear el event loop."""
+    while True:
+        elemento = await en_db(next, iterador, _FIN)
+        if elemento is _FIN:
+            return
+        yield elemento
@@ -0,0 +1,257 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Tuple
+
+import psycopg2
+from decouple import config
+from pony.orm.dbproviders.postgres import PGProvider
+
+
+DB_POOL_MIN_SIZE = config("DB_POOL_MIN_SIZE", default=1, cast=int)
+DB_POOL_MAX_SIZE = config("DB_POOL_MAX_SIZE", default=20, cast=int)
+# Las conexiones más antiguas se cierran al devolverse, para repartir la
+# carga tras un failover y no arrastrar conexiones a un servidor retirado
+DB_POOL_MAX_LIFETIME_SECONDS = config("DB_POOL_MAX_LIFETIME_SECONDS", default=1800, cast=float)
+DB_POOL_ACQUIRE_TIMEOUT_SECONDS = config("DB_POOL_ACQUIRE_TIMEOUT_SECONDS", default=5.0, cast=float)
+# SELECT 1 antes de entregar una conexión que lleva más de
+# DB_POOL_PING_AFTER_SECONDS sin usarse (0: siempre)
+DB_POOL_PRE_PING = config("DB_POOL_PRE_PING", default=True, cast=bool)
+DB_POOL_PING_AFTER_SECONDS = config("DB_POOL_PING_AFTER_SECONDS", default=5.0, cast=float)
+DB_CONNECT_TIMEOUT_SECONDS = config("DB_CONNECT_TIMEOUT_SECONDS", default=5, cast=int)
+
+
+class PoolAgotado(Exception):
+    """No se consiguió una conexión libre dentro del plazo."""
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones compartido por todos los hilos, con la interfaz que
+    Pony espera de su pool (connect/release/drop/disconnect). Pony pide la
+    conexión en la primera consulta de un db_session y la devuelve al
+    terminarlo, así que el tamaño máximo acota las sesiones simultáneas en
+    lugar de abrir una conexión por hilo.
+    """
+
+    def __init__(
+        self,
+        conectar: Callable,
+        min_size: int,
+        max_size: int,
+        max_lifetime: float,
+        acquire_timeout: float,
+        pre_ping: bool,
+        ping_after: float,
+    ):
+        self._conectar = conectar
+        self.max_size = max(1, max_size)
+        self.min_size = max(0, min(min_size, self.max_size))
+        self._max_lifetime = max_lifetime
+        self._acquire_timeout = acquire_timeout
+        self._pre_ping = pre_ping
+        self._ping_after = ping_after
+        self._cond = threading.Condition()
+        self._pid = os.getpid()
+        # (conexión, creada_en, usada_en); se reutiliza la última devuelta
+        self._libres: Deque[Tuple[object, float, float]] = deque()
+        self._en_uso: Dict[int, float] = {}
+        self._total = 0
+        self.created = 0
+        self.closed = 0
+        self.expired = 0
+        self.validation_failures = 0
+        self.waits = 0
+        self.timeouts = 0
+        self._adquisiciones = 0
+        self._espera_total = 0.0
+        self._espera_max = 0.0
+
+        for _ in range(self.min_size):
+            with self._cond:
+                self._total += 1
+            con, creada = self._nueva()
+            with self._cond:
+                self._libres.append((con, creada, time.monotonic()))
+
+    def _nueva(self) -> Tuple[object, float]:
+        """Abre una conexión para una plaza ya reservada en _total."""
+        try:
+            con = self._conectar()
+        except BaseException:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self.created += 1
+        return con, time.monotonic()
+
+    def _cerrar(self, con) -> None:
+        try:
+            con.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._total -= 1
+            self.closed += 1
+            self._cond.notify()
+
+    def _valida(self, con, usada_en: float) -> bool:
+        if not self._pre_ping or time.monotonic() - usada_en < self._ping_after:
+            return True
+        try:
+            cursor = con.cursor()
+            cursor.execute("SELECT 1")
+            con.rollback()
+            return True
+        except Exception:
+            with self._cond:
+                self.validation_failures += 1
+            return False
+
+    def _comprobar_fork(self) -> None:
+        # Tras un fork las conexiones heredadas son del proceso padre: se
+        # olvidan sin cerrarlas
+        if self._pid != os.getpid():
+            with self._cond:
+                if self._pid != os.getpid():
+                    self._pid = os.getpid()
+                    self._libres.clear()
+                    self._en_uso.clear()
+                    self._total = 0
+
+    def connect(self) -> Tuple[object, bool]:
+        self._comprobar_fork()
+        inicio = time.monotonic()
+        limite = inicio + self._acquire_timeout
+        espero = False
+        while True:
+            with self._cond:
+                while not self._libres and self._total >= self.max_size:
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        self.timeouts += 1
+                        raise PoolAgotado(
+                            f"Sin conexiones libres tras {self._acquire_timeout:g}s "
+                            f"({self.max_size} en uso)"
+                        )
+                    espero = True
+                    self._cond.wait(restante)
+                if self._libres:
+                    libre = self._libres.pop()
+                else:
+                    # Se reserva la plaza antes de conectar fuera del lock
+                    self._total += 1
+                    libre = None
+
+            if libre is None:
+                con, creada = self._nueva()
+                nueva = True
+            else:
+                con, creada, usada_en = libre
+                if time.monotonic() - creada > self._max_lifetime:
+                    with self._cond:
+                        self.expired += 1
+                    self._cerrar(con)
+                    continue
+                if not self._valida(con, usada_en):
+                    self._cerrar(con)
+                    continue
+                nueva = False
+
+            espera = time.monotonic() - inicio
+            with self._cond:
+                self._en_uso[id(con)] = creada
+                self._adquisiciones += 1
+                self.waits += espero
+                self._espera_total += espera
+                self._espera_max = max(self._espera_max, espera)
+            return con, nueva
+
+    def release(self, con) -> None:
+        # Igual que el PGPool de Pony: la conexión vuelve limpia al pool
+        try:
+            con.rollback()
+            con.autocommit = True
+            con.cursor().execute("DISCARD ALL")
+            con.autocommit = False
+        except BaseException:
+            self.drop(con)
+            raise
+        with self._cond:
+            creada = self._en_uso.pop(id(con), None)
+        if creada is None:
+            # Conexión de antes de un fork
+            return
+        if time.monotonic() - creada > self._max_lifetime:
+            with self._cond:
+                self.expired += 1
+            self._cerrar(con)
+            return
+        with self._cond:
+            self._libres.append((con, creada, time.monotonic()))
+            self._cond.notify()
+
+    def drop(self, con) -> None:
+        with self._cond:
+            conocida = self._en_uso.pop(id(con), None) is not None
+        if conocida:
+            self._cerrar(con)
+        else:
+            try:
+                con.close()
+            except Exception:
+                pass
+
+    def disconnect(self) -> None:
+        """Cierra las conexiones libres; las que están en uso se cierran al devolverse."""
+        with self._cond:
+            libres = list(self._libres)
+            self._libres.clear()
+        for con, _, _ in libres:
+            self._cerrar(con)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "size": self._total,
+                "in_use": len(self._en_uso),
+                "idle": len(self._libres),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "created": self.created,
+                "closed": self.closed,
+                "expired": self.expired,
+                "validation_failures": self.validation_failures,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "acquire_avg_ms": (self._espera_total / self._adquisiciones * 1000)
+                if self._adquisiciones
+                else 0.0,
+                "acquire_max_ms": self._espera_max * 1000,
+            }
+
+
+class PooledPGProvider(PGProvider):
+    """Provider de PostgreSQL de Pony con ConnectionPool en lugar del pool por hilo."""
+
+    def get_pool(self, *args, **kwargs):
+        kwargs.setdefault("connect_timeout", DB_CONNECT_TIMEOUT_SECONDS)
+
+        def conectar():
+            con = psycopg2.connect(*args, **kwargs)
+            if "client_encoding" not in kwargs:
+                con.set_client_encoding("UTF8")
+            return con
+
+        return ConnectionPool(
+            conectar,
+            DB_POOL_MIN_SIZE,
+            DB_POOL_MAX_SIZE,
+            DB_POOL_MAX_LIFETIME_SECONDS,
+            DB_POOL_ACQUIRE_TIMEOUT_SECONDS,
+            DB_POOL_PRE_PING,
+            DB_POOL_PING_AFTER_SECONDS,
+        )
@@ -16,6 +16,7 @@ class Usuario(db.Entity):
     settings = Optional("UserSettings")
     meals = Set("Meal")
     foods_created = Set("Food")
+    daily_totals = Set("DailyTotals")
 
 
 # ======================
@@ -52,10 +53,18 @@ class Food(db.Entity):
 
     created_by = Optional(Usuario)
     created_at = Required(datetime, default=lambda: datetime.now())
+    updated_at = Required(datetime, default=lambda: datetime.now(), index=True)
 
     meals = Set("Meal")
 
 
+class FoodTombstone(db.Entity):
+    # Registro de alimentos eliminados para la sincronización incremental
+    id = PrimaryKey(int, auto=True)
+    food_id = Required(int)
+    deleted_at = Required(datetime, default=lambda: datetime.now(), index=True)
+
+
 # ======================
 # REGISTRO DE COMIDA
 # ======================
@@ -73,4 +82,28 @@ class Meal(db.Entity):
     carbs = Required(float)
     fat = Required(float)
 
-    consumed_at = Required(datetime, default=lambda: datetime.now())
\ No newline at end of file
+    consumed_at = Required(datetime, default=lambda: datetime.now())
+
+    # Las consultas por rango de fechas de un usuario usan este índice
+    composite_index(user, consumed_at)
+
+
+# ======================
+# TOTALES DIARIOS
+# ======================
+
+class DailyTotals(db.Entity):
+    # Sumas por usuario y día que MealService mantiene al crear y eliminar
+    # comidas, para que el dashboard lea una fila por día
+    id = PrimaryKey(int, auto=True)
+
+    user = Required(Usuario)
+    day = Required(date)
+
+    calories = Required(float, default=0)
+    protein = Required(float, default=0)
+    carbs = Required(float, default=0)
+    fat = Required(float, default=0)
+    meal_count = Required(int, default=0)
+
+    composite_key(user, day)
@@ -110,6 +110,7 @@ class FoodResponse(BaseModel):
     barcode: Optional[str]
     created_by_id: Optional[int]
     created_at: datetime
+    updated_at: datetime
 
 
 class FoodBarcodeResponse(BaseModel):
@@ -122,10 +123,51 @@ class FoodBarcodeResponse(BaseModel):
     barcode: Optional[str]
     created_by_id: Optional[int]
     created_at: datetime
+    updated_at: datetime
+
+
+class FoodBulkCreate(BaseModel):
+    # Cada elemento se valida por separado para poder informar de los
+    # inválidos sin rechazar todo el lote
+    items: list[Any]
+
+
+class FoodBulkItemResult(BaseModel):
+    index: int
+    status: str
+    error: Optional[str]
+    food: Optional[FoodResponse]
+
+
+class FoodBulkResponse(BaseModel):
+    items: list[FoodBulkItemResult]
+    summary: dict
+
+
+class BarcodeBatchRequest(BaseModel):
+    barcodes: list[str]
+
+
+class BarcodeBatchItem(BaseModel):
+    status: str
+    food: Optional[FoodResponse]
+    error: Optional[str]
+
+
+class BarcodeBatchResponse(BaseModel):
+    items: dict[str, BarcodeBatchItem]
 
 
 class FoodListResponse(BaseModel):
     items: list[FoodResponse]
+    next_cursor: Optional[int] = None
+
+
+class FoodChangesResponse(BaseModel):
+    items: list[FoodResponse]
+    deleted_ids: list[int]
+    next_cursor: str
+    has_more: bool
 
 
 class FoodDeleteResponse(BaseModel):
@@ -147,6 +189,7 @@ class DashboardResponse(BaseModel):
     total_carbs: float
     total_fat: float
     macro_percentages: dict
+    days: int = 1
 
 
 class DashboardRangeItem(BaseModel):
@@ -158,6 +201,7 @@ class DashboardRangeItem(BaseModel):
     total_carbs: float
     total_fat: float
     macro_percentages: dict
+    days: int = 1
 
 
 class DashboardRangeResponse(BaseModel):
@@ -174,6 +218,17 @@ class MealCreate(BaseModel):
     quantity_grams: float
 
 
+class MealBatchItem(BaseModel):
+    food_id: int
+    quantity_grams: float
+    # Si no se indica se usa el momento de la petición
+    consumed_at: Optional[datetime] = None
+
+
+class MealBatchCreate(BaseModel):
+    items: list[MealBatchItem]
+
+
 class MealResponse(BaseModel):
     id: int
     user_id: int
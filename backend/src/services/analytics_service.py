@@ -0,0 +1,224 @@
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+from pony.orm import select
+from fastapi import HTTPException, status
+from decouple import config
+
+from src.db import sesion_lectura
+from src.models import UserSettings
+from src.services.dashboard_service import DashboardService, METABOLISMO_POR_DEFECTO
+from src.services.service_utils import get_usuario_or_404, validate_date_range_and_get_bounds
+
+
+ANALYTICS_DEFAULT_DAYS = 90
+ANALYTICS_MAX_DAYS = config("ANALYTICS_MAX_DAYS", default=3660, cast=int)
+# Un día cumple un objetivo de macro si queda a menos de este porcentaje
+ANALYTICS_TARGET_TOLERANCE = config("ANALYTICS_TARGET_TOLERANCE", default=0.1, cast=float)
+# Usuarios por consulta en el modo por lotes
+ANALYTICS_BATCH_CHUNK = 500
+
+VENTANAS = (7, 30)
+MACROS = ("protein", "carbs", "fat")
+# Columnas de la serie diaria: calories, protein, carbs, fat
+_SERIES = ("calories",) + MACROS
+
+
+def _medias_moviles(valores: np.ndarray, registrado: np.ndarray, ventana: int) -> np.ndarray:
+    """
+    Media de los días registrados dentro de la ventana que termina en cada
+    día (usuarios x días). Los primeros días usan una ventana parcial.
+    """
+    dias = valores.shape[1]
+    ceros = np.zeros((valores.shape[0], 1))
+    suma = np.concatenate([ceros, np.cumsum(np.where(registrado, valores, 0.0), axis=1)], axis=1)
+    cuenta = np.concatenate([ceros, np.cumsum(registrado, axis=1)], axis=1)
+    fin = np.arange(1, dias + 1)
+    inicio = np.maximum(fin - ventana, 0)
+    sumas = suma[:, fin] - suma[:, inicio]
+    cuentas = cuenta[:, fin] - cuenta[:, inicio]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(cuentas > 0, sumas / cuentas, np.nan)
+
+
+def _media_y_varianza(valores: np.ndarray, registrado: np.ndarray, n: np.ndarray):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = np.where(registrado, valores, 0.0).sum(axis=1) / n
+        desvio = np.where(registrado, valores - media[:, None], 0.0)
+        return media, (desvio ** 2).sum(axis=1) / n
+
+
+def calcular_metricas(
+    series: np.ndarray,
+    registrado: np.ndarray,
+    metabolismo: np.ndarray,
+    objetivos: np.ndarray,
+    tolerancia: float = ANALYTICS_TARGET_TOLERANCE,
+) -> Dict[str, np.ndarray]:
+    """
+    Calcula todas las métricas para varios usuarios a la vez.
+
+    series: (usuarios, días, 4) con calories, protein, carbs, fat por día.
+    registrado: (usuarios, días) bool, días con al menos una comida.
+    metabolismo: (usuarios,) gasto basal.
+    objetivos: (usuarios, 3) objetivos de protein, carbs, fat; NaN si no hay.
+    """
+    usuarios, dias = registrado.shape
+    n = registrado.sum(axis=1).astype(float)
+    resultado: Dict[str, np.ndarray] = {"logged_days": n}
+
+    for i, nombre in enumerate(_SERIES):
+        valores = series[:, :, i]
+        for ventana in VENTANAS:
+            moviles = _medias_moviles(valores, registrado, ventana)
+            resultado[f"{nombre}_avg_{ventana}d"] = moviles[:, -1] if dias else np.full(usuarios, np.nan)
+            if nombre == "calories":
+                resultado[f"calories_rolling_{ventana}d"] = moviles
+        media, varianza = _media_y_varianza(valores, registrado, n)
+        resultado[f"{nombre}_mean"] = media
+        resultado[f"{nombre}_variance"] = varianza
+
+    # Pendiente por mínimos cuadrados del balance diario (kcal/día por día)
+    balance = series[:, :, 0] - metabolismo[:, None]
+    x = np.broadcast_to(np.arange(dias, dtype=float), registrado.shape)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media_x = np.where(registrado, x, 0.0).sum(axis=1) / n
+        media_b = np.where(registrado, balance, 0.0).sum(axis=1) / n
+        dx = np.where(registrado, x - media_x[:, None], 0.0)
+        db = np.where(registrado, balance - media_b[:, None], 0.0)
+        sxx = (dx ** 2).sum(axis=1)
+        resultado["balance_mean"] = media_b
+        resultado["balance_slope"] = np.where(sxx > 0, (dx * db).sum(axis=1) / sxx, np.nan)
+
+    # Porcentaje de días registrados dentro de cada objetivo
+    macros = series[:, :, 1:]
+    con_objetivo = ~np.isnan(objetivos)
+    with np.errstate(invalid="ignore"):
+        dentro = np.abs(macros - objetivos[:, None, :]) <= tolerancia * objetivos[:, None, :]
+    dentro &= registrado[:, :, None]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for i, nombre in enumerate(MACROS):
+            resultado[f"{nombre}_within_target_pct"] = np.where(
+                con_objetivo[:, i] & (n > 0), dentro[:, :, i].sum(axis=1) / n * 100, np.nan
+            )
+        todos = (dentro | ~con_objetivo[:, None, :]).all(axis=2) & registrado
+        resultado["all_within_target_pct"] = np.where(
+            con_objetivo.any(axis=1) & (n > 0), todos.sum(axis=1) / n * 100, np.nan
+        )
+
+    return resultado
+
+
+def _float(valor) -> Optional[float]:
+    valor = float(valor)
+    return None if np.isnan(valor) else valor
+
+
+def _lista(valores: np.ndarray) -> list:
+    # NaN no es JSON válido: los días sin datos se envían como null
+    lista = valores.astype(object)
+    lista[np.isnan(valores)] = None
+    return lista.tolist()
+
+
+class AnalyticsService:
+    """Métricas de históricos largos sobre las series diarias del dashboard."""
+
+    def __init__(self, dashboard: Optional[DashboardService] = None):
+        self.dashboard = dashboard or DashboardService()
+
+    @staticmethod
+    def _rango(fecha_inicio: Optional[date], fecha_fin: Optional[date]) -> tuple:
+        fecha_fin = fecha_fin or date.today()
+        fecha_inicio = fecha_inicio or fecha_fin - timedelta(days=ANALYTICS_DEFAULT_DAYS - 1)
+        validate_date_range_and_get_bounds(fecha_inicio, fecha_fin)
+        if (fecha_fin - fecha_inicio).days + 1 > ANALYTICS_MAX_DAYS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"El rango de análisis no puede superar {ANALYTICS_MAX_DAYS} días",
+            )
+        return fecha_inicio, fecha_fin
+
+    def _cargar(self, user_ids: List[int], fecha_inicio: date, fecha_fin: date) -> tuple:
+        """Carga una vez las series diarias y la configuración en arrays."""
+        dias = (fecha_fin - fecha_inicio).days + 1
+        posicion = {uid: i for i, uid in enumerate(user_ids)}
+
+        series = np.zeros((len(user_ids), dias, len(_SERIES)))
+        registrado = np.zeros((len(user_ids), dias), dtype=bool)
+        filas = self.dashboard.totales_diarios(user_ids, fecha_inicio, fecha_fin)
+        if filas:
+            fila_u = np.fromiter((posicion[f[0]] for f in filas), dtype=np.intp, count=len(filas))
+            fila_d = np.fromiter(
+                ((f[1] - fecha_inicio).days for f in filas), dtype=np.intp, count=len(filas)
+            )
+            series[fila_u, fila_d] = np.array([f[2:6] for f in filas], dtype=float)
+            registrado[fila_u, fila_d] = np.array([f[6] for f in filas]) > 0
+
+        metabolismo = np.full(len(user_ids), float(METABOLISMO_POR_DEFECTO))
+        objetivos = np.full((len(user_ids), len(MACROS)), np.nan)
+        with sesion_lectura:
+            configuraciones = select(
+                (s.user.id, s.metabolism_base, s.protein_target, s.carbs_target, s.fat_target)
+                for s in UserSettings
+                if s.user.id in user_ids
+            )[:]
+        for uid, base, *metas in configuraciones:
+            i = posicion[uid]
+            metabolismo[i] = base
+            objetivos[i] = [np.nan if m is None else m for m in metas]
+
+        return series, registrado, metabolismo, objetivos
+
+    @staticmethod
+    def _serializar(metricas: Dict[str, np.ndarray], i: int, fecha_inicio: date, fecha_fin: date) -> dict:
+        return {
+            "start_date": fecha_inicio,
+            "end_date": fecha_fin,
+            "days": (fecha_fin - fecha_inicio).days + 1,
+            "logged_days": int(metricas["logged_days"][i]),
+            "rolling_averages": {
+                nombre: {f"{v}d": _float(metricas[f"{nombre}_avg_{v}d"][i]) for v in VENTANAS}
+                for nombre in _SERIES
+            },
+            "calories_rolling": {
+                f"{v}d": _lista(metricas[f"calories_rolling_{v}d"][i]) for v in VENTANAS
+            },
+            "balance_trend": {
+                "mean": _float(metricas["balance_mean"][i]),
+                "slope_per_day": _float(metricas["balance_slope"][i]),
+            },
+            "variance": {nombre: _float(metricas[f"{nombre}_variance"][i]) for nombre in _SERIES},
+            "within_target_pct": {
+                nombre: _float(metricas[f"{nombre}_within_target_pct"][i])
+                for nombre in MACROS + ("all",)
+            },
+        }
+
+    def reporte_lote(
+        self,
+        user_ids: List[int],
+        fecha_inicio: Optional[date] = None,
+        fecha_fin: Optional[date] = None,
+    ) -> Dict[int, dict]:
+        """Mismo reporte para muchos usuarios, por bloques de una consulta cada uno."""
+        fecha_inicio, fecha_fin = self._rango(fecha_inicio, fecha_fin)
+        user_ids = list(dict.fromkeys(user_ids))
+        reportes: Dict[int, dict] = {}
+        for desde in range(0, len(user_ids), ANALYTICS_BATCH_CHUNK):
+            bloque = list(user_ids[desde:desde + ANALYTICS_BATCH_CHUNK])
+            metricas = calcular_metricas(*self._cargar(bloque, fecha_inicio, fecha_fin))
+            for i, uid in enumerate(bloque):
+                reportes[uid] = self._serializar(metricas, i, fecha_inicio, fecha_fin)
+        return reportes
+
+    def obtener_reporte(
+        self,
+        user_id: int,
+        fecha_inicio: Optional[date] = None,
+        fecha_fin: Optional[date] = None,
+    ) -> dict:
+        with sesion_lectura:
+            get_usuario_or_404(user_id)
+        return self.reporte_lote([user_id], fecha_inicio, fecha_fin)[user_id]
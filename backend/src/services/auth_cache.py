@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from decouple import config
+
+from src.utils.metrics import registrar_metricas
+
+
+AUTH_CACHE_MAX_ENTRIES = config("AUTH_CACHE_MAX_ENTRIES", default=10000, cast=int)
+# Cuánto puede tardar en notarse un cambio del usuario hecho fuera de este
+# proceso (en este proceso invalidar_usuario() lo aplica al momento)
+AUTH_CACHE_TTL_SECONDS = config("AUTH_CACHE_TTL_SECONDS", default=60, cast=int)
+
+
+class AuthIdentityCache:
+    """
+    LRU con TTL de token ya verificado -> usuario autenticado, para no leer
+    el Usuario de la BD en cada petición.
+
+    invalidar_usuario() descarta los tokens del usuario y lo marca como
+    cambiado: put() ignora lo leído antes de la marca. Las marcas se olvidan
+    pasado un TTL o si hay más de max_entries; al olvidarlas sube un suelo
+    común y put() descarta cualquier lectura anterior a él.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self._max_entries = max(1, max_entries)
+        self._ttl = max(1, ttl_seconds)
+        self._lock = threading.Lock()
+        self._entradas: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._tokens_por_usuario: Dict[int, set] = {}
+        self._contador = 0
+        # user_id -> (contador, monotonic de la invalidación)
+        self._invalidado_en: "OrderedDict[int, Tuple[int, float]]" = OrderedDict()
+        self._invalidado_suelo = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def marca(self) -> int:
+        """Se toma antes de leer el usuario de la BD y se pasa a put()."""
+        return self._contador
+
+    def get(self, token: str) -> Optional[dict]:
+        with self._lock:
+            entrada = self._entradas.get(token)
+            if entrada is not None and entrada[0] < time.monotonic():
+                self._quitar(token)
+                entrada = None
+            if entrada is None:
+                self.misses += 1
+                return None
+            self._entradas.move_to_end(token)
+            self.hits += 1
+            return dict(entrada[1])
+
+    def put(self, token: str, usuario: dict, marca: int, expira_en: Optional[float] = None) -> None:
+        """expira_en: segundos hasta que caduca el token, si es menor que el TTL."""
+        ttl = self._ttl if expira_en is None else min(self._ttl, expira_en)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._olvidar_invalidaciones()
+            invalidado = self._invalidado_en.get(usuario["id"])
+            if max(self._invalidado_suelo, invalidado[0] if invalidado else 0) > marca:
+                return
+            self._quitar(token)
+            self._entradas[token] = (time.monotonic() + ttl, dict(usuario))
+            self._tokens_por_usuario.setdefault(usuario["id"], set()).add(token)
+            while len(self._entradas) > self._max_entries:
+                self._quitar(next(iter(self._entradas)))
+
+    def _olvidar_invalidaciones(self) -> None:
+        # Están en orden de contador: las más antiguas van primero
+        limite = time.monotonic() - self._ttl
+        while self._invalidado_en:
+            user_id, (contador, instante) = next(iter(self._invalidado_en.items()))
+            if len(self._invalidado_en) <= self._max_entries and instante > limite:
+                break
+            del self._invalidado_en[user_id]
+            self._invalidado_suelo = contador
+
+    def _quitar(self, token: str) -> None:
+        entrada = self._entradas.pop(token, None)
+        if entrada is None:
+            return
+        user_id = entrada[1]["id"]
+        tokens = self._tokens_por_usuario.get(user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_por_usuario[user_id]
+
+    def invalidar_usuario(self, user_id: int) -> None:
+        """Llamar tras confirmar cualquier cambio o borrado del usuario."""
+        with self._lock:
+            self._contador += 1
+            self._invalidado_en.pop(user_id, None)
+            self._invalidado_en[user_id] = (self._contador, time.monotonic())
+            self._olvidar_invalidaciones()
+            self.invalidations += 1
+            for token in list(self._tokens_por_usuario.get(user_id, ())):
+                self._quitar(token)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entradas),
+                "max_entries": self._max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
+
+
+auth_cache = AuthIdentityCache(AUTH_CACHE_MAX_ENTRIES, AUTH_CACHE_TTL_SECONDS)
+registrar_metricas("auth", auth_cache.stats)
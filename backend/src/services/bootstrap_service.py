@@ -0,0 +1,87 @@
+from datetime import date
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException, status
+
+from src.db import sesion_lectura
+from src.services.dashboard_service import DashboardService
+from src.services.food_service import FoodService, LIST_DEFAULT_LIMIT
+from src.services.meal_service import MealService
+from src.services.service_utils import get_usuario_or_404
+from src.services.user_settings_service import UserSettingsService
+from src.utils.responses import etag_para
+
+
+BOOTSTRAP_SECTIONS = ("user", "settings", "dashboard", "meals", "foods")
+
+
+class BootstrapService:
+    """
+    Todo lo que el frontend necesita al arrancar en una sola respuesta. Los
+    servicios se llaman dentro de una única sesión de solo lectura (sus
+    db_session anidados la reutilizan), así que el usuario y su
+    configuración se leen una vez y quedan en la caché de la sesión para el
+    resto de secciones.
+    """
+
+    def __init__(self):
+        self.dashboard = DashboardService()
+        self.foods = FoodService()
+        self.meals = MealService()
+        self.settings = UserSettingsService()
+
+    @staticmethod
+    def _parse_sections(sections: Optional[List[str]]) -> List[str]:
+        if not sections:
+            return list(BOOTSTRAP_SECTIONS)
+        invalid = [s for s in sections if s not in BOOTSTRAP_SECTIONS]
+        if invalid:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Secciones no válidas: {', '.join(invalid)}",
+            )
+        return [s for s in BOOTSTRAP_SECTIONS if s in sections]
+
+    def _settings_o_none(self, user_id: int) -> Optional[Dict]:
+        try:
+            return self.settings.obtener_settings(user_id)
+        except HTTPException as e:
+            if e.status_code == status.HTTP_404_NOT_FOUND:
+                return None
+            raise
+
+    def obtener_bootstrap(
+        self,
+        current_user: Dict,
+        sections: Optional[List[str]] = None,
+        food_limit: int = LIST_DEFAULT_LIMIT,
+        food_fields: Optional[List[str]] = None,
+    ) -> Dict:
+        selected = self._parse_sections(sections)
+        user_id = current_user["id"]
+        hoy = date.today()
+        data: Dict = {}
+
+        with sesion_lectura:
+            # Precarga del usuario con su configuración en la caché de la sesión
+            usuario = get_usuario_or_404(user_id)
+            usuario.settings
+
+            if "user" in selected:
+                data["user"] = current_user
+            if "settings" in selected:
+                data["settings"] = self._settings_o_none(user_id)
+            if "dashboard" in selected:
+                data["dashboard"] = self.dashboard.obtener_dashboard_del_dia(user_id, hoy)
+            if "meals" in selected:
+                data["meals"] = self.meals.listar_meals_rango(user_id, hoy, hoy)
+            if "foods" in selected:
+                # Primera página del catálogo; el cliente sigue con
+                # /foods/all?cursor=next_cursor y revalida con la versión
+                page = self.foods.listar_foods(user_id, None, food_limit, food_fields)
+                data["foods"] = {
+                    **page,
+                    "etag": etag_para(self.foods.catalog_version()),
+                }
+
+        return data
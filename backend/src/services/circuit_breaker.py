@@ -0,0 +1,107 @@
+import threading
+import time
+from typing import Callable
+
+
+CERRADO = "closed"
+ABIERTO = "open"
+SEMI_ABIERTO = "half_open"
+
+
+class CircuitoAbierto(Exception):
+    """El circuito está abierto: la llamada se rechaza sin intentarla."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker por fallos consecutivos. Una llamada cuenta como fallo si
+    lanza error o si tarda más que `slow_call_seconds`. Tras
+    `failure_threshold` fallos el circuito se abre durante `reset_seconds`;
+    después deja pasar una única llamada de prueba (semiabierto) que decide
+    si se vuelve a cerrar o a abrir.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        slow_call_seconds: float,
+        reset_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = max(1, failure_threshold)
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._estado = CERRADO
+        self._fallos = 0
+        self._abierto_desde = 0.0
+        self._prueba_en_curso = False
+
+        self.trips = 0
+        self.rejected = 0
+        self.failures = 0
+        self.slow_calls = 0
+
+    @property
+    def estado(self) -> str:
+        with self._lock:
+            return self._estado_actual()
+
+    def _estado_actual(self) -> str:
+        if self._estado == ABIERTO and self._clock() - self._abierto_desde >= self.reset_seconds:
+            self._estado = SEMI_ABIERTO
+            self._prueba_en_curso = False
+        return self._estado
+
+    def retry_after(self) -> int:
+        with self._lock:
+            restante = self.reset_seconds - (self._clock() - self._abierto_desde)
+        return max(1, int(restante + 0.999))
+
+    def permitir(self) -> None:
+        """Lanza CircuitoAbierto si la llamada no debe intentarse."""
+        with self._lock:
+            estado = self._estado_actual()
+            if estado == CERRADO:
+                return
+            if estado == SEMI_ABIERTO and not self._prueba_en_curso:
+                self._prueba_en_curso = True
+                return
+            self.rejected += 1
+        raise CircuitoAbierto()
+
+    def registrar_exito(self, duracion: float) -> None:
+        if duracion > self.slow_call_seconds:
+            with self._lock:
+                self.slow_calls += 1
+            self.registrar_fallo()
+            return
+        with self._lock:
+            self._estado = CERRADO
+            self._fallos = 0
+            self._prueba_en_curso = False
+
+    def registrar_fallo(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._fallos += 1
+            estado = self._estado_actual()
+            if estado == SEMI_ABIERTO or self._fallos >= self.failure_threshold:
+                if estado != ABIERTO:
+                    self.trips += 1
+                self._estado = ABIERTO
+                self._abierto_desde = self._clock()
+                self._prueba_en_curso = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "state": self._estado_actual(),
+                "consecutive_failures": self._fallos,
+                "trips": self.trips,
+                "rejected": self.rejected,
+                "failures": self.failures,
+                "slow_calls": self.slow_calls,
+            }
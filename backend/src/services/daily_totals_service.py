@@ -0,0 +1,145 @@
+from datetime import date
+from typing import Dict, Optional, Tuple
+
+from pony.orm import db_session, select, sum as db_sum, count
+
+from src.db import db
+from src.models import Usuario, Meal, DailyTotals
+
+
+_CAMPOS = ("calories", "protein", "carbs", "fat", "meal_count")
+
+# Tolerancia al comparar sumas acumuladas con las recalculadas: sumar y restar
+# floats comida a comida no da exactamente el mismo resultado que SUM()
+_TOLERANCIA = 1e-6
+
+
+def _sql_acumular() -> str:
+    q = db.provider.quote_name
+    tabla = q(DailyTotals._table_)
+    user_col = q(DailyTotals.user.columns[0])
+    day_col = q(DailyTotals.day.columns[0])
+    col = {c: q(getattr(DailyTotals, c).columns[0]) for c in _CAMPOS}
+    columnas = ", ".join([user_col, day_col] + list(col.values()))
+    sumas = ", ".join(f"{col[c]} = {tabla}.{col[c]} + EXCLUDED.{col[c]}" for c in _CAMPOS)
+    # Upsert atómico: dos comidas del mismo día registradas a la vez no
+    # compiten por crear la fila ni pierden una de las sumas
+    return (
+        f"INSERT INTO {tabla} ({columnas}) "
+        f"VALUES ($user_id, $day, $calories, $protein, $carbs, $fat, $meal_count) "
+        f"ON CONFLICT ({user_col}, {day_col}) DO UPDATE SET {sumas}"
+    )
+
+
+class DailyTotalsService:
+
+    def acumular_meal(self, meal: Meal, signo: int = 1) -> None:
+        """
+        Suma (signo=1) o resta (signo=-1) una comida de los totales de su día.
+        Debe llamarse dentro del db_session que crea o elimina la comida.
+        """
+        self.acumular_dia(
+            meal.user.id,
+            meal.consumed_at.date(),
+            (
+                signo * meal.calories,
+                signo * meal.protein,
+                signo * meal.carbs,
+                signo * meal.fat,
+                signo,
+            ),
+        )
+
+    @staticmethod
+    def acumular_dia(
+        user_id: int, dia: date, valores: Tuple[float, float, float, float, int]
+    ) -> None:
+        """Suma (calories, protein, carbs, fat, meal_count) a los totales de un día."""
+        db.execute(
+            _sql_acumular(),
+            {"user_id": user_id, "day": dia, **dict(zip(_CAMPOS, valores))},
+        )
+
+    @staticmethod
+    def _esperados(user_id: int) -> Dict[date, Tuple[float, float, float, float, int]]:
+        filas = select(
+            (
+                m.consumed_at.year,
+                m.consumed_at.month,
+                m.consumed_at.day,
+                db_sum(m.calories),
+                db_sum(m.protein),
+                db_sum(m.carbs),
+                db_sum(m.fat),
+                count(m),
+            )
+            for m in Meal
+            if m.user.id == user_id
+        )
+        return {
+            date(int(y), int(mo), int(d)): (calories, protein, carbs, fat, meals)
+            for y, mo, d, calories, protein, carbs, fat, meals in filas
+        }
+
+    @staticmethod
+    def _coincide(actual: DailyTotals, esperado: Tuple[float, float, float, float, int]) -> bool:
+        for campo, valor in zip(_CAMPOS, esperado):
+            if abs(getattr(actual, campo) - valor) > _TOLERANCIA * max(1.0, abs(valor)):
+                return False
+        return True
+
+    def recalcular_usuario(self, user_id: int, reparar: bool = False) -> dict:
+        """
+        Compara los totales guardados de un usuario con los calculados desde
+        Meal. Con reparar=True reescribe los días que no coinciden.
+        """
+        stats = {"days": 0, "missing": 0, "stale": 0, "orphan": 0}
+        with db_session:
+            esperados = self._esperados(user_id)
+            actuales = {
+                t.day: t for t in DailyTotals.select(lambda t: t.user.id == user_id)
+            }
+            stats["days"] = len(esperados)
+
+            for dia, esperado in esperados.items():
+                actual = actuales.pop(dia, None)
+                if actual is None:
+                    stats["missing"] += 1
+                    if reparar:
+                        DailyTotals(
+                            user=Usuario[user_id],
+                            day=dia,
+                            **dict(zip(_CAMPOS, esperado)),
+                        )
+                elif not self._coincide(actual, esperado):
+                    stats["stale"] += 1
+                    if reparar:
+                        actual.set(**dict(zip(_CAMPOS, esperado)))
+
+            # Días con totales pero sin comidas (las filas a cero no cuentan)
+            for actual in actuales.values():
+                if actual.meal_count != 0 or not self._coincide(actual, (0.0, 0.0, 0.0, 0.0, 0)):
+                    stats["orphan"] += 1
+                if reparar:
+                    actual.delete()
+
+        return stats
+
+    def recalcular(self, user_id: Optional[int] = None, reparar: bool = False) -> dict:
+        """Recalcula usuario a usuario para no cargar toda la tabla Meal a la vez."""
+        if user_id is not None:
+            user_ids = [user_id]
+        else:
+            with db_session:
+                user_ids = select(u.id for u in Usuario).order_by(1)[:]
+
+        totales = {"users": 0, "days": 0, "missing": 0, "stale": 0, "orphan": 0}
+        for uid in user_ids:
+            stats = self.recalcular_usuario(uid, reparar=reparar)
+            totales["users"] += 1
+            for clave, valor in stats.items():
+                totales[clave] += valor
+        return totales
+
+
+daily_totals_service = DailyTotalsService()
@@ -0,0 +1,276 @@
+import copy
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Dict, Optional, Set, Tuple
+
+from decouple import config
+
+from src.utils.metrics import registrar_metricas
+
+
+# "memory": LRU local a cada proceso. "sqlite": archivo compartido por todos
+# los workers de la misma máquina, para que una invalidación se vea en todos.
+DASHBOARD_CACHE_BACKEND = config("DASHBOARD_CACHE_BACKEND", default="memory")
+DASHBOARD_CACHE_MAX_ENTRIES = config("DASHBOARD_CACHE_MAX_ENTRIES", default=10000, cast=int)
+# Acota lo que puede durar un dato cambiado fuera de los servicios (p. ej.
+# rebuild_daily_totals.py --repair o, con el backend "memory", otro worker)
+DASHBOARD_CACHE_TTL_SECONDS = config("DASHBOARD_CACHE_TTL_SECONDS", default=300, cast=int)
+DASHBOARD_CACHE_PATH = config(
+    "DASHBOARD_CACHE_PATH",
+    default=os.path.join(tempfile.gettempdir(), "nutrifa_dashboard_cache.sqlite3"),
+)
+
+Clave = Tuple[int, date]
+
+
+class InMemoryDashboardCache:
+    """
+    LRU acotado de días de dashboard ya calculados, por (usuario, día).
+
+    Cada invalidación de un usuario avanza un contador global y lo anota para
+    ese usuario; put() descarta el valor si el usuario se invalidó después de
+    la marca tomada antes de leer de la BD. Solo se recuerdan las últimas
+    max_entries invalidaciones: las olvidadas suben un suelo común y put()
+    descarta cualquier marca anterior a él.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self._max_entries = max(1, max_entries)
+        self._ttl = max(1, ttl_seconds)
+        self._lock = threading.Lock()
+        self._entradas: "OrderedDict[Clave, Tuple[float, dict]]" = OrderedDict()
+        self._dias_por_usuario: Dict[int, Set[date]] = {}
+        self._contador = 0
+        self._invalidado_en: "OrderedDict[int, int]" = OrderedDict()
+        self._invalidado_suelo = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def marca(self, user_id: int) -> int:
+        """Se toma antes de leer de la BD y se pasa a put()."""
+        return self._contador
+
+    def get(self, user_id: int, dia: date) -> Optional[dict]:
+        clave = (user_id, dia)
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and time.monotonic() - entrada[0] > self._ttl:
+                self._quitar(clave)
+                entrada = None
+            if entrada is None:
+                self.misses += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.hits += 1
+            return copy.deepcopy(entrada[1])
+
+    def put(self, user_id: int, dia: date, data: dict, marca: int) -> None:
+        clave = (user_id, dia)
+        with self._lock:
+            if self._invalidado_en.get(user_id, self._invalidado_suelo) > marca:
+                return
+            self._quitar(clave)
+            self._entradas[clave] = (time.monotonic(), copy.deepcopy(data))
+            self._dias_por_usuario.setdefault(user_id, set()).add(dia)
+            while len(self._entradas) > self._max_entries:
+                self._quitar(next(iter(self._entradas)))
+                self.evictions += 1
+
+    def _quitar(self, clave: Clave) -> None:
+        if self._entradas.pop(clave, None) is None:
+            return
+        user_id, dia = clave
+        dias = self._dias_por_usuario.get(user_id)
+        if dias is not None:
+            dias.discard(dia)
+            if not dias:
+                del self._dias_por_usuario[user_id]
+
+    def invalidar(self, user_id: int, dia: Optional[date] = None) -> None:
+        """Descarta un día del usuario, o todos si dia es None."""
+        with self._lock:
+            self._contador += 1
+            self._invalidado_en[user_id] = self._contador
+            self._invalidado_en.move_to_end(user_id)
+            while len(self._invalidado_en) > self._max_entries:
+                _, contador = self._invalidado_en.popitem(last=False)
+                self._invalidado_suelo = contador
+            self.invalidations += 1
+            if dia is not None:
+                self._quitar((user_id, dia))
+            else:
+                for d in list(self._dias_por_usuario.get(user_id, ())):
+                    self._quitar((user_id, d))
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "backend": "memory",
+                "entries": len(self._entradas),
+                "max_entries": self._max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
+
+
+def _a_json(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    raise TypeError(type(valor).__name__)
+
+
+class SqliteDashboardCache:
+    """
+    Misma interfaz que InMemoryDashboardCache sobre un archivo SQLite local
+    compartido por los workers. Las marcas son generaciones por usuario
+    guardadas en el propio archivo, así que una invalidación hecha en un
+    worker impide que otro guarde un valor calculado antes de ella.
+    """
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: int):
+        self._path = path
+        self._max_entries = max(1, max_entries)
+        self._ttl = max(1, ttl_seconds)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._puts = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        with self._conexion() as con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS entradas ("
+                "user_id INTEGER, dia TEXT, expira REAL, datos TEXT, "
+                "PRIMARY KEY (user_id, dia))"
+            )
+            con.execute("CREATE INDEX IF NOT EXISTS entradas_expira ON entradas (expira)")
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS generaciones (user_id INTEGER PRIMARY KEY, gen INTEGER)"
+            )
+
+    def _conexion(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self._path, timeout=5.0, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=OFF")
+            self._local.con = con
+        return con
+
+    def _generacion(self, con: sqlite3.Connection, user_id: int) -> int:
+        fila = con.execute(
+            "SELECT gen FROM generaciones WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        return fila[0] if fila else 0
+
+    def marca(self, user_id: int) -> int:
+        return self._generacion(self._conexion(), user_id)
+
+    def get(self, user_id: int, dia: date) -> Optional[dict]:
+        fila = self._conexion().execute(
+            "SELECT datos FROM entradas WHERE user_id = ? AND dia = ? AND expira > ?",
+            (user_id, dia.isoformat(), time.time()),
+        ).fetchone()
+        with self._lock:
+            if fila is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        data = json.loads(fila[0])
+        data["date"] = datetime.fromisoformat(data["date"])
+        return data
+
+    def put(self, user_id: int, dia: date, data: dict, marca: int) -> None:
+        con = self._conexion()
+        datos = json.dumps(data, default=_a_json)
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            if self._generacion(con, user_id) == marca:
+                con.execute(
+                    "INSERT OR REPLACE INTO entradas VALUES (?, ?, ?, ?)",
+                    (user_id, dia.isoformat(), time.time() + self._ttl, datos),
+                )
+            con.execute("COMMIT")
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+
+        with self._lock:
+            self._puts += 1
+            recortar = self._puts % 100 == 0
+        if recortar:
+            self._recortar(con)
+
+    def _recortar(self, con: sqlite3.Connection) -> None:
+        # Primero los caducados; si aún sobran, los que caducan antes
+        con.execute("DELETE FROM entradas WHERE expira <= ?", (time.time(),))
+        con.execute(
+            "DELETE FROM entradas WHERE rowid IN ("
+            "SELECT rowid FROM entradas ORDER BY expira "
+            "LIMIT max(0, (SELECT count(*) FROM entradas) - ?))",
+            (self._max_entries,),
+        )
+
+    def invalidar(self, user_id: int, dia: Optional[date] = None) -> None:
+        con = self._conexion()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            con.execute(
+                "INSERT INTO generaciones VALUES (?, 1) "
+                "ON CONFLICT (user_id) DO UPDATE SET gen = gen + 1",
+                (user_id,),
+            )
+            if dia is not None:
+                con.execute(
+                    "DELETE FROM entradas WHERE user_id = ? AND dia = ?",
+                    (user_id, dia.isoformat()),
+                )
+            else:
+                con.execute("DELETE FROM entradas WHERE user_id = ?", (user_id,))
+            con.execute("COMMIT")
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        with self._lock:
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        entradas = self._conexion().execute("SELECT count(*) FROM entradas").fetchone()[0]
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "backend": "sqlite",
+                "path": self._path,
+                "entries": entradas,
+                "max_entries": self._max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
+
+
+def crear_dashboard_cache():
+    if DASHBOARD_CACHE_BACKEND == "sqlite":
+        return SqliteDashboardCache(
+            DASHBOARD_CACHE_PATH, DASHBOARD_CACHE_MAX_ENTRIES, DASHBOARD_CACHE_TTL_SECONDS
+        )
+    if DASHBOARD_CACHE_BACKEND != "memory":
+        raise ValueError(f"DASHBOARD_CACHE_BACKEND desconocido: {DASHBOARD_CACHE_BACKEND}")
+    return InMemoryDashboardCache(DASHBOARD_CACHE_MAX_ENTRIES, DASHBOARD_CACHE_TTL_SECONDS)
+
+
+dashboard_cache = crear_dashboard_cache()
+registrar_metricas("dashboard_cache", dashboard_cache.stats)
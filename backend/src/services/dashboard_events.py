@@ -0,0 +1,111 @@
+import asyncio
+import threading
+from typing import Dict, Set
+
+from decouple import config
+
+from src.utils.metrics import registrar_metricas
+
+
+DASHBOARD_STREAM_QUEUE_SIZE = config("DASHBOARD_STREAM_QUEUE_SIZE", default=16, cast=int)
+DASHBOARD_STREAM_MAX_CONNECTIONS = config(
+    "DASHBOARD_STREAM_MAX_CONNECTIONS", default=5000, cast=int
+)
+
+# Evento que sustituye a los pendientes cuando un cliente no da abasto: en
+# lugar de seguir acumulando deltas se le manda un snapshot nuevo
+RESYNC = {"type": "resync"}
+
+
+class DemasiadasConexiones(Exception):
+    pass
+
+
+class _Conexion:
+    def __init__(self, user_id: int, loop: asyncio.AbstractEventLoop, max_queue: int):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue: "asyncio.Queue[dict]" = asyncio.Queue(maxsize=max(2, max_queue))
+        self.desbordes = 0
+
+    def entregar(self, evento: dict) -> None:
+        """Se ejecuta en el event loop de la conexión."""
+        try:
+            self.queue.put_nowait(evento)
+        except asyncio.QueueFull:
+            self.desbordes += 1
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+
+class DashboardEventBus:
+    """
+    Reparto en proceso de cambios del dashboard: una cola asyncio acotada por
+    conexión abierta. publicar() es seguro desde los hilos del threadpool en
+    que corren los servicios síncronos y no cuesta nada si el usuario no
+    tiene ninguna conexión.
+    """
+
+    def __init__(self, max_queue: int, max_connections: int):
+        self._max_queue = max_queue
+        self._max_connections = max(1, max_connections)
+        self._lock = threading.Lock()
+        self._por_usuario: Dict[int, Set[_Conexion]] = {}
+        self._total = 0
+        self.published = 0
+        self.delivered = 0
+        self.rejected = 0
+        self.overflows = 0
+
+    def suscribir(self, user_id: int) -> _Conexion:
+        """Debe llamarse desde el event loop que consumirá la cola."""
+        conexion = _Conexion(user_id, asyncio.get_running_loop(), self._max_queue)
+        with self._lock:
+            if self._total >= self._max_connections:
+                self.rejected += 1
+                raise DemasiadasConexiones()
+            self._por_usuario.setdefault(user_id, set()).add(conexion)
+            self._total += 1
+        return conexion
+
+    def desuscribir(self, conexion: _Conexion) -> None:
+        with self._lock:
+            conexiones = self._por_usuario.get(conexion.user_id)
+            if conexiones is None or conexion not in conexiones:
+                return
+            conexiones.discard(conexion)
+            if not conexiones:
+                del self._por_usuario[conexion.user_id]
+            self._total -= 1
+            self.overflows += conexion.desbordes
+
+    def publicar(self, user_id: int, evento: dict) -> None:
+        with self._lock:
+            conexiones = list(self._por_usuario.get(user_id, ()))
+            self.published += 1
+        for conexion in conexiones:
+            try:
+                conexion.loop.call_soon_threadsafe(conexion.entregar, evento)
+            except RuntimeError:
+                # El loop ya se cerró; la conexión se desuscribe al terminar
+                continue
+            with self._lock:
+                self.delivered += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "connections": self._total,
+                "users": len(self._por_usuario),
+                "max_connections": self._max_connections,
+                "published": self.published,
+                "delivered": self.delivered,
+                "rejected": self.rejected,
+                "overflows": self.overflows
+                + sum(c.desbordes for cs in self._por_usuario.values() for c in cs),
+            }
+
+
+dashboard_events = DashboardEventBus(DASHBOARD_STREAM_QUEUE_SIZE, DASHBOARD_STREAM_MAX_CONNECTIONS)
+registrar_metricas("dashboard_stream", dashboard_events.stats)
@@ -1,37 +1,37 @@
 from datetime import datetime, date, timedelta
 from typing import List, Dict
 
-from pony.orm import db_session
 from fastapi import HTTPException, status
+from decouple import config
 
-from src.models import Usuario, UserSettings, Meal
+from src.db import db, db_lectura, sesion_lectura
+from src.models import Usuario, DailyTotals
+from src.services.dashboard_cache import dashboard_cache
 from src.services.service_utils import (
     get_usuario_or_404,
     validate_date_range_and_get_bounds,
 )
 
 
+RESOLUCIONES = ("day", "week", "month", "year")
+
+# Gasto basal que se asume mientras el usuario no guarda su configuración
+METABOLISMO_POR_DEFECTO = 1770
+
+# Máximo de puntos por petición de /dashboard/range
+DASHBOARD_RANGE_MAX_POINTS = config("DASHBOARD_RANGE_MAX_POINTS", default=400, cast=int)
+
+
 class DashboardService:
 
     @staticmethod
-    def _get_settings_or_404(usuario: Usuario) -> UserSettings:
+    def _get_metabolism_base(usuario: Usuario) -> int:
+        # Sin configuración se usa el valor por defecto en memoria: una
+        # lectura del dashboard no debe crear filas
         settings = usuario.settings
         if settings is None:
-            # Crear una configuración por defecto si no existe
-            settings = UserSettings(
-                user=usuario,
-                metabolism_base=1770,
-                protein_target=None,
-                carbs_target=None,
-                fat_target=None,
-            )
-        return settings
-
-    @staticmethod
-    def _get_day_bounds(fecha: date) -> tuple[datetime, datetime]:
-        start = datetime.combine(fecha, datetime.min.time())
-        end = datetime.combine(fecha, datetime.max.time())
-        return start, end
+            return METABOLISMO_POR_DEFECTO
+        return settings.metabolism_base
 
     @staticmethod
     def _compute_macro_percentages(
@@ -72,8 +72,10 @@ class DashboardService:
         total_protein: float,
         total_carbs: float,
         total_fat: float,
+        days: int = 1,
     ) -> Dict:
-        balance = total_calories - metabolism_base
+        # En buckets de varios días el gasto basal se cuenta una vez por día
+        balance = total_calories - metabolism_base * days
         macro_percentages = DashboardService._compute_macro_percentages(
             total_protein=total_protein,
             total_carbs=total_carbs,
@@ -89,95 +91,170 @@ class DashboardService:
             "total_carbs": total_carbs,
             "total_fat": total_fat,
             "macro_percentages": macro_percentages,
+            "days": days,
         }
 
     def obtener_dashboard_del_dia(self, user_id: int, fecha: date) -> Dict:
-        with db_session:
-            usuario = get_usuario_or_404(user_id)
-            settings = self._get_settings_or_404(usuario)
+        cacheado = dashboard_cache.get(user_id, fecha)
+        if cacheado is not None:
+            return cacheado
 
-            start, end = self._get_day_bounds(fecha)
+        # MealService y UserSettingsService invalidan tras confirmar sus
+        # cambios; la marca evita guardar un cálculo anterior a ellos
+        marca = dashboard_cache.marca(user_id)
+        data = self._calcular_dia(user_id, fecha)
+        dashboard_cache.put(user_id, fecha, data, marca)
+        return data
 
-            meals = [
-                m
-                for m in usuario.meals
-                if m.consumed_at >= start and m.consumed_at <= end
-            ]
+    def _calcular_dia(self, user_id: int, fecha: date) -> Dict:
+        with sesion_lectura:
+            usuario = get_usuario_or_404(user_id)
+            metabolism_base = self._get_metabolism_base(usuario)
 
-            total_calories = sum(m.calories for m in meals)
-            total_protein = sum(m.protein for m in meals)
-            total_carbs = sum(m.carbs for m in meals)
-            total_fat = sum(m.fat for m in meals)
+            # Una sola fila de totales precalculados por MealService
+            totales = DailyTotals.get(user=usuario, day=fecha)
 
             return self._serialize_day(
                 fecha=fecha,
-                metabolism_base=settings.metabolism_base,
-                total_calories=total_calories,
-                total_protein=total_protein,
-                total_carbs=total_carbs,
-                total_fat=total_fat,
+                metabolism_base=metabolism_base,
+                total_calories=totales.calories if totales else 0.0,
+                total_protein=totales.protein if totales else 0.0,
+                total_carbs=totales.carbs if totales else 0.0,
+                total_fat=totales.fat if totales else 0.0,
             )
 
+    @staticmethod
+    def totales_diarios(
+        user_ids: List[int],
+        fecha_inicio: date,
+        fecha_fin: date,
+    ) -> List[tuple]:
+        """
+        Filas (user_id, day, calories, protein, carbs, fat, meal_count) de los
+        días con comidas de varios usuarios, en una sola consulta.
+        """
+        if not user_ids:
+            return []
+        q = db.provider.quote_name
+        columnas = ", ".join(
+            q(getattr(DailyTotals, c).columns[0])
+            for c in ("user", "day", "calories", "protein", "carbs", "fat", "meal_count")
+        )
+        day_col = q(DailyTotals.day.columns[0])
+        # SQL crudo para poder leer de la réplica; user_ids son enteros
+        ids = ", ".join(str(int(uid)) for uid in user_ids)
+        with sesion_lectura:
+            return db_lectura.select(
+                f"SELECT {columnas} FROM {q(DailyTotals._table_)} "
+                f"WHERE {q(DailyTotals.user.columns[0])} IN ({ids}) "
+                f"AND {day_col} >= $inicio AND {day_col} <= $fin",
+                {"inicio": fecha_inicio, "fin": fecha_fin},
+            )
+
+    @staticmethod
+    def _inicio_bucket(fecha: date, resolucion: str) -> date:
+        if resolucion == "week":
+            return fecha - timedelta(days=fecha.weekday())
+        if resolucion == "month":
+            return fecha.replace(day=1)
+        if resolucion == "year":
+            return fecha.replace(month=1, day=1)
+        return fecha
+
+    @staticmethod
+    def _siguiente_bucket(inicio: date, resolucion: str) -> date:
+        if resolucion == "week":
+            return inicio + timedelta(days=7)
+        if resolucion == "month":
+            if inicio.month == 12:
+                return inicio.replace(year=inicio.year + 1, month=1)
+            return inicio.replace(month=inicio.month + 1)
+        if resolucion == "year":
+            return inicio.replace(year=inicio.year + 1)
+        return inicio + timedelta(days=1)
+
+    def _buckets(self, fecha_inicio: date, fecha_fin: date, resolucion: str) -> List[date]:
+        """Inicios de bucket que cubren el rango, o 400 si superan el máximo."""
+        buckets = []
+        actual = self._inicio_bucket(fecha_inicio, resolucion)
+        while actual <= fecha_fin:
+            if len(buckets) >= DASHBOARD_RANGE_MAX_POINTS:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=(
+                        f"El rango supera los {DASHBOARD_RANGE_MAX_POINTS} puntos; "
+                        "usa una resolución mayor"
+                    ),
+                )
+            buckets.append(actual)
+            actual = self._siguiente_bucket(actual, resolucion)
+        return buckets
+
+    @staticmethod
+    def _sumas_por_bucket(
+        user_id: int,
+        fecha_inicio: date,
+        fecha_fin: date,
+        resolucion: str,
+    ) -> Dict[date, tuple]:
+        # Agregado en la base de datos sobre los totales diarios: se leen
+        # tantas filas como buckets con comidas
+        q = db.provider.quote_name
+        day_col = q(DailyTotals.day.columns[0])
+        sumas = ", ".join(
+            f"SUM({q(getattr(DailyTotals, c).columns[0])})"
+            for c in ("calories", "protein", "carbs", "fat")
+        )
+        sql = (
+            f"SELECT CAST(date_trunc($unidad, {day_col}) AS DATE), {sumas} "
+            f"FROM {q(DailyTotals._table_)} "
+            f"WHERE {q(DailyTotals.user.columns[0])} = $user_id "
+            f"AND {day_col} >= $inicio AND {day_col} <= $fin "
+            f"GROUP BY 1"
+        )
+        filas = db_lectura.select(
+            sql,
+            {"unidad": resolucion, "user_id": user_id, "inicio": fecha_inicio, "fin": fecha_fin},
+        )
+        return {fila[0]: tuple(fila[1:]) for fila in filas}
+
     def obtener_dashboard_rango(
         self,
         user_id: int,
         fecha_inicio: date,
         fecha_fin: date,
+        resolucion: str = "day",
     ) -> List[Dict]:
-        start_datetime, end_datetime = validate_date_range_and_get_bounds(
-            fecha_inicio,
-            fecha_fin,
-        )
+        validate_date_range_and_get_bounds(fecha_inicio, fecha_fin)
+        if resolucion not in RESOLUCIONES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Resolución inválida; usa una de: {', '.join(RESOLUCIONES)}",
+            )
+        buckets = self._buckets(fecha_inicio, fecha_fin, resolucion)
 
-        with db_session:
+        with sesion_lectura:
             usuario = get_usuario_or_404(user_id)
-            settings = self._get_settings_or_404(usuario)
-
-            meals = [
-                m
-                for m in usuario.meals
-                if m.consumed_at >= start_datetime
-                and m.consumed_at <= end_datetime
-            ]
-
-            by_date: Dict[date, Dict[str, float]] = {}
-            for meal in meals:
-                meal_date = meal.consumed_at.date()
-                if meal_date not in by_date:
-                    by_date[meal_date] = {
-                        "total_calories": 0.0,
-                        "total_protein": 0.0,
-                        "total_carbs": 0.0,
-                        "total_fat": 0.0,
-                    }
-                day_totals = by_date[meal_date]
-                day_totals["total_calories"] += meal.calories
-                day_totals["total_protein"] += meal.protein
-                day_totals["total_carbs"] += meal.carbs
-                day_totals["total_fat"] += meal.fat
+            metabolism_base = self._get_metabolism_base(usuario)
+
+            by_bucket = self._sumas_por_bucket(usuario.id, fecha_inicio, fecha_fin, resolucion)
 
             results: List[Dict] = []
-            current = fecha_inicio
-            while current <= fecha_fin:
-                totals = by_date.get(
-                    current,
-                    {
-                        "total_calories": 0.0,
-                        "total_protein": 0.0,
-                        "total_carbs": 0.0,
-                        "total_fat": 0.0,
-                    },
+            for inicio in buckets:
+                # Los buckets de los extremos se recortan al rango pedido
+                desde = max(inicio, fecha_inicio)
+                hasta = min(self._siguiente_bucket(inicio, resolucion) - timedelta(days=1), fecha_fin)
+                calories, protein, carbs, fat = by_bucket.get(inicio, (0.0, 0.0, 0.0, 0.0))
+                results.append(
+                    self._serialize_day(
+                        fecha=desde,
+                        metabolism_base=metabolism_base,
+                        total_calories=calories,
+                        total_protein=protein,
+                        total_carbs=carbs,
+                        total_fat=fat,
+                        days=(hasta - desde).days + 1,
+                    )
                 )
-                day_data = self._serialize_day(
-                    fecha=current,
-                    metabolism_base=settings.metabolism_base,
-                    total_calories=totals["total_calories"],
-                    total_protein=totals["total_protein"],
-                    total_carbs=totals["total_carbs"],
-                    total_fat=totals["total_fat"],
-                )
-                results.append(day_data)
-                current = current + timedelta(days=1)
 
             return results
-
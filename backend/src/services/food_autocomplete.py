@@ -0,0 +1,189 @@
+import threading
+from bisect import bisect_left, insort
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+
+from src.services.food_search_index import normalizar_nombre
+
+
+# Alfabeto para generar variantes a distancia de edición 1 (tras normalizar
+# no quedan acentos)
+_ALFABETO = "abcdefghijklmnopqrstuvwxyz0123456789"
+
+# Tokens más cortos no se corrigen: con 1-2 letras casi todo está a distancia 1
+_MIN_LEN_FUZZY = 3
+
+
+def _variantes_distancia_1(token: str) -> Set[str]:
+    """Borrados, transposiciones, sustituciones e inserciones de un carácter."""
+    cortes = [(token[:i], token[i:]) for i in range(len(token) + 1)]
+    borrados = {a + b[1:] for a, b in cortes if b}
+    transposiciones = {a + b[1] + b[0] + b[2:] for a, b in cortes if len(b) > 1}
+    sustituciones = {a + c + b[1:] for a, b in cortes if b for c in _ALFABETO}
+    inserciones = {a + c + b for a, b in cortes for c in _ALFABETO}
+    variantes = borrados | transposiciones | sustituciones | inserciones
+    variantes.discard(token)
+    return {v for v in variantes if v}
+
+
+class FoodAutocomplete:
+    """
+    Autocompletado por prefijo sobre Food.name con arrays ordenados y
+    búsqueda binaria, más una corrección de un error de tecleo (distancia de
+    edición 1) cuando no hay suficientes coincidencias exactas.
+
+    El coste de una consulta depende de `limit` y no del tamaño del catálogo:
+    los resultados de cada nivel salen ya ordenados del array.
+    """
+
+    def __init__(self, loader: Callable[[], Iterable[Tuple[int, str]]]):
+        self._loader = loader
+        self._lock = threading.RLock()
+        self._construido = False
+        # (nombre_norm, id) ordenado: prefijo del nombre completo
+        self._nombres: List[Tuple[str, int]] = []
+        # (palabra, nombre_norm, id) ordenado: prefijo de cualquier palabra
+        self._palabras: List[Tuple[str, str, int]] = []
+        # id -> (nombre original, nombre normalizado)
+        self._por_id: Dict[int, Tuple[str, str]] = {}
+
+    @property
+    def construido(self) -> bool:
+        return self._construido
+
+    def _asegurar_construido(self) -> None:
+        if self._construido:
+            return
+        with self._lock:
+            if self._construido:
+                return
+            nombres = []
+            palabras = []
+            for food_id, nombre in self._loader():
+                nombre_norm = normalizar_nombre(nombre)
+                self._por_id[food_id] = (nombre, nombre_norm)
+                nombres.append((nombre_norm, food_id))
+                for palabra in set(nombre_norm.split()):
+                    palabras.append((palabra, nombre_norm, food_id))
+            nombres.sort()
+            palabras.sort()
+            self._nombres = nombres
+            self._palabras = palabras
+            self._construido = True
+
+    def _agregar(self, food_id: int, nombre: str) -> None:
+        nombre_norm = normalizar_nombre(nombre)
+        self._por_id[food_id] = (nombre, nombre_norm)
+        insort(self._nombres, (nombre_norm, food_id))
+        for palabra in set(nombre_norm.split()):
+            insort(self._palabras, (palabra, nombre_norm, food_id))
+
+    @staticmethod
+    def _quitar_de(lista: list, entrada: tuple) -> None:
+        i = bisect_left(lista, entrada)
+        if i < len(lista) and lista[i] == entrada:
+            del lista[i]
+
+    def _quitar(self, food_id: int) -> None:
+        actual = self._por_id.pop(food_id, None)
+        if actual is None:
+            return
+        _, nombre_norm = actual
+        self._quitar_de(self._nombres, (nombre_norm, food_id))
+        for palabra in set(nombre_norm.split()):
+            self._quitar_de(self._palabras, (palabra, nombre_norm, food_id))
+
+    def indexar(self, food_id: int, nombre: str) -> None:
+        with self._lock:
+            if not self._construido:
+                return
+            actual = self._por_id.get(food_id)
+            if actual is not None and actual[0] == nombre:
+                return
+            self._quitar(food_id)
+            self._agregar(food_id, nombre)
+
+    def eliminar(self, food_id: int) -> None:
+        with self._lock:
+            if not self._construido:
+                return
+            self._quitar(food_id)
+
+    def _por_prefijo_nombre(self, prefijo: str, vistos: Set[int], limit: int) -> List[int]:
+        resultado = []
+        i = bisect_left(self._nombres, (prefijo,))
+        while i < len(self._nombres) and len(resultado) < limit:
+            nombre_norm, food_id = self._nombres[i]
+            if not nombre_norm.startswith(prefijo):
+                break
+            if food_id not in vistos:
+                resultado.append(food_id)
+            i += 1
+        return resultado
+
+    def _por_prefijo_palabra(
+        self,
+        prefijo: str,
+        otros_tokens: List[str],
+        vistos: Set[int],
+        limit: int,
+        max_scan: int,
+    ) -> List[int]:
+        resultado = []
+        i = bisect_left(self._palabras, (prefijo,))
+        fin = min(len(self._palabras), i + max_scan)
+        while i < fin and len(resultado) < limit:
+            palabra, nombre_norm, food_id = self._palabras[i]
+            if not palabra.startswith(prefijo):
+                break
+            i += 1
+            if food_id in vistos:
+                continue
+            if otros_tokens:
+                palabras_nombre = nombre_norm.split()
+                if not all(any(p.startswith(t) for p in palabras_nombre) for t in otros_tokens):
+                    continue
+            resultado.append(food_id)
+            vistos.add(food_id)
+        return resultado
+
+    def sugerir(self, consulta: str, limit: int = 10, max_scan: int = 2000) -> List[dict]:
+        """
+        Devuelve hasta `limit` sugerencias {id, name, match} ordenadas por
+        calidad: prefijo del nombre, prefijo de una palabra y, por último,
+        prefijo con un error de tecleo.
+        """
+        consulta_norm = normalizar_nombre(consulta)
+        tokens = consulta_norm.split()
+        if not tokens or limit <= 0:
+            return []
+
+        self._asegurar_construido()
+
+        with self._lock:
+            sugerencias: List[Tuple[int, str]] = []
+            vistos: Set[int] = set()
+
+            for food_id in self._por_prefijo_nombre(consulta_norm, vistos, limit):
+                sugerencias.append((food_id, "prefix"))
+                vistos.add(food_id)
+
+            ultimo, otros = tokens[-1], tokens[:-1]
+            if len(sugerencias) < limit:
+                for food_id in self._por_prefijo_palabra(
+                    ultimo, otros, vistos, limit - len(sugerencias), max_scan
+                ):
+                    sugerencias.append((food_id, "word"))
+
+            if len(sugerencias) < limit and len(ultimo) >= _MIN_LEN_FUZZY:
+                for variante in sorted(_variantes_distancia_1(ultimo)):
+                    if len(sugerencias) >= limit:
+                        break
+                    for food_id in self._por_prefijo_palabra(
+                        variante, otros, vistos, limit - len(sugerencias), max_scan
+                    ):
+                        sugerencias.append((food_id, "fuzzy"))
+
+            return [
+                {"id": food_id, "name": self._por_id[food_id][0], "match": match}
+                for food_id, match in sugerencias
+            ]
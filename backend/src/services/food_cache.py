@@ -0,0 +1,170 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+from decouple import config
+
+from src.utils.metrics import registrar_metricas
+
+
+FOOD_CACHE_MAX_ENTRIES = config("FOOD_CACHE_MAX_ENTRIES", default=10000, cast=int)
+# Cada caché es local al proceso. Cada FOOD_CACHE_SYNC_SECONDS se compara una
+# huella del catálogo en la BD para notar las escrituras de otros workers (0:
+# en cada consulta de versión); el TTL es la última garantía para las que la
+# huella no refleja (un updated_at anterior al máximo que confirma tarde).
+FOOD_CACHE_TTL_SECONDS = config("FOOD_CACHE_TTL_SECONDS", default=300, cast=int)
+FOOD_CACHE_SYNC_SECONDS = config("FOOD_CACHE_SYNC_SECONDS", default=2.0, cast=float)
+
+
+class FoodCatalogCache:
+    """
+    LRU acotado de alimentos serializados, indexado por id y por barcode.
+    La versión del catálogo se deriva de la huella leída de la BD, así que es
+    la misma en todos los workers y sobrevive a los reinicios; una escritura
+    local obliga a releer la huella en la siguiente consulta de versión.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self._max_entries = max(1, max_entries)
+        self._ttl = max(1, ttl_seconds)
+        self._lock = threading.Lock()
+        self._por_id: "OrderedDict[int, tuple[float, dict]]" = OrderedDict()
+        self._barcode_a_id: Dict[str, int] = {}
+        self._contador = 0
+        self._huella: Optional[Hashable] = None
+        self._sincronizando = False
+        self._ultima_sincronizacion: Optional[float] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.external_changes = 0
+
+    @property
+    def version(self) -> str:
+        # La época por TTL fuerza la revalidación periódica de los cambios
+        # que la huella no refleja; depende solo del reloj, no del proceso
+        epoca = int(time.time() // self._ttl)
+        huella = hashlib.blake2b(repr(self._huella).encode("utf-8"), digest_size=8)
+        return f"{huella.hexdigest()}-{epoca}"
+
+    def _get_vigente(self, food_id: int) -> Optional[dict]:
+        entrada = self._por_id.get(food_id)
+        if entrada is None:
+            return None
+        guardado_en, data = entrada
+        if time.monotonic() - guardado_en > self._ttl:
+            self._quitar(food_id)
+            return None
+        self._por_id.move_to_end(food_id)
+        return data
+
+    def get(self, food_id: int) -> Optional[dict]:
+        with self._lock:
+            data = self._get_vigente(food_id)
+            if data is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return dict(data)
+
+    def get_por_barcode(self, barcode: str) -> Optional[dict]:
+        with self._lock:
+            food_id = self._barcode_a_id.get(barcode)
+            data = self._get_vigente(food_id) if food_id is not None else None
+            if data is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return dict(data)
+
+    def marca(self) -> int:
+        """Contador de escrituras; se pasa a put() para descartar lecturas viejas."""
+        return self._contador
+
+    def put(self, data: dict, marca: Optional[int] = None) -> None:
+        with self._lock:
+            # Si hubo una escritura mientras se leía de la BD, no se cachea
+            if marca is not None and marca != self._contador:
+                return
+            food_id = data["id"]
+            self._quitar(food_id)
+            self._por_id[food_id] = (time.monotonic(), dict(data))
+            if data.get("barcode"):
+                self._barcode_a_id[data["barcode"]] = food_id
+            while len(self._por_id) > self._max_entries:
+                viejo_id, _ = next(iter(self._por_id.items()))
+                self._quitar(viejo_id)
+                self.evictions += 1
+
+    def _quitar(self, food_id: int) -> None:
+        entrada = self._por_id.pop(food_id, None)
+        if entrada is None:
+            return
+        barcode = entrada[1].get("barcode")
+        if barcode and self._barcode_a_id.get(barcode) == food_id:
+            del self._barcode_a_id[barcode]
+
+    def invalidar(self, food_id: Optional[int] = None) -> None:
+        """Descarta la entrada afectada y fuerza releer la huella de la BD."""
+        with self._lock:
+            self._contador += 1
+            self._ultima_sincronizacion = None
+            if food_id is not None:
+                self._quitar(food_id)
+
+    def reservar_sincronizacion(self, cada: float) -> bool:
+        """
+        True si toca comparar la huella con la BD. Solo un hilo a la vez; los
+        demás siguen con la versión actual. Tras reservar hay que llamar a
+        sincronizar() o a liberar_sincronizacion().
+        """
+        with self._lock:
+            ahora = time.monotonic()
+            if self._sincronizando or (
+                self._ultima_sincronizacion is not None
+                and ahora - self._ultima_sincronizacion < cada
+            ):
+                return False
+            self._sincronizando = True
+            self._ultima_sincronizacion = ahora
+            return True
+
+    def liberar_sincronizacion(self) -> None:
+        with self._lock:
+            self._sincronizando = False
+
+    def sincronizar(self, huella: Hashable) -> None:
+        """
+        Aplica la huella del catálogo leída de la BD: si cambió desde la
+        anterior, hubo escrituras en otro proceso y se descarta toda la caché.
+        """
+        with self._lock:
+            self._sincronizando = False
+            if huella == self._huella:
+                return
+            if self._huella is not None:
+                self._contador += 1
+                self._por_id.clear()
+                self._barcode_a_id.clear()
+                self.external_changes += 1
+            self._huella = huella
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "version": self.version,
+                "entries": len(self._por_id),
+                "max_entries": self._max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "external_changes": self.external_changes,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
+
+
+food_cache = FoodCatalogCache(FOOD_CACHE_MAX_ENTRIES, FOOD_CACHE_TTL_SECONDS)
+registrar_metricas("food_cache", food_cache.stats)
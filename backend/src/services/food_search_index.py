@@ -0,0 +1,157 @@
+import heapq
+import threading
+import unicodedata
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+
+
+def normalizar_nombre(texto: str) -> str:
+    """Pasa a minúsculas, quita acentos y colapsa espacios."""
+    descompuesto = unicodedata.normalize("NFKD", texto or "")
+    sin_acentos = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return " ".join(sin_acentos.lower().split())
+
+
+def _trigramas_nombre(nombre_norm: str) -> Set[str]:
+    # Cada palabra se rellena con espacios ("  leche ") para que los
+    # trigramas iniciales permitan buscar prefijos de 1 o 2 caracteres.
+    trigramas: Set[str] = set()
+    for palabra in nombre_norm.split():
+        relleno = f"  {palabra} "
+        for i in range(len(relleno) - 2):
+            trigramas.add(relleno[i:i + 3])
+    return trigramas
+
+
+def _trigramas_consulta(token: str) -> Set[str]:
+    # Tokens cortos se tratan como prefijo de palabra; el resto como subcadena.
+    if len(token) < 3:
+        return {f"  {token}"[-3:]}
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+class FoodSearchIndex:
+    """
+    Índice invertido de trigramas sobre el nombre normalizado de Food.
+
+    Se construye de forma perezosa en la primera búsqueda (solo lee id y name,
+    sin hidratar entidades) y se mantiene sincronizado desde FoodService en
+    cada alta, modificación o borrado.
+    """
+
+    def __init__(self, loader: Callable[[], Iterable[Tuple[int, str]]]):
+        self._loader = loader
+        self._lock = threading.RLock()
+        self._construido = False
+        self._nombres: Dict[int, str] = {}
+        self._postings: Dict[str, Set[int]] = {}
+
+    @property
+    def construido(self) -> bool:
+        return self._construido
+
+    def _asegurar_construido(self) -> None:
+        if self._construido:
+            return
+        with self._lock:
+            if self._construido:
+                return
+            # Se mantiene el lock durante la carga para que las escrituras
+            # concurrentes esperen y se apliquen sobre el índice completo.
+            for food_id, nombre in self._loader():
+                self._agregar(food_id, nombre)
+            self._construido = True
+
+    def _agregar(self, food_id: int, nombre: str) -> None:
+        nombre_norm = normalizar_nombre(nombre)
+        self._nombres[food_id] = nombre_norm
+        for trigrama in _trigramas_nombre(nombre_norm):
+            self._postings.setdefault(trigrama, set()).add(food_id)
+
+    def _quitar(self, food_id: int) -> None:
+        nombre_norm = self._nombres.pop(food_id, None)
+        if nombre_norm is None:
+            return
+        for trigrama in _trigramas_nombre(nombre_norm):
+            ids = self._postings.get(trigrama)
+            if ids is None:
+                continue
+            ids.discard(food_id)
+            if not ids:
+                del self._postings[trigrama]
+
+    def indexar(self, food_id: int, nombre: str) -> None:
+        """Alta o actualización de un alimento en el índice."""
+        with self._lock:
+            if not self._construido:
+                return
+            self._quitar(food_id)
+            self._agregar(food_id, nombre)
+
+    def eliminar(self, food_id: int) -> None:
+        with self._lock:
+            if not self._construido:
+                return
+            self._quitar(food_id)
+
+    def invalidar(self) -> None:
+        """Descarta el índice; se reconstruye en la siguiente búsqueda."""
+        with self._lock:
+            self._construido = False
+            self._nombres = {}
+            self._postings = {}
+
+    def buscar(self, consulta: str, limit: int) -> List[int]:
+        """Devuelve hasta `limit` ids ordenados por relevancia."""
+        consulta_norm = normalizar_nombre(consulta)
+        tokens = consulta_norm.split()
+        if not tokens or limit <= 0:
+            return []
+
+        self._asegurar_construido()
+
+        with self._lock:
+            trigramas: Set[str] = set()
+            for token in tokens:
+                trigramas |= _trigramas_consulta(token)
+
+            postings = []
+            for trigrama in trigramas:
+                ids = self._postings.get(trigrama)
+                if not ids:
+                    return []
+                postings.append(ids)
+            postings.sort(key=len)
+
+            candidatos = set(postings[0])
+            for ids in postings[1:]:
+                candidatos &= ids
+                if not candidatos:
+                    return []
+
+            nombres = {food_id: self._nombres[food_id] for food_id in candidatos}
+
+        ranking = []
+        for food_id, nombre_norm in nombres.items():
+            score = self._puntuar(consulta_norm, tokens, nombre_norm)
+            if score is not None:
+                ranking.append((score, len(nombre_norm), food_id))
+
+        return [food_id for _, _, food_id in heapq.nsmallest(limit, ranking)]
+
+    @staticmethod
+    def _puntuar(consulta_norm: str, tokens: List[str], nombre_norm: str):
+        palabras = nombre_norm.split()
+        for token in tokens:
+            if len(token) < 3:
+                if not any(p.startswith(token) for p in palabras):
+                    return None
+            elif token not in nombre_norm:
+                return None
+
+        if nombre_norm == consulta_norm:
+            return 0
+        if nombre_norm.startswith(consulta_norm):
+            return 1
+        if any(p.startswith(tokens[0]) for p in palabras):
+            return 2
+        return 3
@@ -1,12 +1,117 @@
-from typing import List, Optional
-
-import requests
-from pony.orm import db_session, flush
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta
+import math
+from typing import Any, List, Optional, Tuple
+
+from pony.orm import db_session, flush, select, max as db_max
+from pony.orm.core import TransactionIntegrityError
 from fastapi import HTTPException, status
+from decouple import config
+from pydantic import ValidationError
 
-from src.models import Usuario, Food
+from src.db import db, db_lectura, sesion_lectura
+from src.db_executor import en_db
+from src.models import Usuario, Food, FoodTombstone
 from src.schemas import FoodCreate, FoodUpdate
-from src.services.service_utils import get_usuario_or_404
+from src.services.food_autocomplete import FoodAutocomplete
+from src.services.food_cache import FOOD_CACHE_SYNC_SECONDS, food_cache
+from src.services.food_search_index import FoodSearchIndex, normalizar_nombre
+from src.services.meal_service import MealService
+from src.services.openfoodfacts_client import openfoodfacts_client
+from src.services.service_utils import admite_insert_multi, get_usuario_or_404
+
+
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+
+AUTOCOMPLETE_DEFAULT_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 25
+
+LIST_DEFAULT_LIMIT = 500
+LIST_MAX_LIMIT = 1000
+
+# Campos públicos de Food que admite la proyección de /foods/all
+FOOD_FIELDS = (
+    "id",
+    "name",
+    "calories_per_100g",
+    "protein_per_100g",
+    "carbs_per_100g",
+    "fat_per_100g",
+    "barcode",
+    "created_by_id",
+    "created_at",
+    "updated_at",
+)
+
+BULK_MAX_ITEMS = 1000
+
+BARCODE_BATCH_MAX_ITEMS = 100
+# Búsquedas externas simultáneas de un mismo lote; el total entre todas las
+# peticiones lo acota el pool de conexiones de openfoodfacts_client
+BARCODE_BATCH_CONCURRENCY = config("BARCODE_BATCH_CONCURRENCY", default=8, cast=int)
+
+CHANGES_DEFAULT_LIMIT = 500
+CHANGES_MAX_LIMIT = 1000
+# Margen para no dejar atrás escrituras cuyo updated_at es anterior al
+# commit: el cursor final nunca avanza más allá de ahora - margen.
+CHANGES_SAFETY_WINDOW_SECONDS = config(
+    "FOOD_CHANGES_SAFETY_WINDOW_SECONDS", default=5, cast=int
+)
+
+
+def _indexar_nombre(food_id: int, nombre: str) -> None:
+    food_search_index.indexar(food_id, nombre)
+    food_autocomplete.indexar(food_id, nombre)
+
+
+def _desindexar(food_id: int) -> None:
+    food_search_index.eliminar(food_id)
+    food_autocomplete.eliminar(food_id)
+
+
+def _sincronizar_indices_nombre() -> None:
+    margen = timedelta(seconds=CHANGES_SAFETY_WINDOW_SECONDS)
+    ahora = time.monotonic()
+    with _refresco_lock:
+        if _refresco_estado["desde"] is None:
+            # Primera consulta: los índices se construyen ahora desde la BD y
+            # los cambios posteriores se aplicarán en el siguiente refresco.
+            _refresco_estado["desde"] = datetime.now() - margen
+            _refresco_estado["proximo"] = ahora + FOOD_SEARCH_REFRESH_SECONDS
+            return
+        if FOOD_SEARCH_REFRESH_SECONDS <= 0 or ahora < _refresco_estado["proximo"]:
+            return
+        desde = _refresco_estado["desde"]
+        _refresco_estado["desde"] = datetime.now() - margen
+        _refresco_estado["proximo"] = ahora + FOOD_SEARCH_REFRESH_SECONDS
+
+    with sesion_lectura:
+        cambios = select((f.id, f.name) for f in Food if f.updated_at > desde)[:]
+        eliminados = select(t.food_id for t in FoodTombstone if t.deleted_at > desde)[:]
+
+    for food_id, nombre in cambios:
+        _indexar_nombre(food_id, nombre)
+    for food_id in eliminados:
+        _desindexar(food_id)
+
+
+def _cargar_nombres_foods():
+    with sesion_lectura:
+        return select((f.id, f.name) for f in Food)[:]
+
+
+# Índices compartidos por todas las instancias del servicio dentro del proceso
+food_search_index = FoodSearchIndex(_cargar_nombres_foods)
+food_autocomplete = FoodAutocomplete(_cargar_nombres_foods)
+
+# Cada cuánto se aplican a los índices los cambios hechos fuera de este proceso
+# (otros workers, importador masivo). 0 desactiva el refresco.
+FOOD_SEARCH_REFRESH_SECONDS = config("FOOD_SEARCH_REFRESH_SECONDS", default=60, cast=int)
+_refresco_lock = threading.Lock()
+_refresco_estado = {"desde": None, "proximo": 0.0}
 
 
 class FoodService:
@@ -22,8 +127,52 @@ class FoodService:
             "barcode": food.barcode,
             "created_by_id": food.created_by.id if food.created_by is not None else None,
             "created_at": food.created_at,
+            "updated_at": food.updated_at,
         }
 
+    @staticmethod
+    def _tras_guardar(data: dict) -> None:
+        # Se llama después del commit para mantener índices y caché al día
+        _indexar_nombre(data["id"], data["name"])
+        food_cache.invalidar(data["id"])
+        food_cache.put(data)
+
+    @staticmethod
+    def _tras_eliminar(food_id: int) -> None:
+        _desindexar(food_id)
+        food_cache.invalidar(food_id)
+
+    @staticmethod
+    def _tras_guardar_lote(items: List[dict]) -> None:
+        for data in items:
+            _indexar_nombre(data["id"], data["name"])
+        # Una sola invalidación de versión para todo el lote
+        food_cache.invalidar()
+        for data in items:
+            food_cache.put(data)
+
+    def catalog_version(self) -> str:
+        """
+        Versión del catálogo para los ETag, derivada de una huella de la BD
+        que se relee como mucho cada FOOD_CACHE_SYNC_SECONDS o tras una
+        escritura de este proceso.
+        """
+        if food_cache.reservar_sincronizacion(FOOD_CACHE_SYNC_SECONDS):
+            try:
+                with sesion_lectura:
+                    # Altas y cambios mueven el máximo de updated_at o de id;
+                    # las bajas dejan una lápida nueva
+                    huella = (
+                        db_max(f.updated_at for f in Food),
+                        db_max(f.id for f in Food),
+                        db_max(t.id for t in FoodTombstone),
+                    )
+            except BaseException:
+                food_cache.liberar_sincronizacion()
+                raise
+            food_cache.sincronizar(huella)
+        return food_cache.version
+
     def _get_usuario_or_404(self, user_id: int) -> Usuario:
         usuario = Usuario.get(id=user_id)
         if usuario is None:
@@ -58,133 +207,212 @@ class FoodService:
             )
             flush()
 
-            return self._serialize(food)
+            data = self._serialize(food)
+
+        self._tras_guardar(data)
+        return data
 
     def obtener_food_por_id(self, food_id: int) -> dict:
-        with db_session:
+        cached = food_cache.get(food_id)
+        if cached is not None:
+            return cached
+
+        marca = food_cache.marca()
+        with sesion_lectura:
             food = Food.get(id=food_id)
             if food is None:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Alimento no encontrado",
                 )
-            return self._serialize(food)
-
-    def buscar_food_por_nombre(self, nombre: str, user_id: int) -> List[dict]:
-        with db_session:
-            nombre_norm = (nombre or "").strip().lower()
-            foods = list(Food.select()[:])
-
-            if nombre_norm:
-                foods = [
-                    f for f in foods
-                    if nombre_norm in f.name.lower()
-                ]
-            return [self._serialize(f) for f in foods]
+            data = self._serialize(food)
+
+        food_cache.put(data, marca)
+        return data
+
+    def buscar_food_por_nombre(
+        self,
+        nombre: str,
+        user_id: int,
+        limit: int = SEARCH_DEFAULT_LIMIT,
+    ) -> List[dict]:
+        limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+
+        if not (nombre or "").strip():
+            with sesion_lectura:
+                foods = Food.select().order_by(Food.id)[:limit]
+                return [self._serialize(f) for f in foods]
+
+        _sincronizar_indices_nombre()
+        if len(normalizar_nombre(nombre)) < 3:
+            # Con 1-2 caracteres casi todo el catálogo comparte el trigrama;
+            # los arrays ordenados del autocompletado dan el top-k sin puntuar
+            # todos los candidatos.
+            ids = [s["id"] for s in food_autocomplete.sugerir(nombre, limit)]
+        else:
+            ids = food_search_index.buscar(nombre, limit)
+        if not ids:
+            return []
+
+        with sesion_lectura:
+            # Solo se hidratan las filas de la página, respetando el ranking
+            foods = {f.id: f for f in Food.select(lambda f: f.id in ids)}
+            return [self._serialize(foods[i]) for i in ids if i in foods]
+
+    def autocompletar_food(
+        self,
+        consulta: str,
+        limit: int = AUTOCOMPLETE_DEFAULT_LIMIT,
+    ) -> List[dict]:
+        # Se responde solo desde memoria: sin sesión de BD por pulsación
+        limit = max(1, min(limit, AUTOCOMPLETE_MAX_LIMIT))
+        _sincronizar_indices_nombre()
+        return food_autocomplete.sugerir(consulta, limit)
 
     def buscar_food_por_barcode(self, barcode: str) -> dict:
-        with db_session:
+        cached = food_cache.get_por_barcode(barcode)
+        if cached is not None:
+            return cached
+
+        marca = food_cache.marca()
+        with sesion_lectura:
             food = Food.get(barcode=barcode)
             if food is None:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Alimento no encontrado para ese código de barras",
                 )
-            return self._serialize(food)
+            data = self._serialize(food)
 
-    def buscar_o_crear_por_barcode(self, barcode: str) -> dict:
-        barcode = (barcode or "").strip()
+        food_cache.put(data, marca)
+        return data
 
+    @staticmethod
+    def _normalizar_barcode(barcode: Optional[str]) -> Optional[str]:
+        barcode = (barcode or "").strip()
         if not barcode.isdigit() or not (8 <= len(barcode) <= 20):
+            return None
+        return barcode
+
+    def _barcode_local(self, barcode: str) -> Tuple[str, Optional[dict]]:
+        """Barcode normalizado y el alimento si ya está en caché o en la BD."""
+        barcode = self._normalizar_barcode(barcode)
+
+        if barcode is None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="El código de barras debe ser numérico y tener una longitud válida",
             )
 
-        with db_session:
-            food = Food.get(barcode=barcode)
-            if food is not None:
-                return self._serialize(food)
-
-        url = f"https://world.openfoodfacts.org/api/v0/product/{barcode}.json"
+        cached = food_cache.get_por_barcode(barcode)
+        if cached is not None:
+            return barcode, cached
 
-        try:
-            response = requests.get(url, timeout=5)
-        except requests.RequestException:
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail="Error al comunicarse con el servicio externo de alimentos",
-            )
+        marca = food_cache.marca()
+        with sesion_lectura:
+            food = Food.get(barcode=barcode)
+            data = self._serialize(food) if food is not None else None
 
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail="Respuesta inválida del servicio externo de alimentos",
-            )
+        if data is not None:
+            food_cache.put(data, marca)
+        return barcode, data
 
+    def _guardar_producto_externo(self, barcode: str, producto: dict) -> dict:
         try:
-            payload = response.json()
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail="No se pudo interpretar la respuesta del servicio externo de alimentos",
-            )
-
-        status_value = payload.get("status")
-        if status_value != 1:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Alimento no encontrado para ese código de barras en el servicio externo",
-            )
-
-        product = payload.get("product") or {}
-        name = product.get("product_name")
-        nutriments = product.get("nutriments") or {}
+            with db_session:
+                existing = Food.get(barcode=barcode)
+                if existing is not None:
+                    return self._serialize(existing)
+
+                food = Food(
+                    barcode=barcode,
+                    created_by=None,
+                    **producto,
+                )
+                flush()
+
+                data = self._serialize(food)
+        except TransactionIntegrityError:
+            # Otra petición insertó el mismo barcode entre la consulta y el commit
+            with db_session:
+                existing = Food.get(barcode=barcode)
+                if existing is None:
+                    raise
+                return self._serialize(existing)
 
-        energy_kcal_100g = nutriments.get("energy-kcal_100g")
-        proteins_100g = nutriments.get("proteins_100g")
-        carbs_100g = nutriments.get("carbohydrates_100g")
-        fat_100g = nutriments.get("fat_100g")
+        self._tras_guardar(data)
+        return data
+
+    async def buscar_o_crear_por_barcode(self, barcode: str) -> dict:
+        """
+        Alimento del barcode: caché, BD y, si no está, OpenFoodFacts. La
+        búsqueda externa se espera en el event loop y solo los accesos a la
+        BD usan un hilo.
+        """
+        barcode, data = await en_db(self._barcode_local, barcode)
+        if data is not None:
+            return data
+        producto = await openfoodfacts_client.buscar_producto(barcode)
+        return await en_db(self._guardar_producto_externo, barcode, producto)
 
-        if not name or energy_kcal_100g is None or proteins_100g is None or carbs_100g is None or fat_100g is None:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Datos nutricionales incompletos en el servicio externo de alimentos",
-            )
+    @staticmethod
+    def _parse_fields(fields: Optional[List[str]]) -> List[str]:
+        if not fields:
+            return list(FOOD_FIELDS)
 
-        try:
-            calories = float(energy_kcal_100g)
-            protein = float(proteins_100g)
-            carbs = float(carbs_100g)
-            fat = float(fat_100g)
-        except (TypeError, ValueError):
+        invalid = [f for f in fields if f not in FOOD_FIELDS]
+        if invalid:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Datos nutricionales inválidos en el servicio externo de alimentos",
+                detail=f"Campos no válidos: {', '.join(invalid)}",
             )
 
-        with db_session:
-            existing = Food.get(barcode=barcode)
-            if existing is not None:
-                return self._serialize(existing)
+        # El id siempre se incluye porque es el cursor de la paginación
+        selected = ["id"]
+        for field in fields:
+            if field not in selected:
+                selected.append(field)
+        return selected
 
-            food = Food(
-                name=name,
-                calories_per_100g=calories,
-                protein_per_100g=protein,
-                carbs_per_100g=carbs,
-                fat_per_100g=fat,
-                barcode=barcode,
-                created_by=None,
+    @staticmethod
+    def _column_for(field: str) -> str:
+        attr = Food.created_by if field == "created_by_id" else getattr(Food, field)
+        return db.provider.quote_name(attr.columns[0])
+
+    def listar_foods(
+        self,
+        user_id: int,
+        cursor: Optional[int] = None,
+        limit: int = LIST_DEFAULT_LIMIT,
+        fields: Optional[List[str]] = None,
+    ) -> dict:
+        limit = max(1, min(limit, LIST_MAX_LIMIT))
+        selected = self._parse_fields(fields)
+
+        columns = ", ".join(self._column_for(f) for f in selected)
+        table = db.provider.quote_name(Food._table_)
+        id_column = self._column_for("id")
+        params = {"cursor": cursor or 0, "page_size": limit + 1}
+
+        # Paginación por keyset sobre id y proyección a nivel SQL: solo se
+        # leen las columnas pedidas y no se construyen entidades Food.
+        with sesion_lectura:
+            rows = db_lectura.select(
+                f"SELECT {columns} FROM {table} "
+                f"WHERE {id_column} > $cursor "
+                f"ORDER BY {id_column} "
+                f"LIMIT $page_size",
+                params,
             )
-            flush()
 
-            return self._serialize(food)
+        if len(selected) == 1:
+            rows = [(row,) for row in rows]
 
-    def listar_foods(self, user_id: int) -> List[dict]:
-        with db_session:
-            foods = list(Food.select()[:])
-            return [self._serialize(f) for f in foods]
+        has_more = len(rows) > limit
+        items = [dict(zip(selected, row)) for row in rows[:limit]]
+        next_cursor = items[-1]["id"] if has_more else None
+
+        return {"items": items, "next_cursor": next_cursor}
 
     def actualizar_food(self, food_id: int, data: FoodUpdate, user_id: int) -> dict:
         with db_session:
@@ -224,8 +452,12 @@ class FoodService:
             if data.fat_per_100g is not None:
                 food.fat_per_100g = data.fat_per_100g
 
+            food.updated_at = datetime.now()
             flush()
-            return self._serialize(food)
+            data = self._serialize(food)
+
+        self._tras_guardar(data)
+        return data
 
     def eliminar_food(self, food_id: int, user_id: int) -> dict:
         with db_session:
@@ -246,6 +478,434 @@ class FoodService:
                 )
 
             deleted_id = food.id
+            # Las comidas que lo usan se borran en cascada con el alimento:
+            # se descuentan de los totales diarios en la misma transacción
+            meals_afectados = MealService.restar_meals_de_food(deleted_id)
             food.delete()
-            return {"id": deleted_id, "deleted": True}
+            FoodTombstone(food_id=deleted_id)
 
+        self._tras_eliminar(deleted_id)
+        MealService.notificar_meals_eliminados(meals_afectados)
+        return {"id": deleted_id, "deleted": True}
+
+    @staticmethod
+    def _parse_cursor(since: Optional[str]) -> Tuple[datetime, int]:
+        if not since:
+            return datetime.min, 0
+        try:
+            ts, _, food_id = since.partition("|")
+            return datetime.fromisoformat(ts), int(food_id or 0)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor de sincronización inválido",
+            )
+
+    @staticmethod
+    def _format_cursor(ts: datetime, food_id: int) -> str:
+        return f"{ts.isoformat()}|{food_id}"
+
+    def listar_cambios(
+        self,
+        since: Optional[str],
+        limit: int = CHANGES_DEFAULT_LIMIT,
+    ) -> dict:
+        """
+        Alimentos creados/modificados y ids eliminados después del cursor.
+        Altas y bajas se paginan juntas en orden (fecha, id) con el mismo
+        límite. Las filas pueden repetirse entre llamadas; el cliente debe
+        aplicarlas de forma idempotente.
+        """
+        limit = max(1, min(limit, CHANGES_MAX_LIMIT))
+        since_ts, since_id = self._parse_cursor(since)
+
+        with sesion_lectura:
+            foods = select(
+                f for f in Food
+                if f.updated_at > since_ts
+                or (f.updated_at == since_ts and f.id > since_id)
+            ).order_by(lambda f: (f.updated_at, f.id))[:limit + 1]
+            bajas = select(
+                t for t in FoodTombstone
+                if t.deleted_at > since_ts
+                or (t.deleted_at == since_ts and t.food_id > since_id)
+            ).order_by(lambda t: (t.deleted_at, t.food_id))[:limit + 1]
+
+            cambios = sorted(
+                [(f.updated_at, f.id, f) for f in foods]
+                + [(t.deleted_at, t.food_id, None) for t in bajas],
+                key=lambda c: (c[0], c[1]),
+            )
+            has_more = len(cambios) > limit
+            cambios = cambios[:limit]
+            items = [self._serialize(f) for _, _, f in cambios if f is not None]
+            deleted_ids = sorted({food_id for _, food_id, f in cambios if f is None})
+
+        next_ts, next_id = since_ts, since_id
+        if cambios:
+            next_ts, next_id = cambios[-1][0], cambios[-1][1]
+
+        # El cursor nunca pasa de ahora - margen, tampoco a mitad de la
+        # paginación: lo más reciente se vuelve a enviar en la siguiente
+        # llamada y una escritura que confirme tarde no se salta. Si la
+        # página acaba dentro del margen se deja de paginar hasta que pase.
+        horizon = datetime.now() - timedelta(seconds=CHANGES_SAFETY_WINDOW_SECONDS)
+        if next_ts > horizon:
+            next_ts, next_id = max(horizon, since_ts), 0
+            has_more = False
+
+        return {
+            "items": items,
+            "deleted_ids": deleted_ids,
+            "next_cursor": self._format_cursor(next_ts, next_id),
+            "has_more": has_more,
+        }
+
+    @staticmethod
+    def _validar_item_bulk(raw: Any) -> FoodCreate:
+        food_data = FoodCreate.model_validate(raw)
+        food_data.name = food_data.name.strip()
+        if not food_data.name:
+            raise ValueError("El nombre no puede estar vacío")
+        valores = (
+            food_data.calories_per_100g,
+            food_data.protein_per_100g,
+            food_data.carbs_per_100g,
+            food_data.fat_per_100g,
+        )
+        if any(not math.isfinite(v) or v < 0 for v in valores):
+            raise ValueError("Los valores nutricionales deben ser números no negativos")
+        food_data.barcode = (food_data.barcode or "").strip() or None
+        return food_data
+
+    @staticmethod
+    def _serialize_insertado(
+        food_id: int,
+        campos: dict,
+        barcode: Optional[str],
+        created_by_id: Optional[int],
+        ahora: datetime,
+    ) -> dict:
+        # Equivalente a _serialize para filas insertadas sin entidad Pony
+        return {
+            "id": food_id,
+            "name": campos["name"],
+            "calories_per_100g": campos["calories_per_100g"],
+            "protein_per_100g": campos["protein_per_100g"],
+            "carbs_per_100g": campos["carbs_per_100g"],
+            "fat_per_100g": campos["fat_per_100g"],
+            "barcode": barcode,
+            "created_by_id": created_by_id,
+            "created_at": ahora,
+            "updated_at": ahora,
+        }
+
+    @staticmethod
+    def _insertar_por_filas(filas: List[tuple]) -> List[Tuple[int, Optional[str]]]:
+        """
+        _insertar_multi para proveedores distintos de PostgreSQL: una inserción
+        de Pony por fila, omitiendo los barcodes que ya existen. Sin ON
+        CONFLICT, un barcode insertado a la vez por otra transacción hace
+        fallar el commit de todo el lote.
+        """
+        insertados = []
+        for name, calories, protein, carbs, fat, barcode, created_by, creado, modificado in filas:
+            if barcode is not None and Food.exists(barcode=barcode):
+                continue
+            food = Food(
+                name=name,
+                calories_per_100g=calories,
+                protein_per_100g=protein,
+                carbs_per_100g=carbs,
+                fat_per_100g=fat,
+                barcode=barcode,
+                created_by=Usuario[created_by] if created_by is not None else None,
+                created_at=creado,
+                updated_at=modificado,
+            )
+            flush()
+            insertados.append((food.id, barcode))
+        return insertados
+
+    @staticmethod
+    def _insertar_multi(filas: List[tuple]) -> List[Tuple[int, Optional[str]]]:
+        """
+        Inserta todas las filas con un único INSERT multi-fila. Los barcodes
+        que otra transacción haya insertado mientras tanto se omiten
+        (ON CONFLICT DO NOTHING). Devuelve (id, barcode) en orden de inserción.
+        """
+        if not admite_insert_multi():
+            return FoodService._insertar_por_filas(filas)
+
+        from psycopg2.extras import execute_values
+
+        q = db.provider.quote_name
+        columnas = ", ".join(
+            q((Food.created_by if c == "created_by" else getattr(Food, c)).columns[0])
+            for c in (
+                "name",
+                "calories_per_100g",
+                "protein_per_100g",
+                "carbs_per_100g",
+                "fat_per_100g",
+                "barcode",
+                "created_by",
+                "created_at",
+                "updated_at",
+            )
+        )
+        barcode_col = q(Food.barcode.columns[0])
+        sql = (
+            f"INSERT INTO {q(Food._table_)} ({columnas}) VALUES %s "
+            f"ON CONFLICT ({barcode_col}) DO NOTHING "
+            f"RETURNING {q(Food.id.columns[0])}, {barcode_col}"
+        )
+        cursor = db.get_connection().cursor()
+        return execute_values(cursor, sql, filas, page_size=len(filas), fetch=True)
+
+    def crear_foods_bulk(self, items: List[Any], user_id: int) -> dict:
+        if len(items) > BULK_MAX_ITEMS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Se admiten como máximo {BULK_MAX_ITEMS} alimentos por petición",
+            )
+
+        results: List[dict] = [None] * len(items)
+        validos: List[Tuple[int, FoodCreate]] = []
+        barcodes_lote = set()
+
+        for i, raw in enumerate(items):
+            try:
+                food_data = self._validar_item_bulk(raw)
+            except (ValidationError, ValueError) as e:
+                error = "Datos inválidos" if isinstance(e, ValidationError) else str(e)
+                results[i] = {"index": i, "status": "invalid", "error": error, "food": None}
+                continue
+            if food_data.barcode:
+                if food_data.barcode in barcodes_lote:
+                    results[i] = {
+                        "index": i,
+                        "status": "duplicate",
+                        "error": "Código de barras repetido en el lote",
+                        "food": None,
+                    }
+                    continue
+                barcodes_lote.add(food_data.barcode)
+            validos.append((i, food_data))
+
+        creados: List[dict] = []
+        with db_session:
+            usuario = get_usuario_or_404(user_id)
+
+            # Una sola consulta IN para todos los barcodes del lote
+            existentes = set()
+            if barcodes_lote:
+                barcodes = list(barcodes_lote)
+                existentes = set(
+                    select(f.barcode for f in Food if f.barcode in barcodes)[:]
+                )
+
+            pendientes: List[Tuple[int, FoodCreate]] = []
+            for i, food_data in validos:
+                if food_data.barcode in existentes:
+                    results[i] = {
+                        "index": i,
+                        "status": "duplicate",
+                        "error": "El código de barras ya está registrado",
+                        "food": None,
+                    }
+                else:
+                    pendientes.append((i, food_data))
+
+            if pendientes:
+                ahora = datetime.now()
+                filas = [
+                    (
+                        d.name,
+                        d.calories_per_100g,
+                        d.protein_per_100g,
+                        d.carbs_per_100g,
+                        d.fat_per_100g,
+                        d.barcode,
+                        usuario.id,
+                        ahora,
+                        ahora,
+                    )
+                    for _, d in pendientes
+                ]
+                insertados = self._insertar_multi(filas)
+
+                ids_por_barcode = {b: food_id for food_id, b in insertados if b is not None}
+                ids_sin_barcode = iter(food_id for food_id, b in insertados if b is None)
+
+                for i, d in pendientes:
+                    food_id = (
+                        ids_por_barcode.get(d.barcode)
+                        if d.barcode
+                        else next(ids_sin_barcode)
+                    )
+                    if food_id is None:
+                        results[i] = {
+                            "index": i,
+                            "status": "duplicate",
+                            "error": "El código de barras ya está registrado",
+                            "food": None,
+                        }
+                        continue
+                    food = self._serialize_insertado(
+                        food_id, d.model_dump(), d.barcode, usuario.id, ahora
+                    )
+                    creados.append(food)
+                    results[i] = {"index": i, "status": "created", "error": None, "food": food}
+
+        if creados:
+            self._tras_guardar_lote(creados)
+
+        resumen = {"created": 0, "duplicate": 0, "invalid": 0}
+        for r in results:
+            resumen[r["status"]] += 1
+
+        return {"items": results, "summary": resumen}
+
+    @staticmethod
+    def _estado_error_externo(error: HTTPException) -> str:
+        if error.status_code == status.HTTP_404_NOT_FOUND:
+            return "not_found"
+        if error.status_code == status.HTTP_400_BAD_REQUEST:
+            return "incomplete"
+        return "error"
+
+    def _barcodes_locales(self, barcodes: List[str]) -> Tuple[dict, List[str]]:
+        """Resultados ya resueltos por caché o BD y barcodes que hay que buscar fuera."""
+        if len(barcodes) > BARCODE_BATCH_MAX_ITEMS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Se admiten como máximo {BARCODE_BATCH_MAX_ITEMS} códigos de barras por petición",
+            )
+
+        results: dict = {}
+        pendientes: List[str] = []
+        for raw in barcodes:
+            barcode = self._normalizar_barcode(raw)
+            if barcode is None:
+                results[raw] = {
+                    "status": "invalid",
+                    "food": None,
+                    "error": "El código de barras debe ser numérico y tener una longitud válida",
+                }
+                continue
+            if barcode in results or barcode in pendientes:
+                continue
+            cached = food_cache.get_por_barcode(barcode)
+            if cached is not None:
+                results[barcode] = {"status": "found", "food": cached, "error": None}
+            else:
+                pendientes.append(barcode)
+
+        encontrados: List[dict] = []
+        if pendientes:
+            marca = food_cache.marca()
+            with sesion_lectura:
+                for food in Food.select(lambda f: f.barcode in pendientes):
+                    encontrados.append(self._serialize(food))
+            for data in encontrados:
+                food_cache.put(data, marca)
+                results[data["barcode"]] = {"status": "found", "food": data, "error": None}
+
+        return results, [b for b in pendientes if b not in results]
+
+    def _guardar_productos_externos(self, productos: dict, results: dict) -> dict:
+        creados: List[dict] = []
+        if productos:
+            ahora = datetime.now()
+            filas = [
+                (
+                    p["name"],
+                    p["calories_per_100g"],
+                    p["protein_per_100g"],
+                    p["carbs_per_100g"],
+                    p["fat_per_100g"],
+                    barcode,
+                    None,
+                    ahora,
+                    ahora,
+                )
+                for barcode, p in productos.items()
+            ]
+            with db_session:
+                insertados = {b: food_id for food_id, b in self._insertar_multi(filas)}
+                # Los que otra petición insertó mientras tanto se leen de la BD
+                en_conflicto = [b for b in productos if b not in insertados]
+                existentes = {}
+                if en_conflicto:
+                    existentes = {
+                        f.barcode: self._serialize(f)
+                        for f in Food.select(lambda f: f.barcode in en_conflicto)
+                    }
+
+            for barcode, producto in productos.items():
+                if barcode in insertados:
+                    data = self._serialize_insertado(
+                        insertados[barcode], producto, barcode, None, ahora
+                    )
+                    creados.append(data)
+                    results[barcode] = {"status": "created", "food": data, "error": None}
+                elif barcode in existentes:
+                    results[barcode] = {"status": "found", "food": existentes[barcode], "error": None}
+
+        if creados:
+            self._tras_guardar_lote(creados)
+
+        return {"items": results}
+
+    @staticmethod
+    def _resultado_externo(barcode: str, error: HTTPException, results: dict) -> None:
+        results[barcode] = {
+            "status": FoodService._estado_error_externo(error),
+            "food": None,
+            "error": error.detail,
+        }
+
+    async def buscar_o_crear_barcodes(self, barcodes: List[str]) -> dict:
+        """
+        Resuelve un lote de barcodes: caché, una consulta IN para los
+        conocidos, búsquedas externas concurrentes para el resto y una única
+        transacción para insertar los nuevos. Cada lote lanza como máximo
+        BARCODE_BATCH_CONCURRENCY búsquedas externas a la vez, para no
+        acaparar las conexiones del cliente que comparten todas las peticiones.
+        """
+        results, desconocidos = await en_db(self._barcodes_locales, barcodes)
+        if desconocidos:
+            # Con el servicio caído no tiene sentido un error por barcode
+            openfoodfacts_client.comprobar_disponible()
+        turnos = asyncio.Semaphore(max(1, BARCODE_BATCH_CONCURRENCY))
+
+        async def buscar(barcode: str) -> dict:
+            async with turnos:
+                return await openfoodfacts_client.buscar_producto(barcode)
+
+        respuestas = await asyncio.gather(
+            *(buscar(b) for b in desconocidos),
+            return_exceptions=True,
+        )
+        productos = {}
+        for barcode, respuesta in zip(desconocidos, respuestas):
+            if isinstance(respuesta, Exception) and not isinstance(respuesta, HTTPException):
+                # Un fallo inesperado en una búsqueda no tumba el lote
+                respuesta = HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY,
+                    detail="Error inesperado al consultar el servicio externo de alimentos",
+                )
+            if isinstance(respuesta, HTTPException):
+                self._resultado_externo(barcode, respuesta, results)
+            elif isinstance(respuesta, BaseException):
+                raise respuesta
+            else:
+                productos[barcode] = respuesta
+
+        # Si el circuito se abrió durante el lote y ninguna búsqueda obtuvo
+        # respuesta del servicio, está caído para todo el lote
+        respondidos = [b for b in desconocidos if results.get(b, {}).get("status") != "error"]
+        if desconocidos and not respondidos:
+            openfoodfacts_client.comprobar_disponible()
+        return await en_db(self._guardar_productos_externos, productos, results)
@@ -1,5 +1,7 @@
 import time
 
+from src.utils.metrics import obtener_metricas
+
 class HealthService:
     def __init__(self):
         self.start_time = time.time()
@@ -14,4 +16,11 @@ class HealthService:
             "status": "ok",
             "service": "NutriFa online",
             "uptime": self.get_uptime()
-        }
\ No newline at end of file
+        }
+
+    def get_metrics(self) -> dict:
+        """Retorna las métricas en memoria de los componentes registrados"""
+        return {
+            "uptime": self.get_uptime(),
+            **obtener_metricas(),
+        }
@@ -1,12 +1,40 @@
+import csv
+import io
+import json
 from datetime import datetime, date
-from typing import List, Dict
+from typing import Iterator, List, Dict, Tuple
 
-from pony.orm import db_session, flush
+from pony.orm import db_session, flush, select
 from fastapi import HTTPException, status
 
+from src.db import db, db_lectura, sesion_lectura
 from src.models import Usuario, Food, Meal
-from src.schemas import MealCreate
-from src.services.service_utils import get_usuario_or_404, validate_date_range_and_get_bounds
+from src.schemas import MealCreate, MealBatchItem
+from src.services.daily_totals_service import daily_totals_service
+from src.services.dashboard_cache import dashboard_cache
+from src.services.dashboard_events import dashboard_events
+from src.services.service_utils import (
+    admite_insert_multi,
+    get_usuario_or_404,
+    validate_date_range_and_get_bounds,
+)
+
+
+MEAL_BATCH_MAX_ITEMS = 500
+
+EXPORT_FORMATS = ("ndjson", "csv")
+# Filas leídas por consulta durante la exportación
+EXPORT_CHUNK_SIZE = 1000
+_EXPORT_COLUMNS = (
+    "id",
+    "food_id",
+    "quantity_grams",
+    "calories",
+    "protein",
+    "carbs",
+    "fat",
+    "consumed_at",
+)
 
 
 class MealService:
@@ -57,8 +85,204 @@ class MealService:
                 fat=fat,
             )
             flush()
+            daily_totals_service.acumular_meal(meal)
+
+            data = self._serialize(meal)
+
+        self._notificar(user_id, data, "add")
+        return data
+
+    @staticmethod
+    def _insertar_por_filas(filas: List[tuple]) -> List[int]:
+        """_insertar_multi para proveedores distintos de PostgreSQL."""
+        ids = []
+        for user_id, food_id, quantity_grams, calories, protein, carbs, fat, consumed_at in filas:
+            meal = Meal(
+                user=Usuario[user_id],
+                food=Food[food_id],
+                quantity_grams=quantity_grams,
+                calories=calories,
+                protein=protein,
+                carbs=carbs,
+                fat=fat,
+                consumed_at=consumed_at,
+            )
+            flush()
+            ids.append(meal.id)
+        return ids
+
+    @staticmethod
+    def _insertar_multi(filas: List[tuple]) -> List[int]:
+        """
+        Inserta todas las comidas con un único INSERT multi-fila y devuelve
+        sus ids en orden de inserción.
+        """
+        if not admite_insert_multi():
+            return MealService._insertar_por_filas(filas)
+
+        from psycopg2.extras import execute_values
+
+        q = db.provider.quote_name
+        columnas = ", ".join(
+            q(getattr(Meal, c).columns[0])
+            for c in (
+                "user",
+                "food",
+                "quantity_grams",
+                "calories",
+                "protein",
+                "carbs",
+                "fat",
+                "consumed_at",
+            )
+        )
+        sql = (
+            f"INSERT INTO {q(Meal._table_)} ({columnas}) VALUES %s "
+            f"RETURNING {q(Meal.id.columns[0])}"
+        )
+        cursor = db.get_connection().cursor()
+        return [fila[0] for fila in execute_values(cursor, sql, filas, page_size=len(filas), fetch=True)]
+
+    def crear_meals_lote(self, items: List[MealBatchItem], user_id: int) -> List[Dict]:
+        """
+        Registra varias comidas en una sola transacción: todos los alimentos
+        se leen con una consulta IN y, si falta alguno, no se guarda nada.
+        Los totales diarios, la caché y los eventos se actualizan una vez por
+        día afectado en lugar de una vez por comida.
+        """
+        if not items:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="El lote no contiene comidas",
+            )
+        if len(items) > MEAL_BATCH_MAX_ITEMS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Se admiten como máximo {MEAL_BATCH_MAX_ITEMS} comidas por petición",
+            )
+
+        ahora = datetime.now()
+        with db_session:
+            usuario = get_usuario_or_404(user_id)
+
+            food_ids = list({item.food_id for item in items})
+            foods = {
+                f.id: (f.calories_per_100g, f.protein_per_100g, f.carbs_per_100g, f.fat_per_100g)
+                for f in Food.select(lambda f: f.id in food_ids)
+            }
+            faltan = sorted(set(food_ids) - foods.keys())
+            if faltan:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Alimentos no encontrados: {', '.join(map(str, faltan))}",
+                )
 
-            return self._serialize(meal)
+            filas: List[tuple] = []
+            for item in items:
+                factor = item.quantity_grams / 100.0
+                calories, protein, carbs, fat = (v * factor for v in foods[item.food_id])
+                filas.append(
+                    (
+                        usuario.id,
+                        item.food_id,
+                        item.quantity_grams,
+                        calories,
+                        protein,
+                        carbs,
+                        fat,
+                        item.consumed_at or ahora,
+                    )
+                )
+
+            claves = ("user_id", "food_id", "quantity_grams", "calories", "protein", "carbs", "fat", "consumed_at")
+            creados = [
+                {"id": meal_id, **dict(zip(claves, fila))}
+                for meal_id, fila in zip(self._insertar_multi(filas), filas)
+            ]
+
+            por_dia = self._totales_por_dia(creados)
+            for dia, (valores, _) in por_dia.items():
+                daily_totals_service.acumular_dia(user_id, dia, valores)
+
+        for dia, (valores, meal_ids) in por_dia.items():
+            self._notificar_lote(user_id, dia, valores, meal_ids)
+        return creados
+
+    @staticmethod
+    def _totales_por_dia(creados: List[Dict]) -> Dict[date, Tuple[tuple, List[int]]]:
+        por_dia: Dict[date, Tuple[list, List[int]]] = {}
+        for data in creados:
+            sumas, ids = por_dia.setdefault(data["consumed_at"].date(), ([0.0, 0.0, 0.0, 0.0, 0], []))
+            for i, campo in enumerate(("calories", "protein", "carbs", "fat")):
+                sumas[i] += data[campo]
+            sumas[4] += 1
+            ids.append(data["id"])
+        return {dia: (tuple(sumas), ids) for dia, (sumas, ids) in por_dia.items()}
+
+    @staticmethod
+    def restar_meals_de_food(food_id: int) -> Dict[Tuple[int, date], Tuple[tuple, List[int]]]:
+        """
+        Resta de los totales diarios las comidas de un alimento que se va a
+        eliminar (el borrado de Food se lleva sus Meal en cascada). Debe
+        llamarse dentro del db_session del borrado; el resultado se pasa a
+        notificar_meals_eliminados() tras confirmar.
+        """
+        filas = select(
+            (m.user.id, m.id, m.consumed_at, m.calories, m.protein, m.carbs, m.fat)
+            for m in Meal
+            if m.food.id == food_id
+        )[:]
+        por_usuario_dia: Dict[Tuple[int, date], Tuple[list, List[int]]] = {}
+        for user_id, meal_id, consumed_at, calories, protein, carbs, fat in filas:
+            sumas, ids = por_usuario_dia.setdefault(
+                (user_id, consumed_at.date()), ([0.0, 0.0, 0.0, 0.0, 0], [])
+            )
+            for i, valor in enumerate((calories, protein, carbs, fat)):
+                sumas[i] -= valor
+            sumas[4] -= 1
+            ids.append(meal_id)
+
+        afectados = {}
+        for (user_id, dia), (sumas, ids) in por_usuario_dia.items():
+            daily_totals_service.acumular_dia(user_id, dia, tuple(sumas))
+            afectados[(user_id, dia)] = (tuple(sumas), ids)
+        return afectados
+
+    @classmethod
+    def notificar_meals_eliminados(
+        cls, afectados: Dict[Tuple[int, date], Tuple[tuple, List[int]]]
+    ) -> None:
+        for (user_id, dia), (valores, meal_ids) in afectados.items():
+            cls._notificar_lote(user_id, dia, valores, meal_ids, op="delete")
+
+    @staticmethod
+    def _notificar_lote(
+        user_id: int, dia: date, valores: tuple, meal_ids: List[int], op: str = "add"
+    ) -> None:
+        # Tras confirmar: primero se invalida la caché para que un snapshot
+        # pedido al recibir el evento ya incluya el cambio
+        dashboard_cache.invalidar(user_id, dia)
+        calories, protein, carbs, fat, _ = valores
+        dashboard_events.publicar(
+            user_id,
+            {
+                "type": "delta",
+                "op": op,
+                "date": dia,
+                "meal_ids": meal_ids,
+                "calories": calories,
+                "protein": protein,
+                "carbs": carbs,
+                "fat": fat,
+            },
+        )
+
+    @classmethod
+    def _notificar(cls, user_id: int, data: Dict, op: str) -> None:
+        # Mismo evento que un lote de una sola comida
+        signo = 1 if op == "add" else -1
+        valores = tuple(signo * data[c] for c in ("calories", "protein", "carbs", "fat")) + (signo,)
+        cls._notificar_lote(user_id, data["consumed_at"].date(), valores, [data["id"]], op=op)
 
     def listar_meals_rango(
         self,
@@ -71,17 +295,109 @@ class MealService:
             fecha_fin,
         )
 
-        with db_session:
+        with sesion_lectura:
             usuario = get_usuario_or_404(user_id)
 
-            meals = [
-                m
-                for m in usuario.meals
-                if m.consumed_at >= start_datetime and m.consumed_at <= end_datetime
-            ]
+            meals = Meal.select(
+                lambda m: m.user == usuario
+                and m.consumed_at >= start_datetime
+                and m.consumed_at <= end_datetime
+            ).order_by(Meal.consumed_at, Meal.id)
 
             return [self._serialize(m) for m in meals]
 
+    @staticmethod
+    def _sql_export(incluir_food: bool, con_cursor: bool) -> str:
+        q = db.provider.quote_name
+        columna = {
+            c: q(getattr(Meal, "food" if c == "food_id" else c).columns[0])
+            for c in _EXPORT_COLUMNS
+        }
+        columnas = ", ".join(f"m.{columna[c]}" for c in _EXPORT_COLUMNS)
+        origen = f"{q(Meal._table_)} m"
+        if incluir_food:
+            columnas += f", f.{q(Food.name.columns[0])}"
+            origen += (
+                f" JOIN {q(Food._table_)} f"
+                f" ON f.{q(Food.id.columns[0])} = m.{columna['food_id']}"
+            )
+        sql = f"SELECT {columnas} FROM {origen} WHERE m.{q(Meal.user.columns[0])} = $user_id "
+        if con_cursor:
+            sql += f"AND (m.{columna['consumed_at']}, m.{columna['id']}) > ($ultimo_at, $ultimo_id) "
+        return sql + f"ORDER BY m.{columna['consumed_at']}, m.{columna['id']} LIMIT $chunk"
+
+    def _filas_export(self, user_id: int, incluir_food: bool, chunk: int) -> Iterator[tuple]:
+        """
+        Todas las comidas del usuario en orden cronológico, por bloques con
+        paginación por keyset sobre (consumed_at, id) para usar el índice
+        (user, consumed_at). Cada bloque va en su propia sesión corta, así que
+        la memoria no depende del tamaño del historial.
+        """
+        params = {"user_id": user_id, "chunk": chunk}
+        sql_inicio = self._sql_export(incluir_food, con_cursor=False)
+        sql_siguiente = self._sql_export(incluir_food, con_cursor=True)
+        sql = sql_inicio
+        while True:
+            with sesion_lectura:
+                filas = db_lectura.select(sql, params)
+            yield from filas
+            if len(filas) < chunk:
+                return
+            params["ultimo_at"], params["ultimo_id"] = filas[-1][7], filas[-1][0]
+            sql = sql_siguiente
+
+    def exportar_meals(
+        self,
+        user_id: int,
+        formato: str = "ndjson",
+        incluir_food: bool = True,
+        chunk: int = EXPORT_CHUNK_SIZE,
+    ) -> Iterator[str]:
+        """
+        Valida la petición y devuelve un generador con el historial completo
+        en NDJSON o CSV, un bloque de texto por consulta.
+        """
+        if formato not in EXPORT_FORMATS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Formato no válido, use uno de: {', '.join(EXPORT_FORMATS)}",
+            )
+        with sesion_lectura:
+            get_usuario_or_404(user_id)
+
+        claves = _EXPORT_COLUMNS + (("food_name",) if incluir_food else ())
+        return self._serializar_export(
+            self._filas_export(user_id, incluir_food, chunk), claves, formato, chunk
+        )
+
+    @staticmethod
+    def _serializar_export(
+        filas: Iterator[tuple], claves: Tuple[str, ...], formato: str, chunk: int
+    ) -> Iterator[str]:
+        buffer = io.StringIO()
+        escritor = None
+        if formato == "csv":
+            escritor = csv.writer(buffer, lineterminator="\n")
+            escritor.writerow(claves)
+
+        pendientes = 0
+        for fila in filas:
+            if escritor is not None:
+                escritor.writerow(v.isoformat() if isinstance(v, datetime) else v for v in fila)
+            else:
+                data = dict(zip(claves, fila))
+                data["consumed_at"] = data["consumed_at"].isoformat()
+                buffer.write(json.dumps(data, ensure_ascii=False))
+                buffer.write("\n")
+            pendientes += 1
+            if pendientes >= chunk:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                pendientes = 0
+        if buffer.tell():
+            yield buffer.getvalue()
+
     def eliminar_meal(self, meal_id: int, user_id: int) -> Dict:
         with db_session:
             usuario = get_usuario_or_404(user_id)
@@ -93,6 +409,9 @@ class MealService:
                 )
 
             data = self._serialize(meal)
+            daily_totals_service.acumular_meal(meal, signo=-1)
             meal.delete()
-            return data
+
+        self._notificar(user_id, data, "delete")
+        return data
 
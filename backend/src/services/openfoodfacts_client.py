@@ -0,0 +1,384 @@
+import asyncio
+import json
+import math
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import httpx
+from decouple import config
+from fastapi import HTTPException, status
+
+from src.services.circuit_breaker import ABIERTO, CircuitBreaker, CircuitoAbierto
+from src.utils.metrics import registrar_metricas
+
+
+OPENFOODFACTS_BASE_URL = config(
+    "OPENFOODFACTS_BASE_URL", default="https://world.openfoodfacts.org"
+)
+# Plazo de cada búsqueda (conexión + lectura) desde que tiene una conexión
+# del pool; también acota la espera por esa conexión y la de las peticiones
+# que esperan a otra que ya está consultando el mismo barcode
+OPENFOODFACTS_TIMEOUT_SECONDS = config(
+    "OPENFOODFACTS_TIMEOUT_SECONDS", default=5.0, cast=float
+)
+OPENFOODFACTS_POOL_SIZE = config("OPENFOODFACTS_POOL_SIZE", default=10, cast=int)
+OPENFOODFACTS_NEGATIVE_TTL_SECONDS = config(
+    "OPENFOODFACTS_NEGATIVE_TTL_SECONDS", default=600, cast=int
+)
+OPENFOODFACTS_NEGATIVE_MAX_ENTRIES = 10000
+
+OPENFOODFACTS_BREAKER_FAILURES = config(
+    "OPENFOODFACTS_BREAKER_FAILURES", default=5, cast=int
+)
+OPENFOODFACTS_BREAKER_SLOW_SECONDS = config(
+    "OPENFOODFACTS_BREAKER_SLOW_SECONDS", default=2.0, cast=float
+)
+OPENFOODFACTS_BREAKER_RESET_SECONDS = config(
+    "OPENFOODFACTS_BREAKER_RESET_SECONDS", default=30.0, cast=float
+)
+
+
+class DatosNutricionalesIncompletos(ValueError):
+    pass
+
+
+class DatosNutricionalesInvalidos(ValueError):
+    pass
+
+
+def mapear_producto(product: dict) -> dict:
+    """
+    Convierte un producto de OpenFoodFacts en los campos de Food.
+    Lanza DatosNutricionalesIncompletos / DatosNutricionalesInvalidos.
+    """
+    name = product.get("product_name")
+    nutriments = product.get("nutriments") or {}
+
+    energy_kcal_100g = nutriments.get("energy-kcal_100g")
+    proteins_100g = nutriments.get("proteins_100g")
+    carbs_100g = nutriments.get("carbohydrates_100g")
+    fat_100g = nutriments.get("fat_100g")
+
+    if not name or energy_kcal_100g is None or proteins_100g is None or carbs_100g is None or fat_100g is None:
+        raise DatosNutricionalesIncompletos(name)
+
+    try:
+        valores = [float(v) for v in (energy_kcal_100g, proteins_100g, carbs_100g, fat_100g)]
+    except (TypeError, ValueError):
+        raise DatosNutricionalesInvalidos(name)
+    # Misma validación que FoodService para las altas de la API
+    if any(not math.isfinite(v) or v < 0 for v in valores):
+        raise DatosNutricionalesInvalidos(name)
+
+    calories, protein, carbs, fat = valores
+    return {
+        "name": name,
+        "calories_per_100g": calories,
+        "protein_per_100g": protein,
+        "carbs_per_100g": carbs,
+        "fat_per_100g": fat,
+    }
+
+
+class OpenFoodFactsClient:
+    """
+    Cliente async de OpenFoodFacts con conexiones persistentes (keep-alive),
+    coalescencia de búsquedas concurrentes del mismo barcode y caché negativa
+    con TTL para productos inexistentes o con datos incompletos.
+    """
+
+    # Respuestas que no cambian al reintentar; los errores 502 no se cachean
+    _ESTADOS_NEGATIVOS = (status.HTTP_400_BAD_REQUEST, status.HTTP_404_NOT_FOUND)
+
+    def __init__(
+        self,
+        base_url: str = OPENFOODFACTS_BASE_URL,
+        timeout: float = OPENFOODFACTS_TIMEOUT_SECONDS,
+        pool_size: int = OPENFOODFACTS_POOL_SIZE,
+        negative_ttl: int = OPENFOODFACTS_NEGATIVE_TTL_SECONDS,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.negative_ttl = negative_ttl
+        self.breaker = breaker or CircuitBreaker(
+            failure_threshold=OPENFOODFACTS_BREAKER_FAILURES,
+            slow_call_seconds=OPENFOODFACTS_BREAKER_SLOW_SECONDS,
+            reset_seconds=OPENFOODFACTS_BREAKER_RESET_SECONDS,
+        )
+
+        self._pool_size = pool_size
+        # Un cliente httpx por event loop (uvicorn tiene uno por proceso),
+        # con un semáforo del tamaño de su pool de conexiones
+        self._clientes: Dict[
+            asyncio.AbstractEventLoop, Tuple[httpx.AsyncClient, asyncio.Semaphore]
+        ] = {}
+        self._en_vuelo: Dict[str, asyncio.Future] = {}
+
+        self._lock = threading.Lock()
+        self._negativos: Dict[str, Tuple[float, int, str]] = {}
+
+        self.upstream_calls = 0
+        self.coalesced = 0
+        self.negative_hits = 0
+        self.local_waits = 0
+        self.local_rejected = 0
+
+    def _comprobar_negativo(self, barcode: str) -> None:
+        """Se llama con self._lock tomado."""
+        negativo = self._negativos.get(barcode)
+        if negativo is not None:
+            expira, status_code, detail = negativo
+            if expira > time.monotonic():
+                self.negative_hits += 1
+                raise HTTPException(status_code=status_code, detail=detail)
+            del self._negativos[barcode]
+
+    @staticmethod
+    def _timeout_externo() -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Tiempo de espera agotado con el servicio externo de alimentos",
+        )
+
+    async def buscar_producto(self, barcode: str) -> dict:
+        """Devuelve los campos de Food para el barcode o lanza HTTPException."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._comprobar_negativo(barcode)
+            llamada = self._en_vuelo.get(barcode)
+            es_lider = llamada is None or llamada.get_loop() is not loop
+            if es_lider:
+                llamada = loop.create_future()
+                self._en_vuelo[barcode] = llamada
+            else:
+                self.coalesced += 1
+
+        if not es_lider:
+            try:
+                resultado = await asyncio.wait_for(asyncio.shield(llamada), self.timeout)
+            except asyncio.TimeoutError:
+                raise self._timeout_externo()
+            except HTTPException as e:
+                raise HTTPException(status_code=e.status_code, detail=e.detail, headers=e.headers)
+            return dict(resultado)
+
+        try:
+            resultado = await self._fetch(barcode)
+            llamada.set_result(resultado)
+            return dict(resultado)
+        except HTTPException as e:
+            llamada.set_exception(e)
+            if e.status_code in self._ESTADOS_NEGATIVOS:
+                self._guardar_negativo(barcode, e)
+            raise
+        except asyncio.CancelledError:
+            # El cliente que lanzó la búsqueda se fue; los que esperaban la
+            # misma reciben un error en lugar de la cancelación ajena
+            llamada.set_exception(self._error_de_comunicacion())
+            raise
+        except BaseException as e:
+            llamada.set_exception(e)
+            raise
+        finally:
+            # Puede que nadie más espere el resultado: se marca la excepción
+            # como recogida para que asyncio no avise
+            if llamada.done():
+                llamada.exception()
+            with self._lock:
+                if self._en_vuelo.get(barcode) is llamada:
+                    del self._en_vuelo[barcode]
+
+    def _guardar_negativo(self, barcode: str, error: HTTPException) -> None:
+        ahora = time.monotonic()
+        with self._lock:
+            self._negativos[barcode] = (
+                ahora + self.negative_ttl,
+                error.status_code,
+                error.detail,
+            )
+            if len(self._negativos) > OPENFOODFACTS_NEGATIVE_MAX_ENTRIES:
+                for clave, (expira, _, _) in list(self._negativos.items()):
+                    if expira <= ahora:
+                        del self._negativos[clave]
+                # Si siguen sobrando, se descartan los más antiguos
+                while len(self._negativos) > OPENFOODFACTS_NEGATIVE_MAX_ENTRIES:
+                    del self._negativos[next(iter(self._negativos))]
+
+    def _no_disponible(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servicio externo de alimentos no disponible temporalmente",
+            headers={"Retry-After": str(self.breaker.retry_after())},
+        )
+
+    def comprobar_disponible(self) -> None:
+        """Lanza el 503 del circuito si está abierto, sin gastar la llamada de prueba."""
+        if self.breaker.estado == ABIERTO:
+            raise self._no_disponible()
+
+    def _permitir(self) -> None:
+        try:
+            self.breaker.permitir()
+        except CircuitoAbierto:
+            # Fallo inmediato: no se ocupa el worker esperando a un servicio caído
+            raise self._no_disponible()
+
+    def _registrar_error(self, error: BaseException, inicio: float) -> None:
+        # 404/400 son respuestas válidas del servicio; solo los 5xx cuentan
+        if isinstance(error, HTTPException) and error.status_code < 500:
+            self.breaker.registrar_exito(time.monotonic() - inicio)
+        else:
+            self.breaker.registrar_fallo()
+
+    async def _reservar_conexion(self, conexiones: asyncio.Semaphore) -> None:
+        """
+        Espera una conexión libre del pool. Es una espera local: no cuenta en
+        el plazo de la llamada ni en el circuit breaker.
+        """
+        if not conexiones.locked():
+            await conexiones.acquire()
+            return
+        with self._lock:
+            self.local_waits += 1
+        try:
+            await asyncio.wait_for(conexiones.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.local_rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Demasiadas búsquedas externas en curso, inténtalo más tarde",
+                headers={"Retry-After": "1"},
+            )
+
+    async def _fetch(self, barcode: str) -> dict:
+        cliente, conexiones = self._cliente()
+        await self._reservar_conexion(conexiones)
+        try:
+            self._permitir()
+            # El plazo y el umbral de llamada lenta empiezan con la conexión ya reservada
+            inicio = time.monotonic()
+            try:
+                resultado = await self._fetch_upstream(
+                    cliente, barcode, inicio + self.timeout
+                )
+            except BaseException as e:
+                self._registrar_error(e, inicio)
+                raise
+            self.breaker.registrar_exito(time.monotonic() - inicio)
+            return resultado
+        finally:
+            conexiones.release()
+
+    def _cliente(self) -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+        loop = asyncio.get_running_loop()
+        cliente = self._clientes.get(loop)
+        if cliente is None:
+            cliente = (
+                httpx.AsyncClient(
+                    # El semáforo garantiza una conexión libre: httpx no espera por el pool
+                    timeout=httpx.Timeout(self.timeout, pool=None),
+                    limits=httpx.Limits(
+                        max_connections=self._pool_size,
+                        max_keepalive_connections=self._pool_size,
+                    ),
+                ),
+                asyncio.Semaphore(self._pool_size),
+            )
+            with self._lock:
+                # Los de loops ya cerrados (p. ej. en tests) se descartan
+                for cerrado in [lp for lp in self._clientes if lp.is_closed()]:
+                    del self._clientes[cerrado]
+                self._clientes[loop] = cliente
+        return cliente
+
+    async def _leer_con_deadline(
+        self, cliente: httpx.AsyncClient, url: str, deadline: float
+    ) -> bytes:
+        async with cliente.stream("GET", url) as response:
+            if response.status_code != 200:
+                raise HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY,
+                    detail="Respuesta inválida del servicio externo de alimentos",
+                )
+            partes = []
+            async for parte in response.aiter_bytes(16384):
+                if time.monotonic() > deadline:
+                    raise self._timeout_externo()
+                partes.append(parte)
+            return b"".join(partes)
+
+    @staticmethod
+    def _error_de_comunicacion() -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Error al comunicarse con el servicio externo de alimentos",
+        )
+
+    def _url(self, barcode: str) -> str:
+        with self._lock:
+            self.upstream_calls += 1
+        return f"{self.base_url}/api/v0/product/{barcode}.json"
+
+    async def _fetch_upstream(
+        self, cliente: httpx.AsyncClient, barcode: str, deadline: float
+    ) -> dict:
+        try:
+            contenido = await asyncio.wait_for(
+                self._leer_con_deadline(cliente, self._url(barcode), deadline),
+                max(0.0, deadline - time.monotonic()),
+            )
+        except asyncio.TimeoutError:
+            raise self._timeout_externo()
+        except httpx.HTTPError:
+            raise self._error_de_comunicacion()
+        return self._interpretar(contenido)
+
+    @staticmethod
+    def _interpretar(contenido: bytes) -> dict:
+        try:
+            payload = json.loads(contenido)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="No se pudo interpretar la respuesta del servicio externo de alimentos",
+            )
+
+        status_value = payload.get("status")
+        if status_value != 1:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Alimento no encontrado para ese código de barras en el servicio externo",
+            )
+
+        try:
+            return mapear_producto(payload.get("product") or {})
+        except DatosNutricionalesIncompletos:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Datos nutricionales incompletos en el servicio externo de alimentos",
+            )
+        except DatosNutricionalesInvalidos:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Datos nutricionales inválidos en el servicio externo de alimentos",
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "upstream_calls": self.upstream_calls,
+                "coalesced": self.coalesced,
+                "negative_hits": self.negative_hits,
+                "local_waits": self.local_waits,
+                "local_rejected": self.local_rejected,
+                "negative_entries": len(self._negativos),
+                "in_flight": len(self._en_vuelo),
+                "breaker": self.breaker.stats(),
+            }
+
+
+openfoodfacts_client = OpenFoodFactsClient()
+registrar_metricas("openfoodfacts", openfoodfacts_client.stats)
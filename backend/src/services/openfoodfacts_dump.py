@@ -0,0 +1,124 @@
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+from typing import Iterable, Iterator, Optional, Tuple
+
+from src.services.openfoodfacts_client import mapear_producto
+
+
+# Lectura y validación de los volcados de OpenFoodFacts para
+# import_openfoodfacts.py; nada de aquí usa la base de datos.
+
+# Campos de nutrientes del volcado CSV que usa mapear_producto
+_CSV_NUTRIENTES = (
+    "energy-kcal_100g",
+    "proteins_100g",
+    "carbohydrates_100g",
+    "fat_100g",
+)
+
+
+def abrir_texto(path: str) -> io.TextIOBase:
+    if path.endswith(".gz"):
+        return io.TextIOWrapper(gzip.open(path, "rb"), encoding="utf-8", errors="replace", newline="")
+    return open(path, "r", encoding="utf-8", errors="replace", newline="")
+
+
+def detectar_formato(path: str) -> str:
+    nombre = path[:-3] if path.endswith(".gz") else path
+    return "jsonl" if nombre.endswith((".jsonl", ".json", ".ndjson")) else "csv"
+
+
+def productos_csv(archivo, delimiter: str) -> Iterator[Tuple[Optional[str], dict]]:
+    csv.field_size_limit(sys.maxsize)
+    for fila in csv.DictReader(archivo, delimiter=delimiter):
+        producto = {
+            "product_name": fila.get("product_name"),
+            "nutriments": {
+                campo: fila.get(campo) or None for campo in _CSV_NUTRIENTES
+            },
+        }
+        yield fila.get("code"), producto
+
+
+def productos_jsonl(archivo) -> Iterator[Tuple[Optional[str], dict]]:
+    # Las líneas vacías o inválidas también cuentan como fila, para que las
+    # posiciones del checkpoint no dependan de su contenido
+    for linea in archivo:
+        linea = linea.strip()
+        if not linea:
+            yield None, {}
+            continue
+        try:
+            producto = json.loads(linea)
+        except ValueError:
+            yield None, {}
+            continue
+        yield producto.get("code") or producto.get("_id"), producto
+
+
+def barcode_valido(barcode: Optional[str]) -> bool:
+    # Misma validación que FoodService.buscar_o_crear_por_barcode
+    return bool(barcode) and barcode.isdigit() and 8 <= len(barcode) <= 20
+
+
+def food_de_producto(barcode: Optional[str], producto: dict) -> Optional[Tuple[str, dict]]:
+    """(barcode, campos de Food) de una fila del volcado, None si no es válida."""
+    barcode = (barcode or "").strip()
+    if not barcode_valido(barcode):
+        return None
+    try:
+        return barcode, mapear_producto(producto)
+    except ValueError:
+        return None
+
+
+def filas_validas(
+    productos: Iterable[Tuple[Optional[str], dict]],
+    inicio_en: int,
+    stats: dict,
+) -> Iterator[Tuple[int, str, dict]]:
+    """
+    (posición, barcode, food) de las filas válidas después de `inicio_en`.
+    Cuenta en stats las leídas ("read") y las descartadas ("skipped").
+    """
+    posicion = 0
+    for barcode, producto in productos:
+        posicion += 1
+        if posicion <= inicio_en:
+            continue
+        stats["read"] += 1
+        resultado = food_de_producto(barcode, producto)
+        if resultado is None:
+            stats["skipped"] += 1
+            continue
+        yield posicion, resultado[0], resultado[1]
+    stats["position"] = max(posicion, inicio_en)
+
+
+def origen_de(path: str) -> dict:
+    """Identifica el archivo para no aplicar un checkpoint de otro."""
+    info = os.stat(path)
+    return {"path": os.path.abspath(path), "size": info.st_size, "mtime": int(info.st_mtime)}
+
+
+def leer_checkpoint(path: str, origen: dict) -> Optional[int]:
+    """Fila desde la que reanudar; None si el checkpoint es de otro archivo."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return 0
+    if data.get("source") != origen:
+        return None
+    return int(data.get("position", 0))
+
+
+def guardar_checkpoint(path: str, origen: dict, posicion: int, stats: dict) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"source": origen, "position": posicion, "stats": stats}, f)
+    os.replace(tmp, path)
@@ -0,0 +1,163 @@
+import asyncio
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+import bcrypt
+from decouple import config
+from fastapi import HTTPException, status
+
+from src.utils.metrics import registrar_metricas
+
+
+# Coste de bcrypt para los hashes nuevos; los guardados con otro coste se
+# rehacen en el siguiente login correcto
+BCRYPT_ROUNDS = config("BCRYPT_ROUNDS", default=12, cast=int)
+# Procesos dedicados a bcrypt; 0 lo ejecuta en un hilo aparte del proceso
+PASSWORD_HASH_WORKERS = config("PASSWORD_HASH_WORKERS", default=os.cpu_count() or 1, cast=int)
+# Hashes en curso o en cola a partir de los cuales se responde 503
+PASSWORD_HASH_MAX_PENDING = config("PASSWORD_HASH_MAX_PENDING", default=32, cast=int)
+PASSWORD_HASH_TIMEOUT_SECONDS = config("PASSWORD_HASH_TIMEOUT_SECONDS", default=10.0, cast=float)
+PASSWORD_HASH_RETRY_AFTER_SECONDS = 5
+
+
+# Funciones de módulo para que se puedan enviar a los procesos del pool
+def _hash(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def _verify(plain: str, hashed: str) -> bool:
+    return bcrypt.checkpw(plain.encode("utf-8"), hashed.encode("utf-8"))
+
+
+def coste_de_hash(hashed: str) -> Optional[int]:
+    """Coste de un hash bcrypt ($2b$12$...), None si no tiene ese formato."""
+    partes = hashed.split("$")
+    if len(partes) < 4 or not partes[2].isdigit():
+        return None
+    return int(partes[2])
+
+
+class PasswordHasher:
+    """
+    bcrypt fuera del event loop: un pool de procesos de tamaño fijo y una
+    cola acotada. Si hay PASSWORD_HASH_MAX_PENDING operaciones pendientes,
+    la siguiente se rechaza con 503 en lugar de acumular peticiones
+    esperando.
+    """
+
+    def __init__(self, rounds: int, workers: int, max_pending: int, timeout: float):
+        self.rounds = rounds
+        self._workers = max(0, workers)
+        self._max_pending = max(1, max_pending)
+        self._timeout = timeout
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._pendientes = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self._tiempo_total = 0.0
+
+    def _get_executor(self) -> Executor:
+        # Se crea al primer uso para no lanzar procesos al importar el módulo
+        with self._lock:
+            if self._executor is None:
+                if self._workers == 0:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bcrypt")
+                else:
+                    # spawn: hacer fork de un proceso con hilos no es seguro
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self._workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+            return self._executor
+
+    @staticmethod
+    def _saturado() -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Demasiados inicios de sesión simultáneos, inténtalo más tarde",
+            headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER_SECONDS)},
+        )
+
+    def _reservar(self) -> None:
+        with self._lock:
+            if self._pendientes >= self._max_pending:
+                self.rejected += 1
+                raise self._saturado()
+            self._pendientes += 1
+
+    def _liberar(self, inicio: float) -> None:
+        with self._lock:
+            self._pendientes -= 1
+            self.completed += 1
+            self._tiempo_total += time.perf_counter() - inicio
+
+    def _plazo_agotado(self) -> HTTPException:
+        with self._lock:
+            self.rejected += 1
+        return self._saturado()
+
+    async def _ejecutar(self, fn: Callable, *args):
+        # La espera al resultado no ocupa ningún hilo del servidor
+        self._reservar()
+        inicio = time.perf_counter()
+        try:
+            tarea = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._liberar(inicio)
+            raise
+        # El hueco se libera cuando el worker termina, no cuando se deja de
+        # esperar: tras un plazo agotado el hash sigue ocupando el pool
+        tarea.add_done_callback(lambda _: self._liberar(inicio))
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(tarea), self._timeout)
+        except asyncio.TimeoutError:
+            raise self._plazo_agotado()
+
+    async def hash_password(self, password: str) -> str:
+        return await self._ejecutar(_hash, password, self.rounds)
+
+    async def verify_password(self, plain: str, hashed: str) -> bool:
+        return await self._ejecutar(_verify, plain, hashed)
+
+    def necesita_rehash(self, hashed: str) -> bool:
+        return coste_de_hash(hashed) != self.rounds
+
+    def registrar_rehash(self) -> None:
+        with self._lock:
+            self.rehashed += 1
+
+    def cerrar(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "rounds": self.rounds,
+                "workers": self._workers,
+                "pending": self._pendientes,
+                "max_pending": self._max_pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "rehashed": self.rehashed,
+                "avg_ms": (self._tiempo_total / self.completed * 1000) if self.completed else 0.0,
+            }
+
+
+password_hasher = PasswordHasher(
+    BCRYPT_ROUNDS,
+    PASSWORD_HASH_WORKERS,
+    PASSWORD_HASH_MAX_PENDING,
+    PASSWORD_HASH_TIMEOUT_SECONDS,
+)
+registrar_metricas("password_hashing", password_hasher.stats)
+atexit.register(password_hasher.cerrar)
@@ -3,9 +3,15 @@ from typing import Tuple
 
 from fastapi import HTTPException, status
 
+from src.db import db
 from src.models import Usuario
 
 
+def admite_insert_multi() -> bool:
+    # execute_values y ON CONFLICT ... RETURNING son de PostgreSQL/psycopg2
+    return db.provider.dialect == "PostgreSQL"
+
+
 def get_usuario_or_404(user_id: int) -> Usuario:
     usuario = Usuario.get(id=user_id)
     if usuario is None:
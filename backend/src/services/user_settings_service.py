@@ -3,8 +3,11 @@ from pony.orm import db_session, flush
 from pony.orm.core import TransactionIntegrityError, MultipleObjectsFoundError
 from fastapi import HTTPException, status
 
+from src.db import sesion_lectura
 from src.models import Usuario, UserSettings
 from src.schemas import SettingsCreate, SettingsUpdate
+from src.services.dashboard_cache import dashboard_cache
+from src.services.dashboard_events import dashboard_events
 
 
 class UserSettingsService:
@@ -20,6 +23,21 @@ class UserSettingsService:
             "updated_at": settings.updated_at,
         }
 
+    @staticmethod
+    def _notificar(user_id: int, data: dict) -> None:
+        # metabolism_base cambia el balance de todos los días del usuario
+        dashboard_cache.invalidar(user_id)
+        dashboard_events.publicar(
+            user_id,
+            {
+                "type": "settings",
+                "metabolism_base": data["metabolism_base"],
+                "protein_target": data["protein_target"],
+                "carbs_target": data["carbs_target"],
+                "fat_target": data["fat_target"],
+            },
+        )
+
     def crear_settings(self, user_id: int, data: SettingsCreate) -> dict:
         with db_session:
             usuario = Usuario.get(id=user_id)
@@ -50,10 +68,13 @@ class UserSettingsService:
                 settings.fat_target = data.fat_target
                 settings.updated_at = datetime.now()
 
-            return self._serialize(usuario, settings)
+            data = self._serialize(usuario, settings)
+
+        self._notificar(user_id, data)
+        return data
 
     def obtener_settings(self, user_id: int) -> dict:
-        with db_session:
+        with sesion_lectura:
             usuario = Usuario.get(id=user_id)
             if usuario is None:
                 raise HTTPException(
@@ -104,4 +125,7 @@ class UserSettingsService:
 
             settings.updated_at = datetime.now()
 
-            return self._serialize(usuario, settings)
+            data = self._serialize(usuario, settings)
+
+        self._notificar(user_id, data)
+        return data
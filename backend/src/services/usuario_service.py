@@ -1,30 +1,25 @@
+from typing import Tuple
+
 from pony.orm import db_session, flush
 from pony.orm.core import TransactionIntegrityError
-import bcrypt
 from fastapi import HTTPException, status
 
+from src.db import sesion_lectura
+from src.db_executor import en_db
 from src.models import Usuario
 from src.schemas import UsuarioCreate
+from src.services.password_hasher import password_hasher
 
 
 class UsuarioService:
     """Service de la entidad Usuario. Lógica y acceso a datos con db_session."""
 
     @staticmethod
-    def _hash_password(password: str) -> str:
-        return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
-
-    @staticmethod
-    def _verify_password(plain: str, hashed: str) -> bool:
-        return bcrypt.checkpw(plain.encode("utf-8"), hashed.encode("utf-8"))
-
-    def crear_usuario(self, data: UsuarioCreate) -> dict:
-        """Crea un usuario. Lanza HTTPException si el user ya existe."""
+    def _guardar_usuario(user: str, password_hash: str) -> dict:
         with db_session:
             try:
-                password_hash = self._hash_password(data.password)
                 usuario = Usuario(
-                    user=data.user,
+                    user=user,
                     password_hash=password_hash,
                 )
                 flush()
@@ -39,9 +34,16 @@ class UsuarioService:
                     detail="El nombre de usuario ya está registrado",
                 )
 
+    # bcrypt corre en el pool de password_hasher y siempre fuera de los
+    # db_session, para no retener una conexión mientras se calcula
+    async def crear_usuario(self, data: UsuarioCreate) -> dict:
+        """Crea un usuario. Lanza HTTPException si el user ya existe."""
+        password_hash = await password_hasher.hash_password(data.password)
+        return await en_db(self._guardar_usuario, data.user, password_hash)
+
     def buscar_usuario_por_id(self, usuario_id: int):
         """Devuelve el Usuario si existe, None si no."""
-        with db_session:
+        with sesion_lectura:
             usuario = Usuario.get(id=usuario_id)
             if usuario is None:
                 return None
@@ -52,25 +54,48 @@ class UsuarioService:
                 "created_at": usuario.created_at,
             }
 
-    def login_usuario(self, user: str, password: str) -> dict:
-        """
-        Verifica credenciales. Devuelve dict con id, user, created_at si ok.
-        Lanza HTTPException si usuario no existe o contraseña incorrecta.
-        """
-        with db_session:
+    @staticmethod
+    def _credenciales_invalidas() -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Usuario o contraseña incorrectos",
+        )
+
+    def _leer_credenciales(self, user: str) -> Tuple[str, dict]:
+        with sesion_lectura:
             usuario = Usuario.get(user=user)
             if usuario is None:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Usuario o contraseña incorrectos",
-                )
-            if not self._verify_password(password, usuario.password_hash):
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Usuario o contraseña incorrectos",
-                )
-            return {
+                raise self._credenciales_invalidas()
+            return usuario.password_hash, {
                 "id": usuario.id,
                 "user": usuario.user,
                 "created_at": usuario.created_at,
             }
+
+    async def login_usuario(self, user: str, password: str) -> dict:
+        """
+        Verifica credenciales. Devuelve dict con id, user, created_at si ok.
+        Lanza HTTPException si usuario no existe o contraseña incorrecta.
+        """
+        password_hash, data = await en_db(self._leer_credenciales, user)
+        if not await password_hasher.verify_password(password, password_hash):
+            raise self._credenciales_invalidas()
+        if password_hasher.necesita_rehash(password_hash):
+            try:
+                nuevo = await password_hasher.hash_password(password)
+            except HTTPException:
+                # Con el pool saturado el login sigue siendo válido; ya se
+                # rehará en otro inicio de sesión
+                return data
+            await en_db(self._guardar_rehash, data["id"], password_hash, nuevo)
+        return data
+
+    @staticmethod
+    def _guardar_rehash(usuario_id: int, password_hash: str, nuevo: str) -> None:
+        """Guarda el hash rehecho con el coste configurado."""
+        with db_session:
+            usuario = Usuario.get(id=usuario_id)
+            # Si cambió mientras tanto, gana el valor más reciente
+            if usuario is not None and usuario.password_hash == password_hash:
+                usuario.password_hash = nuevo
+                password_hasher.registrar_rehash()
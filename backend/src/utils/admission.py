@@ -0,0 +1,215 @@
+import asyncio
+import time
+from collections import deque
+from datetime import date
+from typing import Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from decouple import config
+
+from src.utils.metrics import registrar_metricas
+from src.utils.responses import respuesta_error
+
+
+# Rango de /dashboard/range a partir del cual se trata como ruta cara
+ADMISSION_RANGE_HEAVY_DAYS = config("ADMISSION_RANGE_HEAVY_DAYS", default=92, cast=int)
+
+# Grupo -> (concurrencia, espera máxima en cola en segundos, tamaño de cola).
+# Cada valor se puede cambiar con ADMISSION_<GRUPO>_CONCURRENCY,
+# ADMISSION_<GRUPO>_MAX_WAIT_SECONDS y ADMISSION_<GRUPO>_MAX_QUEUE.
+_GRUPOS_POR_DEFECTO: Dict[str, Tuple[int, float, int]] = {
+    "heavy": (8, 2.0, 32),
+    "external": (8, 1.0, 32),
+    "export": (4, 0.5, 8),
+    "auth": (16, 2.0, 64),
+    "default": (64, 5.0, 512),
+}
+
+# Prefijos de ruta de cada grupo; el primero que coincide gana. Las rutas
+# exentas (health, métricas, que exigen METRICS_TOKEN y deben responder
+# también con el servidor saturado, y el SSE, que ya limita sus conexiones)
+# no ocupan plaza en ningún grupo.
+_EXENTAS = ("/dashboard/stream",)
+_EXENTAS_EXACTAS = ("/", "/metrics")
+_RUTAS: List[Tuple[str, str]] = [
+    ("/foods/barcode", "external"),
+    ("/foods/all", "heavy"),
+    ("/foods/bulk", "heavy"),
+    ("/foods/changes", "heavy"),
+    ("/analytics", "heavy"),
+    ("/bootstrap", "heavy"),
+    ("/meals/export", "export"),
+    ("/login", "auth"),
+    ("/register", "auth"),
+]
+
+
+class Rechazada(Exception):
+    def __init__(self, status_code: int, message: str):
+        self.status_code = status_code
+        self.message = message
+
+
+class _Grupo:
+    """
+    Semáforo con cola FIFO acotada y plazo de espera. Solo se usa desde el
+    event loop del servidor, así que no necesita locks.
+    """
+
+    def __init__(self, nombre: str, concurrencia: int, max_espera: float, max_cola: int):
+        self.nombre = nombre
+        self.concurrencia = max(1, concurrencia)
+        self.max_espera = max(0.0, max_espera)
+        self.max_cola = max(0, max_cola)
+        self.en_uso = 0
+        self._cola: Deque[asyncio.Future] = deque()
+        self.admitidas = 0
+        self.rechazadas_cola_llena = 0
+        self.rechazadas_plazo = 0
+        self._espera_total = 0.0
+        self._espera_max = 0.0
+        self._esperas = 0
+
+    async def entrar(self) -> None:
+        if self.en_uso < self.concurrencia and not self._cola:
+            self.en_uso += 1
+            self.admitidas += 1
+            return
+        if len(self._cola) >= self.max_cola:
+            self.rechazadas_cola_llena += 1
+            raise Rechazada(429, "Demasiadas peticiones en espera, inténtalo más tarde")
+
+        turno = asyncio.get_running_loop().create_future()
+        self._cola.append(turno)
+        inicio = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(turno), timeout=self.max_espera)
+        except asyncio.TimeoutError:
+            # Si la plaza llegó justo al vencer el plazo, se aprovecha
+            if not turno.done() or turno.cancelled():
+                turno.cancel()
+                self._quitar(turno)
+                self.rechazadas_plazo += 1
+                raise Rechazada(503, "Servicio saturado, inténtalo más tarde")
+        except asyncio.CancelledError:
+            # El cliente se fue mientras esperaba: si ya tenía plaza, se libera
+            if turno.done() and not turno.cancelled():
+                self.salir()
+            else:
+                turno.cancel()
+                self._quitar(turno)
+            raise
+        finally:
+            espera = time.monotonic() - inicio
+            self._espera_total += espera
+            self._espera_max = max(self._espera_max, espera)
+            self._esperas += 1
+        self.admitidas += 1
+
+    def _quitar(self, turno: asyncio.Future) -> None:
+        try:
+            self._cola.remove(turno)
+        except ValueError:
+            pass
+
+    def salir(self) -> None:
+        # La plaza pasa directamente al primero de la cola que siga esperando
+        while self._cola:
+            turno = self._cola.popleft()
+            if not turno.done():
+                turno.set_result(None)
+                return
+        self.en_uso -= 1
+
+    def stats(self) -> dict:
+        return {
+            "concurrency": self.concurrencia,
+            "in_use": self.en_uso,
+            "queued": len(self._cola),
+            "max_queue": self.max_cola,
+            "max_wait_seconds": self.max_espera,
+            "admitted": self.admitidas,
+            "shed_queue_full": self.rechazadas_cola_llena,
+            "shed_timeout": self.rechazadas_plazo,
+            "avg_wait_ms": (self._espera_total / self._esperas * 1000) if self._esperas else 0.0,
+            "max_wait_ms": self._espera_max * 1000,
+        }
+
+
+def _crear_grupos() -> Dict[str, _Grupo]:
+    grupos = {}
+    for nombre, (concurrencia, max_espera, max_cola) in _GRUPOS_POR_DEFECTO.items():
+        prefijo = f"ADMISSION_{nombre.upper()}"
+        grupos[nombre] = _Grupo(
+            nombre,
+            config(f"{prefijo}_CONCURRENCY", default=concurrencia, cast=int),
+            config(f"{prefijo}_MAX_WAIT_SECONDS", default=max_espera, cast=float),
+            config(f"{prefijo}_MAX_QUEUE", default=max_cola, cast=int),
+        )
+    return grupos
+
+
+def _rango_largo(query_string: bytes) -> bool:
+    params = parse_qs(query_string.decode("latin-1"))
+    try:
+        inicio = date.fromisoformat(params["start_date"][0])
+        fin = date.fromisoformat(params["end_date"][0])
+    except (KeyError, ValueError):
+        return False
+    return (fin - inicio).days + 1 > ADMISSION_RANGE_HEAVY_DAYS
+
+
+def grupo_de_ruta(path: str, query_string: bytes = b"") -> Optional[str]:
+    """Grupo de admisión de una petición, None si está exenta."""
+    if path in _EXENTAS_EXACTAS or path.startswith(_EXENTAS):
+        return None
+    for prefijo, grupo in _RUTAS:
+        if path.startswith(prefijo):
+            return grupo
+    if path.startswith("/dashboard/range") and _rango_largo(query_string):
+        return "heavy"
+    return "default"
+
+
+class AdmissionControlMiddleware:
+    """
+    Control de admisión por grupo de rutas: cada grupo tiene un número de
+    peticiones en curso, una cola acotada y un plazo máximo de espera. Lo que
+    no cabe se rechaza enseguida (429 con la cola llena, 503 si vence el
+    plazo) con Retry-After, en lugar de ocupar hilos del threadpool que
+    necesitan las rutas baratas.
+    """
+
+    def __init__(self, app, grupos: Optional[Dict[str, _Grupo]] = None):
+        self.app = app
+        self.grupos = grupos if grupos is not None else grupos_admision
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("method") == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+        nombre = grupo_de_ruta(scope["path"], scope.get("query_string", b""))
+        if nombre is None:
+            await self.app(scope, receive, send)
+            return
+
+        grupo = self.grupos[nombre]
+        try:
+            await grupo.entrar()
+        except Rechazada as e:
+            retry_after = max(1, round(grupo.max_espera)) if e.status_code == 503 else 1
+            respuesta = respuesta_error(
+                e.message, e.status_code, headers={"Retry-After": str(retry_after)}
+            )
+            await respuesta(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            grupo.salir()
+
+
+grupos_admision = _crear_grupos()
+registrar_metricas(
+    "admission", lambda: {nombre: grupo.stats() for nombre, grupo in grupos_admision.items()}
+)
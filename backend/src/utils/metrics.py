@@ -0,0 +1,18 @@
+import threading
+from typing import Any, Callable, Dict
+
+# Registro de proveedores de métricas en memoria. Cada componente (cachés,
+# clientes externos, etc.) registra una función que devuelve su estado.
+_lock = threading.Lock()
+_proveedores: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def registrar_metricas(nombre: str, proveedor: Callable[[], Dict[str, Any]]) -> None:
+    with _lock:
+        _proveedores[nombre] = proveedor
+
+
+def obtener_metricas() -> Dict[str, Any]:
+    with _lock:
+        proveedores = dict(_proveedores)
+    return {nombre: proveedor() for nombre, proveedor in proveedores.items()}
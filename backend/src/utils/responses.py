@@ -1,15 +1,49 @@
-from typing import Any, Dict, Optional
+import zlib
+from typing import Any, Dict, Iterable, Iterator, Optional
 
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 
 
 def respuesta_ok(message: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     return {"message": message, "success": True, "data": data}
 
 
-def respuesta_error(message: str, status_code: int = 400) -> JSONResponse:
+def respuesta_error(
+    message: str,
+    status_code: int = 400,
+    headers: Optional[Dict[str, str]] = None,
+) -> JSONResponse:
     return JSONResponse(
         status_code=status_code,
         content={"message": message, "success": False, "data": None},
+        headers=headers,
     )
 
+
+def etag_para(version: str) -> str:
+    return f'W/"{version}"'
+
+
+def etag_coincide(if_none_match: Optional[str], etag: str, existe: bool = False) -> bool:
+    """
+    Si If-None-Match permite responder 304. "*" solo vale para un recurso que
+    existe, así que antes de cargarlo (existe=False) únicamente cuenta el ETag.
+    """
+    if not if_none_match:
+        return False
+    candidatos = [c.strip() for c in if_none_match.split(",")]
+    return etag in candidatos or (existe and "*" in candidatos)
+
+
+def respuesta_no_modificada(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+def gzip_stream(partes: Iterable[str]) -> Iterator[bytes]:
+    """Comprime sobre la marcha un stream de texto con gzip, parte a parte."""
+    compresor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for parte in partes:
+        comprimido = compresor.compress(parte.encode("utf-8"))
+        if comprimido:
+            yield comprimido
+    yield compresor.flush()
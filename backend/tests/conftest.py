@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import importlib.util
+import pathlib
+import sys
+from typing import Optional
+
+import pytest
+from fastapi.testclient import TestClient
+from pony.orm import db_session
+
+
+BACKEND_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+# main.py genera el mapeo de Pony; solo puede cargarse una vez por proceso
+if "main" not in sys.modules:
+    spec = importlib.util.spec_from_file_location("main", BACKEND_ROOT / "main.py")
+    assert spec is not None and spec.loader is not None
+    main_module = importlib.util.module_from_spec(spec)
+    sys.modules["main"] = main_module
+    spec.loader.exec_module(main_module)
+
+from src.auth import create_access_token
+from src.models import Usuario, Food, Meal
+from src.schemas import MealCreate
+from src.services.meal_service import MealService
+
+
+@pytest.fixture(scope="session")
+def client() -> TestClient:
+    return TestClient(sys.modules["main"].app)
+
+
+@pytest.fixture
+def crear_usuario():
+    """Crea un Usuario sin contraseña utilizable y devuelve su id."""
+
+    def crear(prefijo: str = "test") -> int:
+        with db_session:
+            usuario = Usuario(user=f"{prefijo}_{uuid4().hex[:8]}", password_hash="x")
+        return usuario.id
+
+    return crear
+
+
+@pytest.fixture
+def crear_food():
+    """Crea un Food (1 g de cada macro por defecto) y devuelve su id; created_by es un id."""
+
+    def crear(
+        name: str = "Alimento",
+        calories_per_100g: float = 100,
+        protein_per_100g: float = 1,
+        carbs_per_100g: float = 1,
+        fat_per_100g: float = 1,
+        created_by: Optional[int] = None,
+        **campos,
+    ) -> int:
+        with db_session:
+            food = Food(
+                name=name,
+                calories_per_100g=calories_per_100g,
+                protein_per_100g=protein_per_100g,
+                carbs_per_100g=carbs_per_100g,
+                fat_per_100g=fat_per_100g,
+                created_by=Usuario[created_by] if created_by is not None else None,
+                **campos,
+            )
+        return food.id
+
+    return crear
+
+
+@pytest.fixture
+def auth_headers():
+    """Cabecera Authorization con un token válido para el usuario."""
+
+    def headers(user_id: int) -> dict:
+        return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+    return headers
+
+
+@pytest.fixture
+def usuario_con_comidas_hoy(crear_usuario, crear_food) -> int:
+    """Usuario con tres comidas de 100 g de avena registradas hoy."""
+    user_id = crear_usuario("rango")
+    food_id = crear_food(
+        "Avena", calories_per_100g=389, protein_per_100g=17, carbs_per_100g=66, fat_per_100g=7
+    )
+    for _ in range(3):
+        MealService().crear_meal(MealCreate(food_id=food_id, quantity_grams=100), user_id)
+    return user_id
+
+
+@pytest.fixture
+def agregar_historial():
+    """Añade una comida diaria desde hace un año hacia atrás, sin pasar por el servicio."""
+
+    def agregar(user_id: int, dias: int) -> None:
+        with db_session:
+            usuario = Usuario[user_id]
+            food = Food.select().first()
+            hace_un_anio = datetime.now() - timedelta(days=365)
+            for i in range(dias):
+                Meal(
+                    user=usuario,
+                    food=food,
+                    quantity_grams=50,
+                    calories=100,
+                    protein=5,
+                    carbs=10,
+                    fat=2,
+                    consumed_at=hace_un_anio - timedelta(days=i),
+                )
+
+    return agregar
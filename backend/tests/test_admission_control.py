@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from src.utils.admission import Rechazada, _Grupo, grupo_de_ruta
+
+
+def test_grupo_de_ruta():
+    assert grupo_de_ruta("/") is None
+    assert grupo_de_ruta("/dashboard/stream") is None
+    assert grupo_de_ruta("/foods/all") == "heavy"
+    assert grupo_de_ruta("/foods/barcode/123") == "external"
+    assert grupo_de_ruta("/me") == "default"
+    assert grupo_de_ruta("/dashboard/range", b"start_date=2024-01-01&end_date=2024-01-31") == "default"
+    assert grupo_de_ruta("/dashboard/range", b"start_date=2020-01-01&end_date=2024-12-31") == "heavy"
+
+
+def test_grupo_limita_concurrencia_cola_y_espera():
+    async def escenario():
+        grupo = _Grupo("prueba", concurrencia=1, max_espera=0.05, max_cola=1)
+        await grupo.entrar()
+
+        # Con la plaza ocupada, uno espera en cola y el siguiente se rechaza
+        en_cola = asyncio.ensure_future(grupo.entrar())
+        await asyncio.sleep(0)
+        with pytest.raises(Rechazada) as llena:
+            await grupo.entrar()
+        assert llena.value.status_code == 429
+
+        # El que espera no consigue plaza antes del plazo
+        with pytest.raises(Rechazada) as plazo:
+            await en_cola
+        assert plazo.value.status_code == 503
+
+        # Al liberar, la plaza pasa al siguiente de la cola
+        siguiente = asyncio.ensure_future(grupo.entrar())
+        await asyncio.sleep(0)
+        grupo.salir()
+        await siguiente
+        grupo.salir()
+        return grupo.stats()
+
+    stats = asyncio.run(escenario())
+    assert stats["in_use"] == 0
+    assert stats["queued"] == 0
+    assert stats["admitted"] == 2
+    assert stats["shed_queue_full"] == 1
+    assert stats["shed_timeout"] == 1
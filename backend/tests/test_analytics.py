@@ -0,0 +1,52 @@
+import numpy as np
+
+from src.services.analytics_service import calcular_metricas
+
+
+def _datos(semilla: int, dias: int = 60):
+    rng = np.random.default_rng(semilla)
+    series = rng.uniform(0, 3000, size=(1, dias, 4))
+    registrado = rng.random((1, dias)) > 0.3
+    series[~registrado] = 0.0
+    return series, registrado
+
+
+def test_metricas_coinciden_con_el_calculo_dia_a_dia():
+    series, registrado = _datos(1)
+    metabolismo = np.array([1800.0])
+    objetivos = np.array([[1500.0, np.nan, 1500.0]])
+
+    m = calcular_metricas(series, registrado, metabolismo, objetivos, tolerancia=0.2)
+
+    dias = [d for d in range(series.shape[1]) if registrado[0, d]]
+    calorias = [series[0, d, 0] for d in dias]
+    ultimos_7 = [series[0, d, 0] for d in dias if d >= series.shape[1] - 7]
+    assert np.isclose(m["calories_avg_7d"][0], np.mean(ultimos_7))
+    assert np.isclose(m["calories_variance"][0], np.var(calorias))
+    assert np.isclose(m["balance_slope"][0], np.polyfit(dias, np.array(calorias) - 1800, 1)[0])
+
+    proteina = [abs(series[0, d, 1] - 1500) <= 300 for d in dias]
+    grasa = [abs(series[0, d, 3] - 1500) <= 300 for d in dias]
+    assert np.isclose(m["protein_within_target_pct"][0], 100 * np.mean(proteina))
+    assert np.isnan(m["carbs_within_target_pct"][0])
+    assert np.isclose(
+        m["all_within_target_pct"][0],
+        100 * np.mean([p and g for p, g in zip(proteina, grasa)]),
+    )
+
+
+def test_modo_lote_da_lo_mismo_que_usuario_a_usuario():
+    datos = [_datos(semilla) for semilla in (2, 3, 4)]
+    metabolismo = np.array([1700.0, 2000.0, 2200.0])
+    objetivos = np.array([[120.0, 200.0, 60.0], [np.nan] * 3, [90.0, np.nan, np.nan]])
+
+    lote = calcular_metricas(
+        np.concatenate([s for s, _ in datos]),
+        np.concatenate([r for _, r in datos]),
+        metabolismo,
+        objetivos,
+    )
+    for i, (series, registrado) in enumerate(datos):
+        solo = calcular_metricas(series, registrado, metabolismo[i:i + 1], objetivos[i:i + 1])
+        for clave, valores in solo.items():
+            assert np.allclose(lote[clave][i], valores[0], equal_nan=True), clave
@@ -1,30 +1,11 @@
 from uuid import uuid4
 
-from fastapi.testclient import TestClient
-
-import importlib.util
-import pathlib
-import sys
-
-
-BACKEND_ROOT = pathlib.Path(__file__).resolve().parents[1]
-if str(BACKEND_ROOT) not in sys.path:
-    sys.path.insert(0, str(BACKEND_ROOT))
-
-spec = importlib.util.spec_from_file_location("main", BACKEND_ROOT / "main.py")
-assert spec is not None and spec.loader is not None
-main_module = importlib.util.module_from_spec(spec)
-sys.modules["main"] = main_module
-spec.loader.exec_module(main_module)
-
-client = TestClient(main_module.app)
-
 
 def _unique_username() -> str:
     return f"testuser_{uuid4().hex[:8]}"
 
 
-def test_register_login_and_me_flow():
+def test_register_login_and_me_flow(client):
     username = _unique_username()
     password = "testpassword123"
 
@@ -59,3 +40,74 @@ def test_register_login_and_me_flow():
     assert me_data["success"] is True
     assert me_data["data"]["user"] == username
 
+
+def test_identidad_cacheada_e_invalidada(client):
+    from pony.orm import db_session
+
+    from src.models import Usuario
+    from src.services.auth_cache import auth_cache
+
+    username = _unique_username()
+    client.post("/register", json={"user": username, "password": "testpassword123"})
+    login = client.post("/login", json={"user": username, "password": "testpassword123"})
+    user_id = login.json()["data"]["usuario"]["id"]
+    headers = {"Authorization": f"Bearer {login.json()['data']['access_token']}"}
+
+    antes = auth_cache.stats()
+    assert client.get("/me", headers=headers).json()["data"]["user"] == username
+    client.get("/me", headers=headers)
+    despues = auth_cache.stats()
+    # La primera petición va a la BD y la segunda no
+    assert despues["misses"] - antes["misses"] == 1
+    assert despues["hits"] - antes["hits"] == 1
+
+    # Borrado del usuario: el token cacheado deja de valer
+    with db_session:
+        Usuario[user_id].delete()
+    auth_cache.invalidar_usuario(user_id)
+    assert client.get("/me", headers=headers).status_code == 401
+
+
+def test_invalidaciones_recordadas_acotadas(monkeypatch):
+    import time
+
+    from src.services.auth_cache import AuthIdentityCache
+
+    cache = AuthIdentityCache(max_entries=2, ttl_seconds=60)
+    marca = cache.marca()
+    for user_id in (1, 2, 3):
+        cache.invalidar_usuario(user_id)
+    assert len(cache._invalidado_en) == 2
+
+    # La invalidación de 1 ya se olvidó, pero lo leído antes sigue sin guardarse
+    cache.put("t1", {"id": 1}, marca)
+    assert cache.get("t1") is None
+
+    # Pasado el TTL se olvidan todas
+    monotonic = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: monotonic + 61)
+    cache.put("t1", {"id": 1}, cache.marca())
+    assert cache._invalidado_en == {}
+    assert cache.get("t1") == {"id": 1}
+
+
+def test_login_rehace_hash_con_otro_coste(client):
+    import bcrypt
+    from pony.orm import db_session
+
+    from src.models import Usuario
+    from src.services.password_hasher import BCRYPT_ROUNDS, coste_de_hash
+
+    username = _unique_username()
+    with db_session:
+        usuario = Usuario(
+            user=username,
+            password_hash=bcrypt.hashpw(b"testpassword123", bcrypt.gensalt(4)).decode("utf-8"),
+        )
+
+    login = client.post("/login", json={"user": username, "password": "testpassword123"})
+    assert login.json()["success"] is True
+    with db_session:
+        nuevo = Usuario[usuario.id].password_hash
+    assert coste_de_hash(nuevo) == BCRYPT_ROUNDS
+    assert bcrypt.checkpw(b"testpassword123", nuevo.encode("utf-8"))
@@ -0,0 +1,54 @@
+from uuid import uuid4
+
+import pytest
+
+
+@pytest.fixture
+def headers(client) -> dict:
+    user = f"boot_{uuid4().hex[:8]}"
+    client.post("/register", json={"user": user, "password": "testpassword123"})
+    login = client.post("/login", json={"user": user, "password": "testpassword123"})
+    return {"Authorization": f"Bearer {login.json()['data']['access_token']}"}
+
+
+def test_bootstrap_devuelve_todas_las_secciones(client, headers):
+    food = client.post(
+        "/foods/create",
+        json={
+            "name": "Lentejas",
+            "calories_per_100g": 116,
+            "protein_per_100g": 9,
+            "carbs_per_100g": 20,
+            "fat_per_100g": 0.4,
+        },
+        headers=headers,
+    ).json()["data"]
+    client.post("/meals/create", json={"food_id": food["id"], "quantity_grams": 100}, headers=headers)
+
+    resp = client.get("/bootstrap", headers=headers)
+    assert resp.status_code == 200
+    data = resp.json()["data"]
+
+    assert set(data) == {"user", "settings", "dashboard", "meals", "foods"}
+    assert data["user"]["id"] == food["created_by_id"]
+    assert data["settings"] is None
+    assert data["dashboard"]["metabolism_base"] == 1770
+    assert data["dashboard"]["total_calories"] == 116
+    assert [m["food_id"] for m in data["meals"]] == [food["id"]]
+    assert data["foods"]["etag"]
+    assert "items" in data["foods"] and "next_cursor" in data["foods"]
+
+
+def test_bootstrap_con_secciones_y_campos_seleccionados(client, headers):
+    resp = client.get(
+        "/bootstrap",
+        params={"fields": "meals,foods", "food_fields": "name", "food_limit": 1},
+        headers=headers,
+    )
+    data = resp.json()["data"]
+    assert set(data) == {"meals", "foods"}
+    assert len(data["foods"]["items"]) <= 1
+    assert all(set(f) == {"id", "name"} for f in data["foods"]["items"])
+
+    resp = client.get("/bootstrap", params={"fields": "meals,passwords"}, headers=headers)
+    assert resp.status_code == 400
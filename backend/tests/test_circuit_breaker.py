@@ -0,0 +1,76 @@
+import pytest
+
+from src.services.circuit_breaker import CircuitBreaker, CircuitoAbierto
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _breaker(clock: FakeClock) -> CircuitBreaker:
+    return CircuitBreaker(
+        failure_threshold=3,
+        slow_call_seconds=1.0,
+        reset_seconds=10.0,
+        clock=clock,
+    )
+
+
+def test_se_abre_tras_fallos_consecutivos():
+    breaker = _breaker(FakeClock())
+
+    for _ in range(3):
+        breaker.permitir()
+        breaker.registrar_fallo()
+
+    assert breaker.estado == "open"
+    with pytest.raises(CircuitoAbierto):
+        breaker.permitir()
+    assert breaker.stats()["trips"] == 1
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_llamadas_lentas_cuentan_como_fallo():
+    breaker = _breaker(FakeClock())
+
+    for _ in range(3):
+        breaker.permitir()
+        breaker.registrar_exito(duracion=2.5)
+
+    assert breaker.estado == "open"
+    assert breaker.stats()["slow_calls"] == 3
+
+
+def test_semiabierto_permite_una_sola_prueba():
+    clock = FakeClock()
+    breaker = _breaker(clock)
+    for _ in range(3):
+        breaker.registrar_fallo()
+
+    clock.now = 10.0
+    assert breaker.estado == "half_open"
+    breaker.permitir()
+    with pytest.raises(CircuitoAbierto):
+        breaker.permitir()
+
+    breaker.registrar_exito(duracion=0.1)
+    assert breaker.estado == "closed"
+
+
+def test_prueba_fallida_vuelve_a_abrir():
+    clock = FakeClock()
+    breaker = _breaker(clock)
+    for _ in range(3):
+        breaker.registrar_fallo()
+
+    clock.now = 10.0
+    breaker.permitir()
+    breaker.registrar_fallo()
+
+    assert breaker.estado == "open"
+    assert breaker.stats()["trips"] == 2
+    assert breaker.retry_after() == 10
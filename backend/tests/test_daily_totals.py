@@ -0,0 +1,140 @@
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+from pony.orm import db_session
+import pytest
+
+from src.models import Usuario, DailyTotals
+from src.schemas import MealCreate, MealBatchItem
+from src.services.daily_totals_service import daily_totals_service
+from src.services.dashboard_service import DashboardService
+from src.services.food_service import FoodService
+from src.services import meal_service
+from src.services.dashboard_events import dashboard_events
+from src.services.meal_service import MealService
+
+
+@pytest.fixture
+def usuario_y_food(crear_usuario, crear_food):
+    def crear() -> tuple:
+        food_id = crear_food(
+            "Arroz", calories_per_100g=130, protein_per_100g=2.7, carbs_per_100g=28, fat_per_100g=0.3
+        )
+        return crear_usuario("totales"), food_id
+
+    return crear
+
+
+def test_crear_y_eliminar_meal_actualizan_totales(usuario_y_food):
+    user_id, food_id = usuario_y_food()
+    meals = MealService()
+    hoy = datetime.now().date()
+
+    primera = meals.crear_meal(MealCreate(food_id=food_id, quantity_grams=200), user_id)
+    meals.crear_meal(MealCreate(food_id=food_id, quantity_grams=100), user_id)
+
+    with db_session:
+        totales = DailyTotals.get(user=Usuario[user_id], day=hoy)
+        assert totales.meal_count == 2
+        assert abs(totales.calories - 390) < 1e-9
+
+    meals.eliminar_meal(primera["id"], user_id)
+
+    dia = DashboardService().obtener_dashboard_del_dia(user_id, hoy)
+    assert abs(dia["total_calories"] - 130) < 1e-9
+    assert daily_totals_service.recalcular_usuario(user_id) == {
+        "days": 1,
+        "missing": 0,
+        "stale": 0,
+        "orphan": 0,
+    }
+
+
+def test_recalcular_detecta_y_repara_diferencias(usuario_y_food):
+    user_id, food_id = usuario_y_food()
+    MealService().crear_meal(MealCreate(food_id=food_id, quantity_grams=100), user_id)
+
+    with db_session:
+        DailyTotals.select(lambda t: t.user.id == user_id).first().calories = 1
+
+    assert daily_totals_service.recalcular_usuario(user_id)["stale"] == 1
+    assert daily_totals_service.recalcular_usuario(user_id, reparar=True)["stale"] == 1
+    assert daily_totals_service.recalcular_usuario(user_id)["stale"] == 0
+
+
+@pytest.mark.parametrize("insert_multi", [True, False])
+def test_lote_de_comidas_en_una_transaccion(insert_multi, monkeypatch, usuario_y_food):
+    monkeypatch.setattr(meal_service, "admite_insert_multi", lambda: insert_multi)
+    eventos = []
+    monkeypatch.setattr(dashboard_events, "publicar", lambda uid, evento: eventos.append(evento))
+    user_id, food_id = usuario_y_food()
+    meals = MealService()
+    ayer = datetime.now() - timedelta(days=1)
+
+    creados = meals.crear_meals_lote(
+        [
+            MealBatchItem(food_id=food_id, quantity_grams=100),
+            MealBatchItem(food_id=food_id, quantity_grams=200),
+            MealBatchItem(food_id=food_id, quantity_grams=50, consumed_at=ayer),
+        ],
+        user_id,
+    )
+
+    assert [m["quantity_grams"] for m in creados] == [100, 200, 50]
+    assert len({m["id"] for m in creados}) == 3
+    with db_session:
+        totales = DailyTotals.get(user=Usuario[user_id], day=datetime.now().date())
+        assert totales.meal_count == 2
+        assert abs(totales.calories - 390) < 1e-9
+    assert daily_totals_service.recalcular_usuario(user_id)["days"] == 2
+    assert daily_totals_service.recalcular_usuario(user_id)["stale"] == 0
+
+    # Un evento por día, con la misma forma que el de una sola comida
+    meals.crear_meal(MealCreate(food_id=food_id, quantity_grams=100), user_id)
+    assert [sorted(e["meal_ids"]) for e in eventos] == [
+        sorted(m["id"] for m in creados[:2]),
+        [creados[2]["id"]],
+        [eventos[-1]["meal_ids"][0]],
+    ]
+    assert len({frozenset(e) for e in eventos}) == 1
+
+    # Si falta un alimento no se guarda ninguna comida del lote
+    with pytest.raises(HTTPException) as error:
+        meals.crear_meals_lote(
+            [
+                MealBatchItem(food_id=food_id, quantity_grams=100),
+                MealBatchItem(food_id=-1, quantity_grams=100),
+            ],
+            user_id,
+        )
+    assert error.value.status_code == 404
+    with db_session:
+        assert Usuario[user_id].meals.count() == 4
+
+
+def test_eliminar_food_descuenta_sus_comidas_de_los_totales(usuario_y_food):
+    user_id, food_id = usuario_y_food()
+    otro_id, otro_food_id = usuario_y_food()
+    meals = MealService()
+    ayer = datetime.now() - timedelta(days=1)
+
+    meals.crear_meals_lote(
+        [
+            MealBatchItem(food_id=food_id, quantity_grams=100),
+            MealBatchItem(food_id=food_id, quantity_grams=50, consumed_at=ayer),
+            MealBatchItem(food_id=otro_food_id, quantity_grams=100),
+        ],
+        user_id,
+    )
+    meals.crear_meal(MealCreate(food_id=food_id, quantity_grams=200), otro_id)
+
+    FoodService().eliminar_food(food_id, user_id)
+
+    sin_diferencias = {"missing": 0, "stale": 0, "orphan": 0}
+    for uid in (user_id, otro_id):
+        stats = daily_totals_service.recalcular_usuario(uid)
+        assert {k: stats[k] for k in sin_diferencias} == sin_diferencias
+    with db_session:
+        totales = DailyTotals.get(user=Usuario[user_id], day=datetime.now().date())
+        assert totales.meal_count == 1
+        assert abs(totales.calories - 130) < 1e-9
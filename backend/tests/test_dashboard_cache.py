@@ -0,0 +1,89 @@
+from datetime import date, datetime
+
+import pytest
+
+from src.services.dashboard_cache import InMemoryDashboardCache, SqliteDashboardCache
+
+
+HOY = date(2024, 5, 10)
+AYER = date(2024, 5, 9)
+
+
+def _dia(fecha: date, calorias: float) -> dict:
+    return {
+        "date": datetime.combine(fecha, datetime.min.time()),
+        "total_calories": calorias,
+        "macro_percentages": {"protein_percent": 0.0},
+    }
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def crear_cache(request, tmp_path):
+    if request.param == "memory":
+        cache = InMemoryDashboardCache(max_entries=100, ttl_seconds=60)
+        return lambda: cache
+    path = str(tmp_path / "dashboard.sqlite3")
+    # Cada llamada simula otro worker sobre el mismo archivo
+    return lambda: SqliteDashboardCache(path, max_entries=100, ttl_seconds=60)
+
+
+def test_invalidar_un_dia_conserva_los_demas(crear_cache):
+    cache = crear_cache()
+    cache.put(1, HOY, _dia(HOY, 100), cache.marca(1))
+    cache.put(1, AYER, _dia(AYER, 200), cache.marca(1))
+    cache.put(2, HOY, _dia(HOY, 300), cache.marca(2))
+
+    crear_cache().invalidar(1, HOY)
+
+    assert cache.get(1, HOY) is None
+    assert cache.get(1, AYER) == _dia(AYER, 200)
+    assert cache.get(2, HOY) == _dia(HOY, 300)
+
+    cache.invalidar(1)
+    assert cache.get(1, AYER) is None
+    assert cache.get(2, HOY) is not None
+
+
+def test_no_guarda_calculos_anteriores_a_una_invalidacion(crear_cache):
+    cache = crear_cache()
+    marca = cache.marca(1)
+    crear_cache().invalidar(1, HOY)
+
+    cache.put(1, HOY, _dia(HOY, 100), marca)
+    assert cache.get(1, HOY) is None
+
+    cache.put(1, HOY, _dia(HOY, 150), cache.marca(1))
+    assert cache.get(1, HOY)["total_calories"] == 150
+
+
+def test_invalidaciones_recordadas_acotadas():
+    cache = InMemoryDashboardCache(max_entries=2, ttl_seconds=60)
+    marca = cache.marca(1)
+    for user_id in (1, 2, 3):
+        cache.invalidar(user_id)
+
+    assert len(cache._invalidado_en) == 2
+    # La invalidación de 1 ya se olvidó, pero su marca sigue siendo anterior
+    cache.put(1, HOY, _dia(HOY, 100), marca)
+    assert cache.get(1, HOY) is None
+
+    cache.put(1, HOY, _dia(HOY, 100), cache.marca(1))
+    assert cache.get(1, HOY)["total_calories"] == 100
+
+
+def test_metricas_se_leen_fuera_del_event_loop(monkeypatch, tmp_path):
+    import asyncio
+
+    from src.controllers.health_controller import metrics
+    from src.utils import metrics as registro
+
+    cache = SqliteDashboardCache(str(tmp_path / "metricas.sqlite3"), max_entries=10, ttl_seconds=60)
+
+    def stats():
+        # La consulta a SQLite no debe correr en el hilo del event loop
+        with pytest.raises(RuntimeError):
+            asyncio.get_running_loop()
+        return cache.stats()
+
+    monkeypatch.setitem(registro._proveedores, "dashboard_cache", stats)
+    assert asyncio.run(metrics())["dashboard_cache"]["entries"] == 0
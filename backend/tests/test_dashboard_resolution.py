@@ -0,0 +1,66 @@
+from datetime import date, datetime
+
+import pytest
+from fastapi import HTTPException
+from pony.orm import db_session, flush
+
+from src.models import Usuario, Food, Meal
+from src.services.daily_totals_service import daily_totals_service
+from src.services.dashboard_service import DashboardService, DASHBOARD_RANGE_MAX_POINTS
+
+
+@pytest.fixture
+def usuario_con_comidas(crear_usuario, crear_food):
+    def crear(fechas) -> int:
+        user_id = crear_usuario("resolucion")
+        food_id = crear_food(
+            "Pan", calories_per_100g=250, protein_per_100g=9, carbs_per_100g=49, fat_per_100g=3
+        )
+        with db_session:
+            for fecha in fechas:
+                meal = Meal(
+                    user=Usuario[user_id],
+                    food=Food[food_id],
+                    quantity_grams=100,
+                    calories=250,
+                    protein=9,
+                    carbs=49,
+                    fat=3,
+                    consumed_at=datetime.combine(fecha, datetime.min.time()),
+                )
+                flush()
+                daily_totals_service.acumular_meal(meal)
+        return user_id
+
+    return crear
+
+
+def test_resolucion_mensual_agrupa_y_recorta_los_extremos(usuario_con_comidas):
+    user_id = usuario_con_comidas([date(2024, 1, 20), date(2024, 1, 31), date(2024, 3, 2)])
+
+    items = DashboardService().obtener_dashboard_rango(
+        user_id, date(2024, 1, 15), date(2024, 3, 10), "month"
+    )
+
+    assert [i["date"].date() for i in items] == [
+        date(2024, 1, 15),
+        date(2024, 2, 1),
+        date(2024, 3, 1),
+    ]
+    assert [i["days"] for i in items] == [17, 29, 10]
+    assert [i["total_calories"] for i in items] == [500, 0, 250]
+    assert items[0]["balance"] == 500 - 17 * items[0]["metabolism_base"]
+
+
+def test_rango_con_demasiados_puntos_se_rechaza(usuario_con_comidas):
+    user_id = usuario_con_comidas([])
+    service = DashboardService()
+
+    with pytest.raises(HTTPException) as e:
+        service.obtener_dashboard_rango(user_id, date(2000, 1, 1), date(2024, 12, 31), "day")
+    assert e.value.status_code == 400
+
+    semanas = service.obtener_dashboard_rango(user_id, date(2022, 1, 1), date(2024, 12, 31), "week")
+    assert len(semanas) <= DASHBOARD_RANGE_MAX_POINTS
+    assert semanas[0]["date"].date() == date(2022, 1, 1)
+    assert semanas[1]["date"].weekday() == 0
@@ -0,0 +1,61 @@
+import asyncio
+import json
+
+from src.services.dashboard_events import DashboardEventBus, RESYNC
+
+from src.controllers.dashboard_controller import _eventos_dashboard
+from src.schemas import MealCreate
+from src.services.dashboard_events import dashboard_events
+from src.services.meal_service import MealService
+
+
+def _evento(chunk: str) -> tuple:
+    tipo, data = chunk.strip().split("\n")
+    return tipo[len("event: "):], json.loads(data[len("data: "):])
+
+
+def test_stream_envia_snapshot_y_deltas(crear_usuario, crear_food):
+    user_id = crear_usuario("stream")
+    food_id = crear_food(
+        "Manzana", calories_per_100g=52, protein_per_100g=0.3, carbs_per_100g=14, fat_per_100g=0.2
+    )
+
+    async def escenario():
+        conexion = dashboard_events.suscribir(user_id)
+        eventos = _eventos_dashboard(conexion, user_id)
+        try:
+            tipo, snapshot = _evento(await eventos.__anext__())
+            assert tipo == "snapshot"
+            assert snapshot["total_calories"] == 0
+
+            await asyncio.to_thread(
+                MealService().crear_meal, MealCreate(food_id=food_id, quantity_grams=200), user_id
+            )
+            tipo, delta = _evento(await asyncio.wait_for(eventos.__anext__(), 5))
+            assert tipo == "delta"
+            assert delta["op"] == "add"
+            assert delta["calories"] == 104
+        finally:
+            await eventos.aclose()
+        assert dashboard_events.stats()["connections"] == 0
+
+    asyncio.run(escenario())
+
+
+def test_cola_llena_se_sustituye_por_resync():
+    async def escenario():
+        bus = DashboardEventBus(max_queue=2, max_connections=10)
+        conexion = bus.suscribir(1)
+        for i in range(5):
+            bus.publicar(1, {"type": "delta", "n": i})
+        bus.publicar(2, {"type": "delta"})
+        await asyncio.sleep(0)
+
+        assert conexion.queue.qsize() <= 2
+        eventos = [conexion.queue.get_nowait() for _ in range(conexion.queue.qsize())]
+        assert RESYNC in eventos
+
+        bus.desuscribir(conexion)
+        assert bus.stats()["connections"] == 0
+
+    asyncio.run(escenario())
@@ -0,0 +1,61 @@
+import pytest
+
+from src.db import db
+from src.db_pool import ConnectionPool, PoolAgotado
+
+
+def _pool(**kwargs) -> ConnectionPool:
+    opciones = dict(
+        min_size=0,
+        max_size=1,
+        max_lifetime=3600,
+        acquire_timeout=0.05,
+        pre_ping=True,
+        ping_after=0,
+    )
+    opciones.update(kwargs)
+    # Misma función de conexión que el pool de la aplicación
+    return ConnectionPool(db.provider.pool._conectar, **opciones)
+
+
+def test_pool_acotado_reutiliza_y_agota():
+    pool = _pool()
+    con, nueva = pool.connect()
+    assert nueva
+    with pytest.raises(PoolAgotado):
+        pool.connect()
+    pool.release(con)
+
+    otra, nueva = pool.connect()
+    assert otra is con and not nueva
+    pool.release(otra)
+    stats = pool.stats()
+    assert stats["size"] == 1 and stats["idle"] == 1 and stats["in_use"] == 0
+    assert stats["timeouts"] == 1
+    pool.disconnect()
+
+
+def test_pool_descarta_conexiones_caidas_y_caducadas():
+    pool = _pool()
+    con, _ = pool.connect()
+    pid = con.get_backend_pid()
+    pool.release(con)
+
+    # Simula un reinicio del servidor cerrando la conexión libre desde fuera
+    admin = db.provider.pool._conectar()
+    admin.autocommit = True
+    admin.cursor().execute("SELECT pg_terminate_backend(%s)", (pid,))
+    admin.close()
+
+    nueva, es_nueva = pool.connect()
+    assert es_nueva and nueva.get_backend_pid() != pid
+    nueva.cursor().execute("SELECT 1")
+    pool.release(nueva)
+    assert pool.stats()["validation_failures"] == 1
+    pool.disconnect()
+
+    caducado = _pool(max_lifetime=0)
+    con, _ = caducado.connect()
+    caducado.release(con)
+    assert caducado.stats()["expired"] == 1
+    assert caducado.stats()["size"] == 0
@@ -0,0 +1,55 @@
+from src.services.food_autocomplete import FoodAutocomplete
+
+
+FOODS = [
+    (1, "Yogur natural"),
+    (2, "Yogur griego"),
+    (3, "Batido de yogur"),
+    (4, "Leche entera"),
+    (5, "Café con leche"),
+]
+
+
+def _autocomplete() -> FoodAutocomplete:
+    return FoodAutocomplete(lambda: list(FOODS))
+
+
+def _ids(sugerencias):
+    return [s["id"] for s in sugerencias]
+
+
+def test_prefijo_del_nombre_antes_que_prefijo_de_palabra():
+    sugerencias = _autocomplete().sugerir("yog", limit=10)
+
+    assert _ids(sugerencias) == [2, 1, 3]
+    assert [s["match"] for s in sugerencias] == ["prefix", "prefix", "word"]
+    assert sugerencias[0]["name"] == "Yogur griego"
+
+
+def test_prefijo_de_una_letra_respeta_el_limite():
+    assert _ids(_autocomplete().sugerir("l", limit=1)) == [4]
+
+
+def test_varias_palabras():
+    assert _ids(_autocomplete().sugerir("cafe le", limit=10)) == [5]
+    assert _ids(_autocomplete().sugerir("con le", limit=10)) == [5]
+
+
+def test_tolera_un_error_de_tecleo():
+    sugerencias = _autocomplete().sugerir("yoghur", limit=10)
+
+    assert set(_ids(sugerencias)) == {1, 2, 3}
+    assert {s["match"] for s in sugerencias} == {"fuzzy"}
+    assert _ids(_autocomplete().sugerir("lehce", limit=10)) == [5, 4]
+
+
+def test_actualizacion_incremental():
+    autocomplete = _autocomplete()
+    autocomplete.sugerir("x", limit=1)
+
+    autocomplete.indexar(6, "Yogur de fresa")
+    autocomplete.indexar(1, "Kéfir natural")
+    autocomplete.eliminar(2)
+
+    assert _ids(autocomplete.sugerir("yogur", limit=10)) == [6, 3]
+    assert _ids(autocomplete.sugerir("kefir", limit=10)) == [1]
@@ -0,0 +1,138 @@
+from uuid import uuid4
+
+import pytest
+from pony.orm import db_session
+
+from src.models import Food
+from src.services import food_service
+from src.services.food_service import BARCODE_BATCH_MAX_ITEMS
+from src.services.openfoodfacts_client import OpenFoodFactsClient
+from test_openfoodfacts_client import _StubHandler, stub_server  # noqa: F401
+
+
+@pytest.fixture
+def headers(crear_usuario, auth_headers) -> dict:
+    return auth_headers(crear_usuario("lote"))
+
+
+@pytest.fixture
+def food_local(crear_food):
+    def crear() -> str:
+        barcode = str(uuid4().int)[:13]
+        crear_food(
+            "Garbanzos",
+            calories_per_100g=364,
+            protein_per_100g=19,
+            carbs_per_100g=61,
+            fat_per_100g=6,
+            barcode=barcode,
+        )
+        return barcode
+
+    return crear
+
+
+def test_lote_informa_el_estado_de_cada_barcode(
+    client, headers, food_local, stub_server, monkeypatch
+):
+    # Cliente propio contra el servidor de prueba: sin caché negativa ni
+    # circuito compartidos con otros tests
+    monkeypatch.setattr(
+        food_service, "openfoodfacts_client", OpenFoodFactsClient(base_url=stub_server, timeout=2)
+    )
+    with db_session:
+        Food.select(lambda f: f.barcode == "12345678").delete(bulk=True)
+    local = food_local()
+
+    respuesta = client.post(
+        "/foods/barcode/batch",
+        json={
+            "barcodes": [
+                local,
+                "12345678",
+                "11111111",
+                "87654321",
+                "99999999",
+                "abc",
+                "12345678",
+                f" {local} ",
+            ]
+        },
+        headers=headers,
+    )
+
+    assert respuesta.status_code == 200
+    items = respuesta.json()["data"]["items"]
+    assert {barcode: item["status"] for barcode, item in items.items()} == {
+        local: "found",
+        "12345678": "created",
+        "11111111": "not_found",
+        "87654321": "incomplete",
+        "99999999": "error",
+        "abc": "invalid",
+    }
+    assert items[local]["food"]["name"] == "Garbanzos"
+    assert items["12345678"]["food"]["name"] == "Yogur natural"
+    assert items["99999999"]["error"]
+    # Los repetidos en la petición se buscan una sola vez
+    assert _StubHandler.calls["12345678"] == 1
+    assert local not in _StubHandler.calls
+    with db_session:
+        assert Food.get(barcode="12345678") is not None
+
+    # Una segunda petición ya lo encuentra en la BD sin salir fuera
+    segunda = client.post(
+        "/foods/barcode/batch", json={"barcodes": ["12345678"]}, headers=headers
+    )
+    assert segunda.json()["data"]["items"]["12345678"]["status"] == "found"
+    assert _StubHandler.calls["12345678"] == 1
+
+
+def test_lote_con_demasiados_barcodes(client, headers):
+    barcodes = [str(10000000 + i) for i in range(BARCODE_BATCH_MAX_ITEMS + 1)]
+
+    respuesta = client.post("/foods/barcode/batch", json={"barcodes": barcodes}, headers=headers)
+
+    assert respuesta.status_code == 400
+    assert respuesta.json()["success"] is False
+
+
+def test_fallo_inesperado_solo_afecta_a_su_barcode(client, headers, stub_server, monkeypatch):
+    cliente = OpenFoodFactsClient(base_url=stub_server, timeout=2)
+    buscar_producto = cliente.buscar_producto
+
+    async def buscar_o_fallar(barcode: str) -> dict:
+        if barcode == "22222222":
+            raise ValueError("respuesta ilegible")
+        return await buscar_producto(barcode)
+
+    monkeypatch.setattr(cliente, "buscar_producto", buscar_o_fallar)
+    monkeypatch.setattr(food_service, "openfoodfacts_client", cliente)
+
+    respuesta = client.post(
+        "/foods/barcode/batch", json={"barcodes": ["22222222", "11111111"]}, headers=headers
+    )
+
+    assert respuesta.status_code == 200
+    items = respuesta.json()["data"]["items"]
+    assert items["22222222"]["status"] == "error"
+    assert items["22222222"]["error"]
+    assert items["11111111"]["status"] == "not_found"
+
+
+def test_lote_con_el_circuito_abierto(client, headers, food_local, stub_server, monkeypatch):
+    cliente = OpenFoodFactsClient(base_url=stub_server, timeout=2)
+    for _ in range(cliente.breaker.failure_threshold):
+        cliente.breaker.registrar_fallo()
+    monkeypatch.setattr(food_service, "openfoodfacts_client", cliente)
+    local = food_local()
+
+    solo_locales = client.post("/foods/barcode/batch", json={"barcodes": [local]}, headers=headers)
+    assert solo_locales.json()["data"]["items"][local]["status"] == "found"
+
+    respuesta = client.post(
+        "/foods/barcode/batch", json={"barcodes": [local, "11111111"]}, headers=headers
+    )
+    assert respuesta.status_code == 503
+    assert int(respuesta.headers["Retry-After"]) >= 1
+    assert "11111111" not in _StubHandler.calls
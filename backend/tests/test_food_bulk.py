@@ -0,0 +1,85 @@
+from uuid import uuid4
+
+from fastapi import HTTPException
+from pony.orm import db_session
+import pytest
+
+from src.models import Food
+from src.services import food_service
+from src.services.food_service import BULK_MAX_ITEMS, FoodService
+
+
+def _barcode() -> str:
+    return str(uuid4().int)[:13]
+
+
+def _item(nombre: str, barcode=None, calorias=100) -> dict:
+    return {
+        "name": nombre,
+        "calories_per_100g": calorias,
+        "protein_per_100g": 1,
+        "carbs_per_100g": 2,
+        "fat_per_100g": 3,
+        "barcode": barcode,
+    }
+
+
+@pytest.fixture
+def lote_mixto(crear_food):
+    def crear() -> tuple:
+        registrado = _barcode()
+        crear_food("Ya existe", calories_per_100g=1, barcode=registrado)
+        nuevo = _barcode()
+        items = [
+            _item("Pan", nuevo),
+            _item("   "),
+            _item("Negativo", calorias=-5),
+            {"name": "Faltan campos"},
+            _item("Pan repetido", nuevo),
+            _item("Ya registrado", registrado),
+            _item("Sin barcode"),
+            _item("Otro sin barcode"),
+        ]
+        return items, nuevo
+
+    return crear
+
+
+def _comprobar_resultados(resultado: dict, user_id: int, nuevo: str) -> None:
+    estados = [r["status"] for r in resultado["items"]]
+    assert estados == [
+        "created", "invalid", "invalid", "invalid",
+        "duplicate", "duplicate", "created", "created",
+    ]
+    assert [r["index"] for r in resultado["items"]] == list(range(8))
+    assert resultado["summary"] == {"created": 3, "duplicate": 2, "invalid": 3}
+
+    creados = [r["food"] for r in resultado["items"] if r["status"] == "created"]
+    assert [f["name"] for f in creados] == ["Pan", "Sin barcode", "Otro sin barcode"]
+    assert creados[0]["barcode"] == nuevo
+    with db_session:
+        for food in creados:
+            guardado = Food[food["id"]]
+            assert guardado.name == food["name"]
+            assert guardado.created_by.id == user_id
+
+
+def test_lote_con_items_validos_invalidos_y_duplicados(crear_usuario, lote_mixto):
+    user_id = crear_usuario("bulk")
+    items, nuevo = lote_mixto()
+
+    _comprobar_resultados(FoodService().crear_foods_bulk(items, user_id), user_id, nuevo)
+
+
+def test_lote_sin_postgresql_inserta_fila_a_fila(monkeypatch, crear_usuario, lote_mixto):
+    monkeypatch.setattr(food_service, "admite_insert_multi", lambda: False)
+    user_id = crear_usuario("bulk")
+    items, nuevo = lote_mixto()
+
+    _comprobar_resultados(FoodService().crear_foods_bulk(items, user_id), user_id, nuevo)
+
+
+def test_lote_demasiado_grande(crear_usuario):
+    with pytest.raises(HTTPException) as exc:
+        FoodService().crear_foods_bulk([_item("x")] * (BULK_MAX_ITEMS + 1), crear_usuario("bulk"))
+    assert exc.value.status_code == 400
@@ -0,0 +1,126 @@
+from datetime import datetime
+
+import pytest
+from pony.orm import db_session
+
+from src.models import Food
+from src.services import food_service
+from src.services.food_cache import FoodCatalogCache
+from src.utils.responses import etag_coincide
+
+
+@pytest.fixture
+def usuario_y_food(crear_usuario, crear_food, auth_headers):
+    def crear() -> tuple:
+        user_id = crear_usuario("etag")
+        food_id = crear_food(
+            "Lentejas",
+            calories_per_100g=116,
+            protein_per_100g=9,
+            carbs_per_100g=20,
+            fat_per_100g=0.4,
+            created_by=user_id,
+        )
+        return auth_headers(user_id), food_id
+
+    return crear
+
+
+def test_cache_lru_y_lecturas_obsoletas():
+    cache = FoodCatalogCache(max_entries=2, ttl_seconds=60)
+    cache.put({"id": 1, "barcode": "11111111"})
+    cache.put({"id": 2, "barcode": None})
+
+    assert cache.get_por_barcode("11111111") == {"id": 1, "barcode": "11111111"}
+    cache.put({"id": 3, "barcode": None})
+    # Se descarta el menos usado recientemente (el 2)
+    assert cache.get(2) is None
+    assert cache.get(1) is not None
+
+    assert cache.reservar_sincronizacion(60)
+    cache.sincronizar(("a", 1))
+    marca = cache.marca()
+    cache.invalidar(1)
+    # Tras una escritura local la siguiente versión vuelve a leer la huella
+    assert cache.reservar_sincronizacion(60)
+    cache.liberar_sincronizacion()
+    assert cache.get_por_barcode("11111111") is None
+    # Lo leído de la BD antes de la escritura no se guarda
+    cache.put({"id": 1, "barcode": "11111111"}, marca)
+    assert cache.get(1) is None
+
+
+def test_huella_distinta_descarta_la_cache():
+    cache = FoodCatalogCache(max_entries=10, ttl_seconds=60)
+    assert cache.reservar_sincronizacion(60)
+    cache.sincronizar(("a", 1))
+    cache.put({"id": 1, "barcode": None})
+    version = cache.version
+
+    # Dentro del intervalo no toca volver a consultar la BD
+    assert not cache.reservar_sincronizacion(60)
+    cache.sincronizar(("a", 1))
+    assert cache.version == version and cache.get(1) is not None
+
+    cache.sincronizar(("b", 2))
+    assert cache.version != version
+    assert cache.get(1) is None
+    assert cache.stats()["external_changes"] == 1
+
+
+def test_version_igual_en_todos_los_procesos():
+    # Dos cachés con la misma huella simulan dos workers o un reinicio
+    uno = FoodCatalogCache(max_entries=10, ttl_seconds=60)
+    otro = FoodCatalogCache(max_entries=10, ttl_seconds=60)
+    for cache in (uno, otro):
+        cache.sincronizar((datetime(2024, 5, 10, 12, 0), 7, 3))
+    assert uno.version == otro.version
+
+    otro.sincronizar((datetime(2024, 5, 10, 12, 1), 7, 3))
+    assert uno.version != otro.version
+
+
+def test_etag_304_y_nueva_version_tras_modificar(client, usuario_y_food):
+    headers, food_id = usuario_y_food()
+
+    primera = client.get(f"/foods/{food_id}", headers=headers)
+    etag = primera.headers["ETag"]
+    assert primera.status_code == 200
+
+    repetida = client.get(f"/foods/{food_id}", headers={**headers, "If-None-Match": etag})
+    assert repetida.status_code == 304
+    assert repetida.headers["ETag"] == etag
+
+    client.put(f"/foods/{food_id}", json={"name": "Lentejas pardinas"}, headers=headers)
+    tras_cambio = client.get(f"/foods/{food_id}", headers={**headers, "If-None-Match": etag})
+    assert tras_cambio.status_code == 200
+    assert tras_cambio.headers["ETag"] != etag
+    assert tras_cambio.json()["data"]["name"] == "Lentejas pardinas"
+
+
+def test_if_none_match_asterisco_solo_para_recursos_existentes(client, usuario_y_food):
+    headers, food_id = usuario_y_food()
+    con_asterisco = {**headers, "If-None-Match": "*"}
+
+    assert client.get(f"/foods/{food_id}", headers=con_asterisco).status_code == 304
+    assert client.get("/foods/-1", headers=con_asterisco).status_code == 404
+    assert not etag_coincide("*", 'W/"x"')
+    assert etag_coincide('W/"y", W/"x"', 'W/"x"')
+
+
+def test_escritura_de_otro_worker_cambia_el_etag(client, usuario_y_food, monkeypatch):
+    monkeypatch.setattr(food_service, "FOOD_CACHE_SYNC_SECONDS", 0)
+    headers, food_id = usuario_y_food()
+    primera = client.get(f"/foods/{food_id}", headers=headers)
+    etag = primera.headers["ETag"]
+
+    # Cambio hecho directamente en la BD, sin pasar por la caché de este proceso
+    with db_session:
+        food = Food[food_id]
+        food.name = "Lentejas rojas"
+        food.updated_at = datetime.now()
+
+    respuesta = client.get(f"/foods/{food_id}", headers={**headers, "If-None-Match": etag})
+    assert respuesta.status_code == 200
+    assert respuesta.headers["ETag"] != etag
+    assert respuesta.json()["data"]["name"] == "Lentejas rojas"
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from fastapi import HTTPException
+from pony.orm import db_session
+import pytest
+
+from src.models import FoodTombstone
+from src.services.food_service import CHANGES_SAFETY_WINDOW_SECONDS, FoodService
+
+
+def _instante_unico() -> datetime:
+    # Un tramo del pasado que no comparte fechas con otros tests
+    return datetime(2000, 1, 1) + timedelta(seconds=uuid4().int % 10**8)
+
+
+@pytest.fixture
+def food(crear_food):
+    def crear(updated_at: datetime) -> int:
+        return crear_food(f"Cambio {uuid4().hex[:6]}", updated_at=updated_at)
+
+    return crear
+
+
+def _sincronizar(since: str, hasta: datetime, limit: int) -> tuple:
+    """Recorre las páginas hasta pasar de `hasta`; devuelve altas, bajas y páginas."""
+    service = FoodService()
+    altas, bajas, paginas = [], [], 0
+    while True:
+        pagina = service.listar_cambios(since, limit)
+        paginas += 1
+        altas += [f["id"] for f in pagina["items"] if f["updated_at"] <= hasta]
+        bajas += pagina["deleted_ids"]
+        since = pagina["next_cursor"]
+        if not pagina["has_more"] or datetime.fromisoformat(since.split("|")[0]) > hasta:
+            return altas, bajas, paginas
+
+
+def test_paginacion_sin_huecos_ni_duplicados_con_empates(food):
+    base = _instante_unico()
+    ids = [food(base + timedelta(seconds=i)) for i in range(3)]
+    # Varios alimentos con el mismo updated_at repartidos entre páginas
+    empatados = [food(base + timedelta(seconds=10)) for _ in range(4)]
+    with db_session:
+        FoodTombstone(food_id=-1, deleted_at=base + timedelta(seconds=5))
+        FoodTombstone(food_id=-2, deleted_at=base + timedelta(seconds=10))
+
+    since = FoodService._format_cursor(base - timedelta(seconds=1), 0)
+    altas, bajas, paginas = _sincronizar(since, base + timedelta(seconds=10), limit=2)
+
+    assert altas == ids + sorted(empatados)
+    assert set(bajas) >= {-1, -2}
+    assert paginas >= 5
+
+
+def test_cursor_no_pasa_del_margen_de_seguridad(food):
+    recientes = [food(datetime.now()) for _ in range(3)]
+    desde = datetime.now() - timedelta(seconds=CHANGES_SAFETY_WINDOW_SECONDS + 60)
+
+    pagina = FoodService().listar_cambios(FoodService._format_cursor(desde, 0), 1000)
+
+    assert set(recientes) <= {f["id"] for f in pagina["items"]}
+    cursor_ts = datetime.fromisoformat(pagina["next_cursor"].split("|")[0])
+    assert cursor_ts <= datetime.now() - timedelta(seconds=CHANGES_SAFETY_WINDOW_SECONDS)
+    assert pagina["has_more"] is False
+
+    # Página llena dentro del margen: no se sigue paginando ni avanza el cursor
+    pagina = FoodService().listar_cambios(FoodService._format_cursor(desde, 0), 1)
+    assert pagina["has_more"] is False
+    cursor_ts = datetime.fromisoformat(pagina["next_cursor"].split("|")[0])
+    assert cursor_ts <= datetime.now() - timedelta(seconds=CHANGES_SAFETY_WINDOW_SECONDS)
+
+
+def test_baja_visible_tras_sincronizar_el_alta(food):
+    food_id = food(datetime.now() - timedelta(seconds=CHANGES_SAFETY_WINDOW_SECONDS + 30))
+    inicio = datetime.now() - timedelta(seconds=CHANGES_SAFETY_WINDOW_SECONDS + 31)
+    service = FoodService()
+
+    pagina = service.listar_cambios(service._format_cursor(inicio, 0), 1000)
+    assert food_id in {f["id"] for f in pagina["items"]}
+
+    service.eliminar_food(food_id, user_id=-1)
+
+    siguiente = service.listar_cambios(pagina["next_cursor"], 1000)
+    assert food_id in siguiente["deleted_ids"]
+    assert food_id not in {f["id"] for f in siguiente["items"]}
+
+
+def test_cursor_invalido():
+    with pytest.raises(HTTPException) as exc:
+        FoodService().listar_cambios("ayer|x")
+    assert exc.value.status_code == 400
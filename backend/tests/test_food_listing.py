@@ -0,0 +1,62 @@
+import pytest
+from pony.orm import db_session, select
+
+from src.models import Food
+from src.services.food_service import FOOD_FIELDS
+
+
+@pytest.fixture
+def headers_y_foods(crear_usuario, crear_food, auth_headers):
+    def crear(cuantos: int) -> tuple:
+        headers = auth_headers(crear_usuario("listado"))
+        return headers, [crear_food(f"Listado {i}", calories_per_100g=i) for i in range(cuantos)]
+
+    return crear
+
+
+def test_paginas_sin_huecos_ni_duplicados(client, headers_y_foods):
+    headers, ids = headers_y_foods(7)
+    cursor = ids[0] - 1
+    vistos = []
+    paginas = 0
+
+    while cursor is not None:
+        respuesta = client.get(f"/foods/all?cursor={cursor}&limit=3", headers=headers)
+        assert respuesta.status_code == 200
+        data = respuesta.json()["data"]
+        assert len(data["items"]) <= 3
+        vistos += [item["id"] for item in data["items"]]
+        cursor = data["next_cursor"]
+        paginas += 1
+
+    with db_session:
+        esperados = select(f.id for f in Food if f.id >= ids[0]).order_by(1)[:]
+    assert vistos == list(esperados)
+    assert set(ids) <= set(vistos)
+    assert paginas >= 3
+
+
+def test_proyeccion_de_campos(client, headers_y_foods):
+    headers, ids = headers_y_foods(2)
+
+    respuesta = client.get(
+        f"/foods/all?cursor={ids[0] - 1}&limit=2&fields=name,calories_per_100g", headers=headers
+    )
+    items = respuesta.json()["data"]["items"]
+
+    # El id se incluye siempre porque es el cursor
+    assert [set(item) for item in items] == [{"id", "name", "calories_per_100g"}] * 2
+    assert items[0] == {"id": ids[0], "name": "Listado 0", "calories_per_100g": 0}
+
+    completo = client.get(f"/foods/all?cursor={ids[0] - 1}&limit=1", headers=headers)
+    assert set(completo.json()["data"]["items"][0]) == set(FOOD_FIELDS)
+
+
+def test_campo_o_cursor_invalidos(client, headers_y_foods):
+    headers, _ = headers_y_foods(1)
+
+    campo = client.get("/foods/all?fields=name,password_hash", headers=headers)
+    assert campo.status_code == 400
+    assert "password_hash" in campo.json()["message"]
+
+    assert client.get("/foods/all?cursor=abc", headers=headers).status_code == 422
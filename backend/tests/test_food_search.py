@@ -0,0 +1,34 @@
+from src.schemas import FoodCreate
+from src.services.food_service import FoodService
+
+
+def _crear(nombre: str) -> None:
+    FoodService().crear_food(
+        FoodCreate(
+            name=nombre,
+            calories_per_100g=100,
+            protein_per_100g=1,
+            carbs_per_100g=1,
+            fat_per_100g=1,
+        ),
+        None,
+    )
+
+
+def test_busqueda_corta_por_prefijo_de_palabra():
+    service = FoodService()
+    # Construye los índices antes de crear para que se actualicen al guardar
+    service.buscar_food_por_nombre("qx", None)
+    for nombre in ("Otro qxc", "Qxa pan", "Pan qxb", "Qx", "Pan sin coincidencia"):
+        _crear(nombre)
+
+    # Primero los que empiezan por el prefijo, luego los que tienen una
+    # palabra que empieza por él; cada grupo en orden alfabético
+    nombres = [f["name"] for f in service.buscar_food_por_nombre("QX", None)]
+    assert nombres == ["Qx", "Qxa pan", "Pan qxb", "Otro qxc"]
+
+    assert [f["name"] for f in service.buscar_food_por_nombre("qx", None, limit=2)] == [
+        "Qx",
+        "Qxa pan",
+    ]
+    assert service.buscar_food_por_nombre("qz", None) == []
@@ -0,0 +1,45 @@
+from src.services.food_search_index import FoodSearchIndex, normalizar_nombre
+
+
+FOODS = [
+    (1, "Leche entera"),
+    (2, "Yogur de leche"),
+    (3, "Café con leche"),
+    (4, "Lechuga"),
+    (5, "Pan integral"),
+]
+
+
+def _index() -> FoodSearchIndex:
+    return FoodSearchIndex(lambda: list(FOODS))
+
+
+def test_normalizar_nombre_quita_acentos_y_mayusculas():
+    assert normalizar_nombre("  Café   CON Léche ") == "cafe con leche"
+
+
+def test_buscar_ordena_por_relevancia_y_respeta_limite():
+    index = _index()
+    assert index.buscar("leche", 10) == [1, 2, 3]
+    assert index.buscar("LÉCHE", 2) == [1, 2]
+    assert index.buscar("lec", 1) == [4]
+
+
+def test_buscar_prefijos_cortos():
+    index = _index()
+    assert index.buscar("pa", 10) == [5]
+    assert index.buscar("z", 10) == []
+
+
+def test_indexar_y_eliminar_mantienen_el_indice():
+    index = _index()
+    index.buscar("pan", 10)
+
+    index.indexar(6, "Pan de molde")
+    assert index.buscar("pan", 10) == [5, 6]
+
+    index.indexar(5, "Tostadas")
+    assert index.buscar("pan", 10) == [6]
+
+    index.eliminar(6)
+    assert index.buscar("pan", 10) == []
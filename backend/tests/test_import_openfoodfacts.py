@@ -0,0 +1,168 @@
+from uuid import uuid4
+
+import gzip
+import json
+import pathlib
+
+from pony.orm import db_session
+
+from import_openfoodfacts import importar
+from src.models import Food
+from src.services.openfoodfacts_dump import (
+    abrir_texto,
+    detectar_formato,
+    filas_validas,
+    guardar_checkpoint,
+    leer_checkpoint,
+    origen_de,
+    productos_csv,
+    productos_jsonl,
+)
+
+
+def _barcode() -> str:
+    return str(uuid4().int)[:13]
+
+
+def _producto(barcode: str, nombre: str = "Queso", **nutrientes) -> dict:
+    nutriments = {
+        "energy-kcal_100g": 350,
+        "proteins_100g": 25,
+        "carbohydrates_100g": 1.5,
+        "fat_100g": 28,
+    }
+    nutriments.update(nutrientes)
+    return {"code": barcode, "product_name": nombre, "nutriments": nutriments}
+
+
+def _jsonl(path: pathlib.Path, lineas: list) -> str:
+    contenido = "\n".join(l if isinstance(l, str) else json.dumps(l) for l in lineas) + "\n"
+    if path.suffix == ".gz":
+        path.write_bytes(gzip.compress(contenido.encode("utf-8")))
+    else:
+        path.write_text(contenido, encoding="utf-8")
+    return str(path)
+
+
+def _leer(path: str, formato: str) -> tuple:
+    stats = {"read": 0, "skipped": 0}
+    with abrir_texto(path) as archivo:
+        productos = productos_jsonl(archivo) if formato == "jsonl" else productos_csv(archivo, "\t")
+        filas = list(filas_validas(productos, 0, stats))
+    return filas, stats
+
+
+def test_csv_gz_descarta_filas_invalidas(tmp_path):
+    cabecera = "code\tproduct_name\tenergy-kcal_100g\tproteins_100g\tcarbohydrates_100g\tfat_100g"
+    filas = [
+        "12345678\tYogur\t61\t3.5\t4.7\t3.3",
+        "abc\tLetras\t1\t1\t1\t1",
+        "123\tCorto\t1\t1\t1\t1",
+        "87654321\tSin grasa\t1\t1\t1\t",
+        "11112222\tTexto\t1\tx\t1\t1",
+        " 99998888 \tAceite\t884\t0\t0\t100",
+    ]
+    path = tmp_path / "volcado.csv.gz"
+    path.write_bytes(gzip.compress("\n".join([cabecera] + filas).encode("utf-8")))
+
+    assert detectar_formato(str(path)) == "csv"
+    validas, stats = _leer(str(path), "csv")
+
+    assert [(pos, barcode, food["name"]) for pos, barcode, food in validas] == [
+        (1, "12345678", "Yogur"),
+        (6, "99998888", "Aceite"),
+    ]
+    assert validas[0][2]["calories_per_100g"] == 61.0
+    assert stats == {"read": 6, "skipped": 4, "position": 6}
+
+
+def test_jsonl_gz_descarta_lineas_invalidas(tmp_path):
+    path = _jsonl(
+        tmp_path / "volcado.jsonl.gz",
+        [
+            _producto("12345678"),
+            "",
+            "{no es json",
+            {"_id": "22223333", "product_name": "Por _id", "nutriments": _producto("x")["nutriments"]},
+            _producto("44445555", nombre=""),
+            _producto("55556666", proteins_100g=None),
+            _producto("66667777", fat_100g=-1),
+            _producto("77778888", **{"energy-kcal_100g": "NaN"}),
+            _producto("88889999", carbohydrates_100g="inf"),
+        ],
+    )
+
+    assert detectar_formato(path) == "jsonl"
+    validas, stats = _leer(path, "jsonl")
+
+    assert [(pos, barcode) for pos, barcode, _ in validas] == [(1, "12345678"), (4, "22223333")]
+    assert stats == {"read": 9, "skipped": 7, "position": 9}
+
+
+def test_checkpoint_de_otro_archivo_se_ignora(tmp_path):
+    path = _jsonl(tmp_path / "a.jsonl", [_producto("12345678")])
+    otro = _jsonl(tmp_path / "b.jsonl", [_producto("12345678"), _producto("87654321")])
+    checkpoint = str(tmp_path / "a.checkpoint.json")
+
+    assert leer_checkpoint(checkpoint, origen_de(path)) == 0
+    guardar_checkpoint(checkpoint, origen_de(path), 7, {"read": 7})
+    assert leer_checkpoint(checkpoint, origen_de(path)) == 7
+    assert leer_checkpoint(checkpoint, origen_de(otro)) is None
+
+
+def test_reanuda_desde_el_checkpoint(tmp_path):
+    barcodes = [_barcode() for _ in range(4)]
+    path = _jsonl(tmp_path / "reanudar.jsonl", [_producto(b) for b in barcodes])
+    checkpoint = str(tmp_path / "reanudar.checkpoint.json")
+    # Como si una ejecución anterior hubiera confirmado las dos primeras filas
+    guardar_checkpoint(checkpoint, origen_de(path), 2, {})
+
+    stats = importar(path, batch_size=1, checkpoint_path=checkpoint)
+
+    assert stats["read"] == 2 and stats["upserted"] == 2
+    with db_session:
+        assert [Food.exists(barcode=b) for b in barcodes] == [False, False, True, True]
+    assert leer_checkpoint(checkpoint, origen_de(path)) == 4
+
+
+def test_reimportar_solo_modifica_las_filas_que_cambian(tmp_path):
+    igual, cambia = _barcode(), _barcode()
+    checkpoint = str(tmp_path / "upsert.checkpoint.json")
+    primero = _jsonl(tmp_path / "primero.jsonl", [_producto(igual), _producto(cambia)])
+    importar(primero, checkpoint_path=checkpoint, resume=False)
+    with db_session:
+        antes = {b: Food.get(barcode=b).updated_at for b in (igual, cambia)}
+
+    segundo = _jsonl(
+        tmp_path / "segundo.jsonl", [_producto(igual), _producto(cambia, nombre="Queso curado")]
+    )
+    importar(segundo, checkpoint_path=checkpoint, resume=False)
+
+    with db_session:
+        assert Food.get(barcode=igual).updated_at == antes[igual]
+        modificado = Food.get(barcode=cambia)
+        assert modificado.name == "Queso curado"
+        assert modificado.updated_at > antes[cambia]
+        assert Food.select(lambda f: f.barcode in (igual, cambia)).count() == 2
+
+
+def test_no_modifica_alimentos_creados_por_usuarios(tmp_path, crear_usuario, crear_food):
+    barcode = _barcode()
+    crear_food(
+        "Queso de mi pueblo",
+        calories_per_100g=300,
+        protein_per_100g=20,
+        carbs_per_100g=1,
+        fat_per_100g=25,
+        barcode=barcode,
+        created_by=crear_usuario("import"),
+    )
+
+    path = _jsonl(tmp_path / "usuario.jsonl", [_producto(barcode, nombre="Queso industrial")])
+    stats = importar(path, checkpoint_path=str(tmp_path / "usuario.checkpoint.json"), resume=False)
+
+    assert stats["read"] == 1
+    with db_session:
+        food = Food.get(barcode=barcode)
+        assert food.name == "Queso de mi pueblo"
+        assert food.calories_per_100g == 300
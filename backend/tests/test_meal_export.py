@@ -0,0 +1,26 @@
+import csv
+import gzip
+import io
+import json
+
+from src.services.meal_service import MealService
+from src.utils.responses import gzip_stream
+
+
+def test_exportar_historial_por_bloques(usuario_con_comidas_hoy, agregar_historial):
+    user_id = usuario_con_comidas_hoy
+    agregar_historial(user_id, 5)
+
+    # Bloques de 2 filas para recorrer varias páginas del keyset
+    ndjson = "".join(MealService().exportar_meals(user_id, "ndjson", chunk=2))
+    filas = [json.loads(linea) for linea in ndjson.splitlines()]
+    assert len(filas) == 8
+    assert [f["consumed_at"] for f in filas] == sorted(f["consumed_at"] for f in filas)
+    assert filas[-1]["food_name"] == "Avena"
+
+    partes = MealService().exportar_meals(user_id, "csv", incluir_food=False, chunk=3)
+    texto = gzip.decompress(b"".join(gzip_stream(partes))).decode("utf-8")
+    filas_csv = list(csv.DictReader(io.StringIO(texto)))
+    assert len(filas_csv) == 8
+    assert "food_name" not in filas_csv[0]
+    assert [int(f["id"]) for f in filas_csv] == [f["id"] for f in filas]
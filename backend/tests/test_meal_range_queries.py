@@ -0,0 +1,53 @@
+from datetime import datetime
+
+from pony.orm import db_session
+
+from src.db import db
+from src.models import Usuario, Meal
+from src.services.meal_service import MealService
+from src.services.dashboard_service import DashboardService
+
+
+def _comidas_cargadas(fn) -> int:
+    # Los db_session de los servicios se anidan en este y comparten su caché
+    with db_session:
+        fn()
+        return sum(1 for o in db._get_cache().objects if isinstance(o, Meal))
+
+
+def test_consultas_de_hoy_no_dependen_del_historial(usuario_con_comidas_hoy, agregar_historial):
+    user_id = usuario_con_comidas_hoy
+    hoy = datetime.now().date()
+    meals = MealService()
+    dashboard = DashboardService()
+
+    def medir():
+        return (
+            _comidas_cargadas(lambda: meals.listar_meals_rango(user_id, hoy, hoy)),
+            _comidas_cargadas(lambda: dashboard.obtener_dashboard_del_dia(user_id, hoy)),
+            _comidas_cargadas(lambda: dashboard.obtener_dashboard_rango(user_id, hoy, hoy)),
+        )
+
+    antes = medir()
+    agregar_historial(user_id, dias=300)
+    despues = medir()
+
+    assert antes == (3, 0, 0)
+    assert despues == antes
+
+    dia = dashboard.obtener_dashboard_del_dia(user_id, hoy)
+    rango = dashboard.obtener_dashboard_rango(user_id, hoy, hoy)
+    assert dia["total_calories"] == 3 * 389
+    assert rango[0]["total_calories"] == 3 * 389
+
+
+def test_lecturas_del_dashboard_no_crean_configuracion(usuario_con_comidas_hoy):
+    user_id = usuario_con_comidas_hoy
+    hoy = datetime.now().date()
+
+    dia = DashboardService().obtener_dashboard_del_dia(user_id, hoy)
+    DashboardService().obtener_dashboard_rango(user_id, hoy, hoy)
+
+    assert dia["metabolism_base"] == 1770
+    with db_session:
+        assert Usuario[user_id].settings is None
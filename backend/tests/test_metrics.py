@@ -0,0 +1,19 @@
+from src import auth
+
+
+def test_metricas_exigen_el_token(client, monkeypatch):
+    monkeypatch.setattr(auth, "METRICS_TOKEN", "token-de-prueba")
+
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer otro"}).status_code == 401
+
+    respuesta = client.get("/metrics", headers={"Authorization": "Bearer token-de-prueba"})
+    assert respuesta.status_code == 200
+    assert "uptime" in respuesta.json()
+
+
+def test_metricas_desactivadas_sin_token(client, monkeypatch):
+    monkeypatch.setattr(auth, "METRICS_TOKEN", "")
+
+    respuesta = client.get("/metrics", headers={"Authorization": "Bearer "})
+    assert respuesta.status_code == 404
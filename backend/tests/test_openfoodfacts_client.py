@@ -0,0 +1,162 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from fastapi import HTTPException
+
+from src.services.circuit_breaker import CircuitBreaker
+from src.services.openfoodfacts_client import OpenFoodFactsClient
+
+
+PRODUCTS = {
+    "12345678": {
+        "status": 1,
+        "product": {
+            "product_name": "Yogur natural",
+            "nutriments": {
+                "energy-kcal_100g": 61,
+                "proteins_100g": 3.5,
+                "carbohydrates_100g": 4.7,
+                "fat_100g": 3.3,
+            },
+        },
+    },
+    "87654321": {
+        "status": 1,
+        "product": {"product_name": "Sin datos", "nutriments": {}},
+    },
+}
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    calls: dict = {}
+
+    def do_GET(self):
+        barcode = self.path.rsplit("/", 1)[-1].replace(".json", "")
+        _StubHandler.calls[barcode] = _StubHandler.calls.get(barcode, 0) + 1
+        # Latencia artificial para que las peticiones concurrentes se solapen
+        time.sleep(0.2)
+
+        if barcode == "99999999":
+            self.send_response(500)
+            self.end_headers()
+            return
+
+        body = json.dumps(PRODUCTS.get(barcode, {"status": 0})).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    _StubHandler.calls = {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _buscar(client, *barcodes):
+    """Lanza las búsquedas a la vez; devuelve resultados o excepciones en orden."""
+
+    async def lookups():
+        return await asyncio.gather(
+            *(client.buscar_producto(b) for b in barcodes),
+            return_exceptions=True,
+        )
+
+    return asyncio.run(lookups())
+
+
+def test_busqueda_mapea_los_nutrientes(stub_server):
+    client = OpenFoodFactsClient(base_url=stub_server, timeout=2)
+
+    data = asyncio.run(client.buscar_producto("12345678"))
+
+    assert data == {
+        "name": "Yogur natural",
+        "calories_per_100g": 61.0,
+        "protein_per_100g": 3.5,
+        "carbs_per_100g": 4.7,
+        "fat_per_100g": 3.3,
+    }
+
+
+def test_busquedas_concurrentes_comparten_una_llamada(stub_server):
+    client = OpenFoodFactsClient(base_url=stub_server, timeout=2)
+
+    results = _buscar(client, *["12345678"] * 8)
+
+    assert all(r["name"] == "Yogur natural" for r in results)
+    assert _StubHandler.calls["12345678"] == 1
+    assert client.stats()["coalesced"] == 7
+
+
+def test_espera_por_conexion_no_cuenta_en_el_breaker(stub_server):
+    # Una sola conexión: cada búsqueda tarda 0.2s, pero las que esperan turno
+    # no deben verse como llamadas lentas ni abrir el circuito
+    breaker = CircuitBreaker(failure_threshold=2, slow_call_seconds=0.5, reset_seconds=60)
+    client = OpenFoodFactsClient(base_url=stub_server, timeout=2, pool_size=1, breaker=breaker)
+    barcodes = ["12345678", "11111111", "22222222", "87654321", "33333333"]
+
+    inicio = time.monotonic()
+    results = _buscar(client, *barcodes)
+
+    assert time.monotonic() - inicio >= 0.9
+    assert results[0]["name"] == "Yogur natural"
+    assert [r.status_code for r in results[1:]] == [404, 404, 400, 404]
+    stats = client.stats()
+    assert stats["local_waits"] == 4
+    assert stats["breaker"]["state"] == "closed"
+    assert stats["breaker"]["slow_calls"] == 0
+
+
+def test_cache_negativa_para_no_encontrado_e_incompleto(stub_server):
+    client = OpenFoodFactsClient(base_url=stub_server, timeout=2, negative_ttl=60)
+
+    for barcode, expected_status in (("11111111", 404), ("87654321", 400)):
+        for _ in range(3):
+            with pytest.raises(HTTPException) as exc:
+                asyncio.run(client.buscar_producto(barcode))
+            assert exc.value.status_code == expected_status
+        assert _StubHandler.calls[barcode] == 1
+
+    assert client.stats()["negative_hits"] == 4
+
+
+def test_errores_del_servicio_externo_no_se_cachean(stub_server):
+    client = OpenFoodFactsClient(base_url=stub_server, timeout=2)
+
+    for _ in range(2):
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(client.buscar_producto("99999999"))
+        assert exc.value.status_code == 502
+
+    assert _StubHandler.calls["99999999"] == 2
+
+
+def test_circuito_abierto_falla_rapido_sin_llamar_al_servicio(stub_server):
+    breaker = CircuitBreaker(failure_threshold=2, slow_call_seconds=5, reset_seconds=60)
+    client = OpenFoodFactsClient(base_url=stub_server, timeout=2, breaker=breaker)
+
+    for _ in range(2):
+        with pytest.raises(HTTPException):
+            asyncio.run(client.buscar_producto("99999999"))
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(client.buscar_producto("12345678"))
+
+    assert exc.value.status_code == 503
+    assert "12345678" not in _StubHandler.calls
+    assert client.stats()["breaker"]["state"] == "open"
@@ -0,0 +1,61 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from src.services.password_hasher import PASSWORD_HASH_RETRY_AFTER_SECONDS, PasswordHasher
+
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(rounds=4, workers=0, max_pending=1, timeout=0.2)
+    yield hasher
+    hasher.cerrar()
+
+
+def _comprobar_503(exc: HTTPException) -> None:
+    assert exc.status_code == 503
+    assert exc.headers == {"Retry-After": str(PASSWORD_HASH_RETRY_AFTER_SECONDS)}
+
+
+def test_cola_llena_responde_503(hasher):
+    liberar = threading.Event()
+
+    async def escenario():
+        primera = asyncio.ensure_future(hasher._ejecutar(liberar.wait, 5))
+        await asyncio.sleep(0.05)
+        with pytest.raises(HTTPException) as exc:
+            await hasher._ejecutar(liberar.wait, 5)
+        liberar.set()
+        assert await primera is True
+        return exc.value
+
+    _comprobar_503(asyncio.run(escenario()))
+    assert hasher.stats()["rejected"] == 1
+    assert hasher.stats()["pending"] == 0
+
+
+def test_plazo_agotado_responde_503_y_mantiene_el_hueco(hasher):
+    liberar = threading.Event()
+
+    async def escenario():
+        with pytest.raises(HTTPException) as plazo:
+            await hasher._ejecutar(liberar.wait, 5)
+        # El worker sigue ocupado: la siguiente no se encola detrás
+        assert hasher.stats()["pending"] == 1
+        with pytest.raises(HTTPException) as cola:
+            await hasher._ejecutar(liberar.wait, 5)
+        return plazo.value, cola.value
+
+    try:
+        plazo, cola = asyncio.run(escenario())
+    finally:
+        liberar.set()
+    _comprobar_503(plazo)
+    _comprobar_503(cola)
+
+    # Cuando el worker acaba el hueco vuelve a estar libre
+    assert asyncio.run(hasher.verify_password("secreto", asyncio.run(hasher.hash_password("secreto"))))
+    assert hasher.stats()["rejected"] == 2
+    assert hasher.stats()["pending"] == 0
@@ -22,94 +22,97 @@ export function AppProvider({ children }: { children: ReactNode }) {
     async function loadFoodsAndMealsFromApi() {
       try {
         const apiUrl = process.env.NEXT_PUBLIC_API_URL ?? "http://localhost:8000"
-        const res = await fetch(`${apiUrl}/foods/all`, {
-          headers: {
-            Authorization: `Bearer ${token}`,
-          },
+        type BackendFood = {
+          id: number
+          name: string
+          calories_per_100g: number
+          protein_per_100g: number
+          carbs_per_100g: number
+          fat_per_100g: number
+        }
+
+        const headers = { Authorization: `Bearer ${token}` }
+        const foodFields =
+          "name,calories_per_100g,protein_per_100g,carbs_per_100g,fat_per_100g"
+
+        // /bootstrap trae las comidas de hoy y la primera página del catálogo
+        // en una sola petición
+        const bootParams = new URLSearchParams({
+          fields: "meals,foods",
+          food_fields: foodFields,
+        })
+        const bootRes = await fetch(`${apiUrl}/bootstrap?${bootParams.toString()}`, {
+          headers,
         })
+        const bootJson = await bootRes.json().catch(() => ({}))
+        const boot = bootJson?.data
+        if (!bootRes.ok || !bootJson?.success || !boot || !Array.isArray(boot.foods?.items)) {
+          return
+        }
+
+        // El resto del catálogo se pide a /foods/all siguiendo el cursor
+        const backendFoods: BackendFood[] = [...(boot.foods.items as BackendFood[])]
+        let cursor: number | null = boot.foods.next_cursor ?? null
+        while (cursor !== null) {
+          const params = new URLSearchParams({
+            fields: foodFields,
+            cursor: String(cursor),
+          })
+          const res = await fetch(`${apiUrl}/foods/all?${params.toString()}`, {
+            headers,
+          })
+          const json = await res.json().catch(() => ({}))
+          const page = json?.data
+          if (!res.ok || !json?.success || !page || !Array.isArray(page.items)) break
+          backendFoods.push(...(page.items as BackendFood[]))
+          cursor = page.next_cursor ?? null
+        }
+
+        const mapped: FoodItem[] = backendFoods.map((f) => ({
+          id: String(f.id),
+          name: f.name,
+          calories: f.calories_per_100g,
+          protein: f.protein_per_100g,
+          carbs: f.carbs_per_100g,
+          fat: f.fat_per_100g,
+          servingSize: "100g",
+        }))
 
-        const json = await res.json().catch(() => ({}))
-        const isBackendFormat = json && typeof json.success === "boolean"
+        setSavedFoods(mapped)
 
-        if (res.ok && isBackendFormat && json.success && Array.isArray(json.data)) {
-          const backendFoods = json.data as Array<{
+        if (Array.isArray(boot.meals)) {
+          const backendMeals = boot.meals as Array<{
             id: number
-            name: string
-            calories_per_100g: number
-            protein_per_100g: number
-            carbs_per_100g: number
-            fat_per_100g: number
+            food_id: int
+            quantity_grams: number
+            consumed_at: string
           }>
 
-          const mapped: FoodItem[] = backendFoods.map((f) => ({
-            id: String(f.id),
-            name: f.name,
-            calories: f.calories_per_100g,
-            protein: f.protein_per_100g,
-            carbs: f.carbs_per_100g,
-            fat: f.fat_per_100g,
-            servingSize: "100g",
-          }))
-
-          setSavedFoods(mapped)
-
-          const today = new Date()
-          const startDate = today.toISOString().split("T")[0]
-          const endDate = startDate
-
-          const mealsRes = await fetch(
-            `${apiUrl}/meals/range?start_date=${startDate}&end_date=${endDate}`,
-            {
-              headers: {
-                Authorization: `Bearer ${token}`,
-              },
-            }
-          )
-
-          const mealsJson = await mealsRes.json().catch(() => ({}))
-          const isMealsFormat =
-            mealsJson && typeof mealsJson.success === "boolean"
-
-          if (
-            mealsRes.ok &&
-            isMealsFormat &&
-            mealsJson.success &&
-            mealsJson.data &&
-            Array.isArray(mealsJson.data.items)
-          ) {
-            const backendMeals = mealsJson.data.items as Array<{
-              id: number
-              food_id: int
-              quantity_grams: number
-              consumed_at: string
-            }>
-
-            const mappedMeals: MealEntry[] = backendMeals
-              .map((m) => {
-                const food = mapped.find(
-                  (f) => Number(f.id) === m.food_id
-                )
-                if (!food) return null
-
-                const consumed = new Date(m.consumed_at)
-                const date = consumed.toISOString().split("T")[0]
-                const time = consumed.toLocaleTimeString("es-ES", {
-                  hour: "2-digit",
-                  minute: "2-digit",
-                })
-
-                return {
-                  id: String(m.id),
-                  foodItem: food,
-                  quantity: m.quantity_grams,
-                  time,
-                  date,
-                }
+          const mappedMeals: MealEntry[] = backendMeals
+            .map((m) => {
+              const food = mapped.find(
+                (f) => Number(f.id) === m.food_id
+              )
+              if (!food) return null
+
+              const consumed = new Date(m.consumed_at)
+              const date = consumed.toISOString().split("T")[0]
+              const time = consumed.toLocaleTimeString("es-ES", {
+                hour: "2-digit",
+                minute: "2-digit",
               })
-              .filter((m): m is MealEntry => m !== null)
 
-            setMeals(mappedMeals)
-          }
+              return {
+                id: String(m.id),
+                foodItem: food,
+                quantity: m.quantity_grams,
+                time,
+                date,
+              }
+            })
+            .filter((m): m is MealEntry => m !== null)
+
+          setMeals(mappedMeals)
         }
       } catch {
       }